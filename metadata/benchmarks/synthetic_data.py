@@ -0,0 +1,201 @@
+"""Synthetic Data
+
+Synthetic registries at arbitrary scale for benchmarking the metadata
+pipeline.
+
+Installations are resampled from a template registry (by default
+data/solar_array_registry.csv), so null density, component slot fill
+and polygon sizes follow the real data. Each row's polygon is moved to
+a random site in the continental US, and the derived columns
+(geometry EWKB, wkt_geometry GeoJSON, centroid, bbox, tokenId) are
+recomputed, so every row gets its own token ID.
+
+Component sheets mimic the CEC listings as extract_excel returns them:
+the header row and column layout each component transform expects, a
+unique manufacturer/model per row, and "No Information Submitted" and
+blank cells at CEC-like rates.
+
+Functions:
+    - generate_installation_registry: Synthetic installation rows.
+    - write_installation_registry: Stream a synthetic registry to CSV in chunks.
+    - generate_component_sheet: Synthetic CEC-style component listing.
+"""
+
+import numpy as np
+import pandas as pd
+import shapely
+from helpers.metadata_helpers import generate_installation_token_ids
+
+DEFAULT_TEMPLATE = "./data/solar_array_registry.csv"
+
+# Continental US, where the template installations live
+US_BOUNDS = (-124.0, 25.0, -67.0, 49.0)
+
+
+def _load_template(template):
+    if isinstance(template, pd.DataFrame):
+        return template.reset_index(drop=True)
+    return pd.read_csv(template or DEFAULT_TEMPLATE)
+
+
+def generate_installation_registry(n_rows: int, template=None, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    """
+    Generate synthetic installation registry rows.
+
+    Args:
+        n_rows (int): Number of rows.
+        template (str or pd.DataFrame): Registry to resample. Defaults to
+            the solar array registry.
+        seed (int): Random seed; the same seed and start give the same rows.
+        start (int): Row offset, so chunks of one registry differ.
+
+    Returns:
+        pd.DataFrame: Rows with the template's columns.
+    """
+    template = _load_template(template)
+    rng = np.random.default_rng([seed, start])
+
+    rows = rng.integers(0, len(template), n_rows)
+    df = template.iloc[rows].reset_index(drop=True)
+
+    # Move each template polygon to a random site
+    shapes = shapely.from_geojson(template["wkt_geometry"].tolist())
+    template_centroids = shapely.from_wkt(template["centroid"].tolist())
+    min_lon, min_lat, max_lon, max_lat = US_BOUNDS
+    lons = np.round(rng.uniform(min_lon, max_lon, n_rows), 6)
+    lats = np.round(rng.uniform(min_lat, max_lat, n_rows), 6)
+    offsets = np.column_stack((lons - shapely.get_x(template_centroids)[rows], lats - shapely.get_y(template_centroids)[rows]))
+
+    geometries = shapes[rows]
+    per_coordinate = np.repeat(offsets, shapely.get_num_coordinates(geometries), axis=0)
+    geometries = shapely.transform(geometries, lambda coords: np.round(coords + per_coordinate, 6))
+
+    centroids = shapely.centroid(geometries)
+    bounds = shapely.bounds(geometries)
+    scaled = np.rint((bounds + [180, 90, 180, 90]) * 1e6).astype(np.int64)
+
+    df["tokenId"] = generate_installation_token_ids(shapely.get_x(centroids), shapely.get_y(centroids))
+    df["geometry"] = shapely.to_wkb(shapely.set_srid(geometries, 4326), hex=True, include_srid=True)
+    df["wkt_geometry"] = shapely.to_geojson(geometries)
+    df["centroid"] = shapely.to_wkt(centroids, rounding_precision=-1)
+    df["bbox"] = [f"[{lat0}, {lon0}, {lat1}, {lon1}]" for lon0, lat0, lon1, lat1 in scaled.tolist()]
+    return df
+
+
+def write_installation_registry(path, n_rows: int, template=None, seed: int = 0, chunk_size: int = 100000) -> int:
+    """
+    Write a synthetic installation registry CSV without holding it all in memory.
+
+    Returns:
+        int: Rows written.
+    """
+    template = _load_template(template)
+    for start in range(0, n_rows, chunk_size):
+        chunk = generate_installation_registry(min(chunk_size, n_rows - start), template, seed, start)
+        chunk.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+    return n_rows
+
+
+# CEC column layouts: (header, kind, null rate) in sheet order
+_MODULE_COLUMNS = [
+    ("Manufacturer", "manufacturer", 0), ("Model Number", "model", 0), ("Description", "text", 0.01),
+    ("Safety Certification", "choice:UL 1703|UL 61730|IEC 61730", 0.05), ("Nameplate Pmax", "float:100:700", 0),
+    ("PTC", "float:90:650", 0.02), ("Notes", "text", 0.9),
+    ("Design Qualification Certification\n(Optional Submission)", "nis", 0.5),
+    ("Performance Evaluation (Optional Submission)", "nis", 0.5), ("Family", "text", 0.6),
+    ("Technology", "choice:Mono-c-Si|Multi-c-Si|CdTe|CIGS|Thin Film", 0), ("A_c", "float:1:3", 0),
+    ("N_s", "int:36:144", 0), ("N_p", "int:1:3", 0.1), ("BIPV", "choice:Y|N", 0),
+    ("Nameplate Isc", "float:5:20", 0), ("Nameplate Voc", "float:20:80", 0), ("Nameplate Ipmax", "float:5:20", 0),
+    ("Nameplate Vpmax", "float:15:70", 0), ("Average NOCT", "float:40:50", 0.05), ("γPmax", "float:-0.5:-0.2", 0.02),
+    ("αIsc", "float:0:0.1", 0.02), ("βVoc", "float:-0.4:-0.2", 0.02), ("αIpmax", "float:0:0.1", 0.3),
+    ("βVpmax", "float:-0.5:-0.2", 0.3), ("IPmax, low", "float:1:4", 0.1), ("VPmax, low", "float:20:60", 0.1),
+    ("IPmax, NOCT", "float:4:15", 0.1), ("VPmax, NOCT", "float:20:60", 0.1),
+    ("Mounting", "choice:Rack|Integrated|Tracker", 0.1), ("Type", "choice:Glass/Polymer|Glass/Glass", 0.1),
+    ("Short Side", "float:0.9:1.2", 0.05), ("Long Side", "float:1.6:2.4", 0.05),
+    ("Geometric Multiplier", "float:0.9:1.1", 0.3), ("P2/Pref", "float:0.9:1.1", 0.3),
+    ("CEC Listing Date", "date", 0), ("Last Update", "date", 0),
+]
+
+_METER_COLUMNS = [
+    ("Manufacturer", "manufacturer", 0), ("Model", "model", 0), ("Display Type", "choice:LCD|LED|None", 0.1),
+    ("PBI Meter", "choice:Y|N", 0), ("Description", "text", 0.01), ("Date On", "date", 0.9),
+    ("Date Off", "date", 0.95), ("Meter ID", "int:1:999999", 0), ("Listing Date", "date", 0), ("Last Update", "date", 0),
+]
+
+_BATTERY_COLUMNS = [
+    ("Manufacturer", "manufacturer", 0), ("Brand", "text", 0.5), ("Model", "model", 0),
+    ("Technology", "choice:LFP|NMC|Lead Acid|Flow", 0.05), ("Description", "text", 0.01),
+    ("Certifying Entity", "choice:UL|TUV Rheinland|CSA Group|Intertek", 0.05), ("UL Date", "date", 0.1),
+    ("UL Edition", "choice:1st|2nd|3rd", 0.2), ("kWh", "float:1:20", 0), ("kW", "float:1:10", 0.05),
+    ("Efficiency", "float:0.8:0.98", 0.2), ("Control Strategies", "nis", 0.5), ("JA12", "choice:Y|N", 0.1),
+    ("Notes", "text", 0.9), ("Date", "date", 0), ("Last Update", "date", 0),
+]
+
+_INVERTER_COLUMNS = (
+    [("Manufacturer", "manufacturer", 0), ("Model", "model", 0)]
+    + [(f"Flag {i}", "choice:Y|N", 0.3) for i in range(8)]
+    + [("Description", "text", 0.01), ("kW", "float:1:125", 0), ("Volts", "int:120:600", 0), ("Efficiency", "float:94:99", 0.05)]
+    + [(f"Entity {i}", "choice:UL|TUV Rheinland|CSA Group|Intertek", 0.4) for i in range(2)]
+    + [(f"Date {i}", "date", 0.4) for i in range(4)]
+    + [("Firmware", "text", 0.7), ("Permit Disable Date", "date", 0.9), ("CSIP Entity", "text", 0.8),
+       ("CSIP Date", "date", 0.8), ("Attestation Date", "date", 0.8), ("Notes", "text", 0.9),
+       ("Built-in Meter", "choice:Y|N", 0.1), ("Microinverter", "choice:Y|N", 0.1)]
+    + [(f"Value {i}", "float:0:1000", 0.2) for i in range(33)]
+    + [("Grid Date", "date", 0.5), ("Last Update", "date", 0)]
+)
+
+COMPONENT_SHEETS = {
+    "module": _MODULE_COLUMNS,
+    "meter": _METER_COLUMNS,
+    "battery": _BATTERY_COLUMNS,
+    "inverter": _INVERTER_COLUMNS,
+}
+
+
+def _column(kind: str, n_rows: int, rng, start: int):
+    if kind == "manufacturer":
+        return [f"Manufacturer {i}" for i in rng.zipf(1.6, n_rows) % 2000]
+    if kind == "model":
+        return [f"MDL-{i:08d}" for i in range(start, start + n_rows)]
+    if kind == "text":
+        words = np.array(["solar", "module", "high", "efficiency", "monocrystalline", "panel", "black", "frame", "bifacial"])
+        lengths = rng.integers(2, 12, n_rows)
+        return [" ".join(rng.choice(words, k)) for k in lengths]
+    if kind == "nis":
+        return ["No Information Submitted"] * n_rows
+    if kind == "date":
+        return pd.Timestamp("2010-01-01") + pd.to_timedelta(rng.integers(0, 5500, n_rows), unit="D")
+    name, *args = kind.split(":")
+    if name == "choice":
+        return rng.choice(":".join(args).split("|"), n_rows)
+    if name == "float":
+        return np.round(rng.uniform(float(args[0]), float(args[1]), n_rows), 4)
+    if name == "int":
+        return rng.integers(int(args[0]), int(args[1]) + 1, n_rows)
+    raise ValueError(f"Unknown column kind '{kind}'.")
+
+
+def generate_component_sheet(component: str, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a CEC-style component listing as extract_excel returns it:
+    the header row dropped, one row per unique manufacturer/model.
+
+    Args:
+        component (str): "module", "meter", "battery" or "inverter".
+        n_rows (int): Number of rows.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: Listing in the column layout of the component's transform.
+    """
+    if component not in COMPONENT_SHEETS:
+        raise ValueError(f"No synthetic sheet for '{component}', expected one of {sorted(COMPONENT_SHEETS)}.")
+
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for header, kind, null_rate in COMPONENT_SHEETS[component]:
+        values = pd.Series(_column(kind, n_rows, rng, 0), dtype=object if kind not in ("date",) else None)
+        if null_rate:
+            values = values.where(rng.random(n_rows) >= null_rate)
+        columns[header] = values
+    return pd.DataFrame(columns)
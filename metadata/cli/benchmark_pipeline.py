@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Pipeline Benchmark
+
+Runs the metadata pipeline on a synthetic registry (see
+benchmarks/synthetic_data.py) and reports each stage as JSON:
+
+    extract     read the registry CSV
+    transform   asset transform (plus component_transform for components)
+    token_id    installation Morton token IDs; component IDs are hashed
+                inside component_transform, so this stage re-hashes them
+                with a cold cache
+    clean       clean_frame and conversion to records
+    validate    schema validation of every record
+    serialize   JSON serialization
+    write       output store (flat, sharded or pack) under the work directory
+    upsert      bulk upsert into PostgreSQL, or into a SQLite stand-in table
+
+Each stage reports wall and CPU seconds, rows in and out, rows per second
+and the process's peak RSS so far. Reports carry the git commit, so runs
+can be compared across commits.
+
+Usage:
+    python cli/benchmark_pipeline.py --type <component|installation> --name <registry_key> --rows N [--db sqlite|postgres|none]
+
+Example:
+    python cli/benchmark_pipeline.py --type installation --name solar_array --rows 100000 --output ./cache/benchmark/report.json
+"""
+
+import argparse
+import json
+import platform
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import write_installation_registry, generate_component_sheet, COMPONENT_SHEETS
+from helpers.registry_loader import flatten_registry
+from helpers.output_store import OUTPUT_LAYOUTS, open_output_store, write_record, close_output_store
+from helpers.metadata_helpers import (
+    generate_installation_token_ids,
+    generate_component_token_ids,
+    clear_component_token_id_cache,
+    clean_frame,
+    serialize_metadata
+)
+from helpers.schema_loader import validate_many
+from helpers.db import UPSERT_METHODS
+from transforms.component_transform import component_transform
+
+BENCHMARK_DIR = "./cache/benchmark"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_stage(report: dict, name: str, rows_in: int, fn, *args):
+    """
+    Time one stage and record it in the report.
+
+    Returns:
+        tuple: (result of fn, rows out) where fn returns (result, rows_out).
+    """
+    wall, cpu = time.perf_counter(), time.process_time()
+    result, rows_out = fn(*args)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    report["stages"][name] = {
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "rows_per_s": round(rows_in / wall, 1) if wall > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    print(f"   {name:<10} {wall:9.3f}s wall {cpu:9.3f}s cpu {rows_in:>9} rows")
+    return result, rows_out
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _upsert_sqlite(records: list, payloads: list, path: Path, table: str, chunk_size: int):
+    """
+    Chunked INSERT ... ON CONFLICT into a SQLite table shaped like the
+    metadata tables, one transaction per chunk.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (token_id TEXT PRIMARY KEY, metadata TEXT NOT NULL)")
+        statement = (f"INSERT INTO {table} (token_id, metadata) VALUES (?, ?) "
+                     f"ON CONFLICT(token_id) DO UPDATE SET metadata = excluded.metadata")
+        for start in range(0, len(records), chunk_size):
+            rows = [(str(metadata["tokenId"]), payload.decode())
+                    for metadata, payload in zip(records[start:start + chunk_size], payloads[start:start + chunk_size])]
+            with conn:
+                conn.executemany(statement, rows)
+    finally:
+        conn.close()
+
+
+def _upsert_postgres(asset_type: str, records: list, payloads: list, chunk_size: int, method: str):
+    from helpers.db import connection
+    from services.postgres_helpers import bulk_insert_component_metadata, bulk_insert_installation_metadata
+
+    bulk_insert = bulk_insert_installation_metadata if asset_type == "installation" else bulk_insert_component_metadata
+    with connection() as conn:
+        bulk_insert(records, conn, chunk_size=chunk_size, method=method, payloads=payloads)
+
+
+def _synthesize(asset_type: str, asset_name: str, rows: int, workdir: Path, seed: int, template: str) -> Path:
+    """
+    Write the synthetic source for the benchmark as CSV.
+    """
+    source = workdir / f"{asset_type}_{asset_name}_{rows}_{seed}.csv"
+    if source.exists():
+        return source
+
+    if asset_type == "installation":
+        write_installation_registry(source, rows, template=template, seed=seed)
+    else:
+        generate_component_sheet(asset_name, rows, seed=seed).to_csv(source, index=False)
+    return source
+
+
+def run_benchmark(asset_type: str, asset_name: str, rows: int, workdir=BENCHMARK_DIR, seed: int = 0,
+                  template: str = None, layout: str = "flat", compact: bool = False, db: str = "sqlite",
+                  db_chunk_size: int = 1000, upsert_method: str = "values") -> dict:
+    """
+    Run every pipeline stage on a synthetic registry and return the report.
+
+    Args:
+        asset_type (str): "component" or "installation".
+        asset_name (str): Registry key, e.g. solar_array or module.
+        rows (int): Synthetic rows to generate.
+        workdir (str or Path): Directory for the synthetic source, output files and SQLite stand-in.
+        seed (int): Random seed for the synthetic data.
+        template (str): Installation registry to resample (default data/solar_array_registry.csv).
+        layout (str): Output store layout.
+        compact (bool): Serialize without indentation.
+        db (str): "sqlite" stand-in, "postgres" (POSTGRES_* environment) or "none".
+        db_chunk_size (int): Rows per upsert transaction.
+        upsert_method (str): PostgreSQL upsert strategy, "values" or "copy".
+
+    Returns:
+        dict: Report with meta, per-stage figures and totals.
+
+    Raises:
+        ValueError: If the asset has no registry entry or synthetic generator.
+    """
+    registry = flatten_registry(asset_type)
+    if asset_name not in registry:
+        raise ValueError(f"{asset_type.title()} '{asset_name}' not found in registry.")
+    if asset_type == "component" and asset_name not in COMPONENT_SHEETS:
+        raise ValueError(f"No synthetic sheet for component '{asset_name}', expected one of {sorted(COMPONENT_SHEETS)}.")
+    config = registry[asset_name]
+
+    workdir = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    generated = time.perf_counter()
+    source = _synthesize(asset_type, asset_name, rows, workdir, seed, template)
+    generated = time.perf_counter() - generated
+
+    report = {
+        "meta": {
+            "asset_type": asset_type,
+            "asset_name": asset_name,
+            "rows": rows,
+            "seed": seed,
+            "layout": layout,
+            "compact": compact,
+            "db": db,
+            "db_chunk_size": db_chunk_size,
+            "source": str(source),
+            "source_bytes": source.stat().st_size,
+            "generate_s": round(generated, 4),
+            "git_commit": _git_commit(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "stages": {},
+    }
+    print(f"⏱️ Benchmarking {asset_type} '{asset_name}' on {rows} synthetic rows ({source}):")
+
+    transform_module = __import__(f"transforms.{config['transform_function'].replace('_transform', '')}_transform",
+                                  fromlist=[config['transform_function']])
+    transform_fn = getattr(transform_module, config['transform_function'])
+
+    def extract():
+        df = pd.read_csv(source)
+        df = df.where(pd.notnull(df), None)
+        return df, len(df)
+
+    keys = {}
+
+    def transform(df):
+        df = transform_fn(df)
+        if asset_type == "component":
+            keys["manufacturers"] = df["manufacturer"].tolist() if "manufacturer" in df else [""] * len(df)
+            keys["models"] = df["model"].tolist() if "model" in df else [""] * len(df)
+            df = component_transform(df, asset_name, config)
+        return df, len(df)
+
+    def token_id(df):
+        if asset_type == "installation":
+            centroids = np.array(df["centroid"].tolist(), dtype=float).reshape(-1, 2)
+            df["tokenId"] = generate_installation_token_ids(centroids[:, 0], centroids[:, 1])
+        else:
+            clear_component_token_id_cache()
+            generate_component_token_ids(asset_name, keys["manufacturers"], keys["models"])
+        return df, len(df)
+
+    def clean(df):
+        records = clean_frame(df).to_dict("records")
+        for metadata in records:
+            metadata[f"{asset_type}_type"] = asset_name
+        return records, len(records)
+
+    def validate(records):
+        failures = validate_many(records, asset_type)
+        reasons = Counter(f"{errors[0]['path']}: {errors[0]['validator']}" for errors in failures.values())
+        report["validation_failures"] = dict(reasons)
+        valid = [metadata for position, metadata in enumerate(records) if position not in failures]
+        return valid, len(valid)
+
+    def serialize(records):
+        payloads = [serialize_metadata(metadata, compact=compact) for metadata in records]
+        kept = [(metadata, payload) for metadata, payload in zip(records, payloads) if payload is not None]
+        report["serialized_bytes"] = sum(len(payload) for _, payload in kept)
+        return kept, len(kept)
+
+    def write(kept):
+        output = workdir / "output" / f"{asset_type}s" / asset_name
+        shutil.rmtree(output, ignore_errors=True)
+        store = open_output_store(output, layout)
+        for metadata, payload in kept:
+            write_record(store, metadata["tokenId"], payload)
+        close_output_store(store)
+        return kept, len(kept)
+
+    def upsert(kept):
+        records = [metadata for metadata, _ in kept]
+        payloads = [payload for _, payload in kept]
+        if db == "sqlite":
+            _upsert_sqlite(records, payloads, workdir / "benchmark.sqlite", f"{asset_type}_metadata", db_chunk_size)
+        elif db == "postgres":
+            _upsert_postgres(asset_type, records, payloads, db_chunk_size, upsert_method)
+        return None, len(kept) if db != "none" else 0
+
+    df, n = _run_stage(report, "extract", rows, extract)
+    df, n = _run_stage(report, "transform", n, transform, df)
+    df, n = _run_stage(report, "token_id", n, token_id, df)
+    records, n = _run_stage(report, "clean", n, clean, df)
+    del df
+    records, n = _run_stage(report, "validate", n, validate, records)
+    kept, n = _run_stage(report, "serialize", n, serialize, records)
+    del records
+    kept, n = _run_stage(report, "write", n, write, kept)
+    _run_stage(report, "upsert", n, upsert, kept)
+
+    wall = sum(stage["wall_s"] for stage in report["stages"].values())
+    report["total"] = {
+        "wall_s": round(wall, 4),
+        "cpu_s": round(sum(stage["cpu_s"] for stage in report["stages"].values()), 4),
+        "rows_out": n,
+        "rows_per_s": round(rows / wall, 1) if wall > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        "breakdown": {name: round(stage["wall_s"] / wall, 4) if wall > 0 else None for name, stage in report["stages"].items()},
+    }
+    return report
+
+
+def main():
+    """
+    Main function for CLI argument parsing and benchmarking.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the metadata pipeline on synthetic registries.")
+    parser.add_argument("--type", required=True, choices=["component", "installation"], help="Type of asset to benchmark.")
+    parser.add_argument("--name", required=True, help="Registry key (solar_array, or module/inverter/battery/meter).")
+    parser.add_argument("--rows", type=int, default=10000, help="Synthetic rows to generate.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic data.")
+    parser.add_argument("--template", default=None, help="Installation registry CSV to resample.")
+    parser.add_argument("--workdir", default=BENCHMARK_DIR, help="Directory for synthetic data, outputs and the SQLite stand-in.")
+    parser.add_argument("--output-layout", choices=OUTPUT_LAYOUTS, default="flat", help="Output store layout to benchmark.")
+    parser.add_argument("--compact", action="store_true", help="Serialize without indentation.")
+    parser.add_argument("--db", choices=["sqlite", "postgres", "none"], default="sqlite",
+                        help="Upsert target: SQLite stand-in, PostgreSQL from the POSTGRES_* environment, or skip.")
+    parser.add_argument("--db-chunk-size", type=int, default=1000, help="Rows per upsert transaction.")
+    parser.add_argument("--upsert-method", choices=UPSERT_METHODS, default="values", help="PostgreSQL upsert strategy.")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout.")
+
+    args = parser.parse_args()
+    report = run_benchmark(args.type, args.name, args.rows, workdir=args.workdir, seed=args.seed, template=args.template,
+                           layout=args.output_layout, compact=args.compact, db=args.db,
+                           db_chunk_size=args.db_chunk_size, upsert_method=args.upsert_method)
+
+    total = report["total"]
+    print(f"✅ {total['rows_out']} rows in {total['wall_s']:.2f}s ({total['rows_per_s']} rows/s), peak RSS {total['peak_rss_mb']} MB.")
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"📄 Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""Generate All Registry Assets
+
+Runs generate_metadata for every entry of config/component_registry.yaml
+and config/installation_registry.yaml as a dependency graph: components
+first, then the installations that reference their token IDs (an
+installation's `depends_on` list, or every component when it has none).
+Assets whose dependencies are done run concurrently in threads of one
+process, sharing the parsed registry and schemas, the component token ID
+cache, the source cache and the PostgreSQL connection pool. CPU-bound
+stages still parallelize across processes with --workers; those pools
+start their workers with forkserver/spawn rather than forking this
+threaded process. Each asset keeps its own run report, with CPU time
+measured on its own thread, and writes to the shared content manifest
+are serialized.
+
+Entries that cannot run in this tree (no transform module, or a missing
+local source file) are reported as unavailable and do not block their
+dependents. When an asset fails, its dependents are skipped.
+
+The combined report lists each asset's status, start/finish offsets,
+wall time and queueing delay, plus the critical path: the chain of
+dependent assets with the longest total wall time, which bounds the
+rebuild however high --concurrency is set.
+
+Usage:
+    python cli/generate_all.py [--concurrency N] [--only NAME ...] [--dry-run | --no-db]
+
+Example:
+    python cli/generate_all.py --concurrency 5 --workers 2 --report ./cache/reports/generate_all.json
+"""
+
+import argparse
+import importlib.util
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+from cli.generate_metadata import generate_metadata
+from helpers.db import UPSERT_METHODS
+from helpers.output_store import OUTPUT_LAYOUTS
+from helpers.registry_loader import flatten_registry
+from helpers.instrumentation import peak_rss_mb, write_report
+
+
+def _unavailable_reason(config: dict):
+    """
+    Why a registry entry cannot run in this tree, or None.
+    """
+    transform = config["transform_function"]
+    if importlib.util.find_spec(f"transforms.{transform.replace('_transform', '')}_transform") is None:
+        return f"transform module for {transform} not found"
+    source = config["source_location"]
+    if config["extract_function"] in ("extract_manual", "extract_csv") and "://" not in source and not Path(source).exists():
+        return f"source {source} not found"
+    return None
+
+
+def build_graph(only=None) -> dict:
+    """
+    Dependency graph of every registry entry.
+
+    Args:
+        only (list): Registry keys to run; their dependencies are not added.
+
+    Returns:
+        dict: (asset_type, asset_name) -> {"config", "deps", "unavailable"}.
+    """
+    nodes = {}
+    components = flatten_registry("component")
+    for name, config in components.items():
+        nodes[("component", name)] = {"config": config, "deps": set()}
+    for name, config in flatten_registry("installation").items():
+        deps = config.get("depends_on", list(components))
+        nodes[("installation", name)] = {"config": config, "deps": {("component", dep) for dep in deps}}
+
+    for key, node in nodes.items():
+        node["unavailable"] = _unavailable_reason(node["config"])
+        unknown = {dep for dep in node["deps"] if dep not in nodes}
+        if unknown:
+            raise ValueError(f"{key[1]} depends on unknown components {sorted(name for _, name in unknown)}.")
+
+    if only:
+        missing = set(only) - {name for _, name in nodes}
+        if missing:
+            raise ValueError(f"Not found in the registries: {sorted(missing)}.")
+        nodes = {key: node for key, node in nodes.items() if key[1] in only}
+
+    # Dependencies outside the run or unavailable never block
+    for node in nodes.values():
+        node["deps"] = {dep for dep in node["deps"] if dep in nodes and not nodes[dep]["unavailable"]}
+    return nodes
+
+
+def critical_path(nodes: dict, results: dict) -> dict:
+    """
+    Longest chain of dependent assets by wall time.
+
+    Returns:
+        dict: {"assets": [names in run order], "wall_s": total}.
+    """
+    finish, previous = {}, {}
+
+    def earliest_finish(key):
+        if key not in finish:
+            deps = [dep for dep in nodes[key]["deps"] if dep in results]
+            before = max(deps, key=earliest_finish, default=None)
+            previous[key] = before
+            finish[key] = results[key].get("wall_s", 0) + (finish[before] if before else 0)
+        return finish[key]
+
+    ran = [key for key in nodes if key in results]
+    if not ran:
+        return {"assets": [], "wall_s": 0}
+    end = max(ran, key=earliest_finish)
+    path = []
+    while end is not None:
+        path.append(f"{end[0]}/{end[1]}")
+        end = previous[end]
+    return {"assets": path[::-1], "wall_s": round(max(finish.values()), 4)}
+
+
+def generate_all(concurrency: int = 5, only=None, report_path: str = None, **options) -> dict:
+    """
+    Generate every registry asset in dependency order.
+
+    Args:
+        concurrency (int): Assets generated at the same time.
+        only (list): Registry keys to run (default: all).
+        report_path (str): Combined JSON report (default ./cache/reports/generate_all.json).
+        **options: Passed to generate_metadata (workers, chunk_size, db_chunk_size,
+            upsert_method, incremental, compact, output_layout, dry_run, use_db,
+            resolve_components, stream, stream_chunk_size).
+
+    Returns:
+        dict: Combined report with per-asset results and the critical path.
+    """
+    nodes = build_graph(only)
+    results = {}
+    for key, node in nodes.items():
+        if node["unavailable"]:
+            results[key] = {"status": "unavailable", "reason": node["unavailable"]}
+            print(f"⚠️ Skipping {key[0]} '{key[1]}': {node['unavailable']}.")
+
+    started = time.perf_counter()
+    ready_at = {}
+
+    def run_asset(key):
+        asset_started = time.perf_counter()
+        try:
+            run = generate_metadata(key[0], key[1], report_path=f"./cache/reports/{key[0]}_{key[1]}.json", **options)
+            outcome = {"status": "done", "rows": run["counters"].get("records_processed", 0),
+                       "validation_failures": run["counters"].get("validation_failures", {}),
+                       "slowest_stage": max(run["stages"], key=lambda name: run["stages"][name]["wall_s"]),
+                       "cpu_s": run["total"]["cpu_s"]}
+        except Exception as e:
+            traceback.print_exc()
+            outcome = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+        finished = time.perf_counter()
+        outcome.update({
+            "started_s": round(asset_started - started, 4),
+            "finished_s": round(finished - started, 4),
+            "wall_s": round(finished - asset_started, 4),
+            "waited_s": round(asset_started - ready_at[key], 4),
+        })
+        return outcome
+
+    pending = {key for key in nodes if key not in results}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="generate") as pool:
+        while pending or running:
+            for key in sorted(pending):
+                deps = [results.get(dep, {}).get("status") for dep in nodes[key]["deps"]]
+                if any(status in ("failed", "skipped") for status in deps):
+                    results[key] = {"status": "skipped", "reason": "a dependency failed"}
+                    pending.discard(key)
+                    print(f"⏭️ Skipping {key[0]} '{key[1]}': a dependency failed.")
+                elif all(status == "done" for status in deps):
+                    ready_at[key] = time.perf_counter()
+                    running[pool.submit(run_asset, key)] = key
+                    pending.discard(key)
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                results[key] = future.result()
+                print(f"{'✅' if results[key]['status'] == 'done' else '❌'} {key[0]} '{key[1]}' "
+                      f"{results[key]['status']} in {results[key]['wall_s']:.2f}s.")
+
+    wall = time.perf_counter() - started
+    timed = {key: result for key, result in results.items() if "wall_s" in result}
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(time.time() - wall)),
+        "concurrency": concurrency,
+        "options": {key: value for key, value in options.items()},
+        "assets": {f"{key[0]}/{key[1]}": {"depends_on": sorted(f"{t}/{n}" for t, n in nodes[key]["deps"]), **results[key]}
+                   for key in nodes},
+        "critical_path": critical_path(nodes, timed),
+        "total": {
+            "wall_s": round(wall, 4),
+            "sum_asset_wall_s": round(sum(result["wall_s"] for result in timed.values()), 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "failed": sorted(f"{t}/{n}" for (t, n), result in results.items() if result["status"] == "failed"),
+        },
+    }
+
+    report_path = report_path or "./cache/reports/generate_all.json"
+    write_report(report, report_path)
+    path = report["critical_path"]
+    print(f"📄 {len(timed)} assets in {wall:.2f}s (serial {report['total']['sum_asset_wall_s']:.2f}s); "
+          f"critical path {' → '.join(path['assets']) or '-'} {path['wall_s']:.2f}s. Report: {report_path}")
+    return report
+
+
+def main():
+    """
+    Main function for CLI argument parsing.
+    """
+    parser = argparse.ArgumentParser(description="Generate metadata for every registry entry, components before installations.")
+    parser.add_argument("--concurrency", type=int, default=5, help="Assets generated at the same time.")
+    parser.add_argument("--only", nargs="+", default=None, help="Registry keys to run (default: all).")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes per asset for clean/tokenize/validate/serialize.")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows handed to a worker at a time.")
+    parser.add_argument("--db-chunk-size", type=int, default=1000, help="Rows per bulk upsert transaction.")
+    parser.add_argument("--upsert-method", choices=UPSERT_METHODS, default="values", help="Multi-row VALUES or COPY into a staging table.")
+    parser.add_argument("--offline", action="store_true", help="Use cached source downloads without revalidating them.")
+    parser.add_argument("--incremental", action="store_true", help="Only write and upsert tokens whose content changed since the last run.")
+    parser.add_argument("--compact", action="store_true", help="Write JSON without indentation.")
+    parser.add_argument("--output-layout", choices=OUTPUT_LAYOUTS, default="flat", help="Flat files, token-ID shards, or one pack file.")
+    parser.add_argument("--dry-run", action="store_true", help="Extract, transform and validate only.")
+    parser.add_argument("--no-db", action="store_true", help="Write the files but never connect to PostgreSQL.")
+    parser.add_argument("--resolve-components", action="store_true",
+                        help="Match installation component slots to the components generated in this run.")
+    parser.add_argument("--stream", action="store_true", help="Read CSV registries in chunks (bounded memory); parsed twice "
+                        "unless the registry entry lists its column dtypes.")
+    parser.add_argument("--stream-chunk-size", type=int, default=50000, help="Registry rows read at a time with --stream.")
+    parser.add_argument("--report", default=None, help="Combined JSON report path (default ./cache/reports/generate_all.json).")
+
+    args = parser.parse_args()
+    if args.offline:
+        os.environ["SOURCE_CACHE_OFFLINE"] = "1"
+    report = generate_all(args.concurrency, args.only, args.report, workers=args.workers, chunk_size=args.chunk_size,
+                          db_chunk_size=args.db_chunk_size, upsert_method=args.upsert_method, incremental=args.incremental,
+                          compact=args.compact, output_layout=args.output_layout, dry_run=args.dry_run, use_db=not args.no_db,
+                          resolve_components=args.resolve_components, stream=args.stream,
+                          stream_chunk_size=args.stream_chunk_size)
+    if report["total"]["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
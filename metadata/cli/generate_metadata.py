@@ -1,4 +1,3 @@
-
 #!/usr/bin/env python
 # coding: utf-8
 
@@ -10,121 +9,423 @@ transforms, and validates data, then stores the generated metadata
 JSON files in the IPFS directory structure and inserts the metadata
 into the PostgreSQL database.
 
+The transformed frame is processed in chunks. The CPU-bound stages
+(clean, tokenize, validate, serialize) can run in a pool of worker
+processes; their results are funnelled, in order, to a single writer
+that saves the files and upserts the database.
+
+With --stream, a CSV registry is read in chunks instead: each chunk is
+extracted, transformed, validated, written and upserted before the next
+one is read, so peak memory depends on --stream-chunk-size, not on the
+size of the registry. Unless the registry entry lists its column
+`dtypes`, the CSV is parsed twice: once to find the dtypes a whole-file
+read would give, then chunk by chunk.
+
+Heavy dependencies (pandas, shapely, jsonschema, SQLAlchemy, requests,
+pycryptodome) are imported by the stages that use them, so --help and
+--dry-run / --no-db runs never load SQLAlchemy or connect.
+
 Usage:
-    python cli/generate_metadata.py --type <component|installation> --name <registry_key>
+    python cli/generate_metadata.py --type <component|installation> --name <registry_key> [--workers N] [--chunk-size M]
 
 Example:
-    python cli/generate_metadata.py --type component --name solar_module
+    python cli/generate_metadata.py --type component --name solar_module --workers 8
 
 """
 
 import argparse
-import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
-import pandas as pd
-
-from helpers.db import get_connection
-from helpers.registry_loader import flatten_registry
-from helpers.metadata_helpers import (
-    generate_installation_token_id,
-    clean_row,
-    test_metadata_serialization
-)
-from helpers.schema_loader import load_schema, validate_metadata
-from services.postgres_helpers import (
-    insert_component_metadata,
-    insert_installation_metadata
+
+from helpers.db import UPSERT_METHODS
+from helpers.content_manifest import open_manifest, content_hash, load_hashes, save_hashes
+from helpers.output_store import (
+    OUTPUT_LAYOUTS, open_output_store, write_record, record_exists, close_output_store, compact_pack
 )
-from helpers.extract_helpers import (
-    extract_excel, extract_csv, extract_api, extract_manual
+from helpers.instrumentation import (
+    PROFILE_MODES, STAGES, start_run, stage, merge_stages, count, count_reasons, watch_db_statements, finish_run,
+    write_report
 )
-from transforms.component_transform import component_transform
+
+# Worker pools start from a fresh interpreter instead of forking, which is
+# unsafe when the caller has other threads running (e.g. generate_all)
+WORKER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
 
 
-def generate_metadata(asset_type: str, asset_name: str):
+def process_chunk(chunk, asset_type: str, asset_name: str, compact: bool = False, run: dict = None):
     """
-    Generate metadata for components or installations.
+    Run the CPU-bound stages for one chunk of transformed rows.
 
     Args:
+        chunk (pd.DataFrame): Transformed rows.
         asset_type (str): Type of asset ("component" or "installation").
         asset_name (str): Registry key for the asset type.
+        compact (bool): Serialize without indentation.
+        run (dict): Instrumentation run to record the stages in. Without
+            one (in a worker process) the stages are returned in the stats.
 
-    Raises:
-        ValueError: If the asset_name is not found in the registry.
+    Returns:
+        tuple: (list of (token_id, metadata, payload) for the rows that
+        passed, stats dict for the chunk).
     """
-    # Load registry
-    registry = flatten_registry(asset_type)
-    if asset_name not in registry:
-        raise ValueError(f"{asset_type.title()} '{asset_name}' not found in registry.")
+    from helpers.metadata_helpers import clean_frame, serialize_metadata
+    from helpers.schema_loader import load_schema, validate_metadata
 
-    config = registry[asset_name]
+    schema = load_schema(asset_type)
+    local_run = run if run is not None else start_run(f"worker/{os.getpid()}")
+    stats = {"worker": os.getpid(), "chunks": 1, "rows": len(chunk), "validation_failures": 0, "serialization_failures": 0}
+    reasons = {}
+
+    with stage(local_run, "clean", rows_in=len(chunk)):
+        records = clean_frame(chunk).to_dict("records")
+
+    # Validate metadata against schema
+    with stage(local_run, "validate", rows_in=len(records)) as current:
+        valid = []
+        for metadata in records:
+            metadata[f"{asset_type}_type"] = asset_name
+            if validate_metadata(metadata, schema, metadata["tokenId"], reasons):
+                valid.append(metadata)
+        current["rows_out"] = len(valid)
+    stats["validation_failures"] = len(records) - len(valid)
+
+    # Serialize once; the bytes are the file and the JSONB parameter
+    with stage(local_run, "serialize", rows_in=len(valid)) as current:
+        prepared = []
+        for metadata in valid:
+            payload = serialize_metadata(metadata, compact=compact)
+            if payload is None:
+                stats["serialization_failures"] += 1
+                continue
+            prepared.append((metadata["tokenId"], metadata, payload))
+        current["rows_out"] = len(prepared)
+        current["bytes"] = sum(len(payload) for _, _, payload in prepared)
+
+    stats["stages"] = local_run["stages"] if run is None else {}
+    stats["validation_reasons"] = reasons
+    return prepared, stats
+
+
+def _iter_processed_chunks(chunks, asset_type: str, asset_name: str, workers: int, compact: bool = False,
+                           run: dict = None):
+    """
+    Yield process_chunk results in chunk order, keeping at most two
+    chunks per worker in flight.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield process_chunk(chunk, asset_type, asset_name, compact, run)
+        return
+
+    context = multiprocessing.get_context(WORKER_START_METHOD)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(process_chunk, chunk, asset_type, asset_name, compact))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _merge_stats(worker_stats: dict, stats: dict):
+    """
+    Fold a chunk's stats into the per-worker totals.
+    """
+    counts = {key: value for key, value in stats.items() if key != "worker" and isinstance(value, int)}
+    totals = worker_stats.setdefault(stats["worker"], dict.fromkeys(counts, 0))
+    for key, value in counts.items():
+        totals[key] += value
 
-    # Extract data using the specified function
-    extract_fn = globals()[config['extract_function']]
-    if asset_type == "component":
-        df = extract_fn(config['source_location'], config.get('skiprows', 0))
-    else:
-        df = extract_fn(config['source_location'])
-    df = df.where(pd.notnull(df), None)
 
+def _transform_frame(df, asset_type: str, asset_name: str, config: dict, run: dict,
+                     packed_geometry: bool = False, component_index: dict = None):
+    """
+    Run the transform stages on one extracted frame: the registry
+    transform (which also assigns the tokenIds), component-specific
+    transforms, component slot linking and packed geometry. Every stage
+    works row by row, so a registry can be transformed whole or chunk by
+    chunk.
+
+    Args:
+        df (pd.DataFrame): Extracted rows, nulls as None.
+        asset_type (str): Type of asset ("component" or "installation").
+        asset_name (str): Registry key for the asset type.
+        config (dict): Registry entry of the asset.
+        run (dict): Instrumentation run.
+        packed_geometry (bool): Encode installation geometry as packed deltas.
+        component_index (dict): Link installation component slots against
+            this index (see helpers/component_index.py).
+
+    Returns:
+        pd.DataFrame: Transformed rows, ready for process_chunk.
+    """
     # Transform data
-    transform_fn_module = __import__(f"transforms.{config['transform_function'].replace('_transform','')}_transform", fromlist=[config['transform_function']])
-    transform_fn = getattr(transform_fn_module, config['transform_function'])
-    df = transform_fn(df)
-    
+    with stage(run, "transform", rows_in=len(df)) as current:
+        transform_fn_module = __import__(f"transforms.{config['transform_function'].replace('_transform','')}_transform", fromlist=[config['transform_function']])
+        transform_fn = getattr(transform_fn_module, config['transform_function'])
+        df = transform_fn(df)
+        current["rows_out"] = len(df)
+
     # Apply additional component-specific transformations
     if asset_type == "component":
-        df = component_transform(df, asset_name, config)
-
-    # Prepare output directory
-    output_dir = Path(f"./ipfs/{asset_type}s/{asset_name}/")
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    # Load database connection and schema
-    conn = get_connection()
-    schema = load_schema(asset_type)
-
-    success, failed = 0, 0
+        from transforms.component_transform import component_transform
+        with stage(run, "component_transform", rows_in=len(df)) as current:
+            df = component_transform(df, asset_name, config)
+            current["rows_out"] = len(df)
+
+    # Link component slots to the generated components
+    if asset_type == "installation" and component_index is not None:
+        from helpers.component_index import link_installation_components
+        with stage(run, "resolve_components", rows_in=len(df)):
+            matches = link_installation_components(df["components"], component_index)
+        for component_type, counts in matches.items():
+            count_reasons(run, f"{component_type}_matches", counts)
+
+    # Swap verbose coordinates for the packed delta encoding
+    if asset_type == "installation" and packed_geometry:
+        from helpers.geometry_helpers import PACKED_GEOMETRY_KEY, encode_packed_multipolygons
+        with stage(run, "packed_geometry", rows_in=len(df)) as current:
+            # Geometries with holes cannot be packed and keep their coordinates
+            packed = encode_packed_multipolygons(df["geometry"])
+            df["geometry"] = [
+                geometry if value is None else {"type": "MultiPolygon", PACKED_GEOMETRY_KEY: value}
+                for geometry, value in zip(df["geometry"], packed)
+            ]
+            current["unpacked"] = packed.count(None)
+    return df
+
+
+def generate_metadata(asset_type: str, asset_name: str, db_chunk_size: int = 1000, upsert_method: str = "values",
+                      workers: int = 1, chunk_size: int = 1000, incremental: bool = False, manifest_path: str = None,
+                      compact: bool = False, packed_geometry: bool = False, output_layout: str = "flat",
+                      report_path: str = None, prometheus_path: str = None, profile_stage: str = None,
+                      profile_mode: str = "cprofile", dry_run: bool = False, use_db: bool = True,
+                      resolve_components: bool = False, component_dir: str = "./ipfs/components",
+                      stream: bool = False, stream_chunk_size: int = 50000):
+    """
+    Generate metadata for components or installations.
 
-    # Process each row and generate metadata
-    for _, row in df.iterrows():
-        metadata = clean_row(row)
+    Args:
+        asset_type (str): Type of asset ("component" or "installation").
+        asset_name (str): Registry key for the asset type.
+        db_chunk_size (int): Rows per bulk upsert transaction.
+        upsert_method (str): Bulk upsert strategy, "values" or "copy".
+        workers (int): Worker processes for the CPU-bound stages.
+        chunk_size (int): Rows handed to a worker at a time.
+        incremental (bool): Skip file writes and upserts for tokens whose
+            content hash matches the manifest from the previous run (and,
+            with use_db, whose upsert the manifest records).
+        manifest_path (str): SQLite manifest file for incremental runs.
+        compact (bool): Write JSON without indentation.
+        packed_geometry (bool): Replace installation geometry coordinates
+            with the packed_multipolygon_deltas encoding.
+        output_layout (str): "flat", "sharded" or "pack" (see helpers/output_store.py).
+        report_path (str): JSON run report (default ./cache/reports/<type>_<name>.json).
+        prometheus_path (str): Also write the run as a Prometheus text file.
+        profile_stage (str): Stage to profile, one of helpers.instrumentation.STAGES.
+        profile_mode (str): "cprofile" or "tracemalloc" (see helpers/instrumentation.py).
+        dry_run (bool): Extract, transform, validate and serialize only:
+            no files, no database, no manifest update. Implies use_db=False.
+        use_db (bool): Upsert into PostgreSQL. Without it nothing connects.
+        resolve_components (bool): Match every installation component slot
+            against the generated components (see helpers/component_index.py).
+        component_dir (str): Generated component metadata to match against.
+        stream (bool): Read a CSV registry in chunks of stream_chunk_size
+            rows and take each chunk through transform, validate, write
+            and upsert before reading the next, so memory stays flat
+            whatever the registry size. Other sources are read whole.
+        stream_chunk_size (int): Registry rows read at a time when streaming.
+
+    Returns:
+        dict: The run report (see helpers/instrumentation.py).
 
-        # Generate tokenId
-        token_id = generate_installation_token_id(metadata["centroid"]) if asset_type == "installation" else metadata["tokenId"]
-        metadata["tokenId"] = token_id
-        metadata[f"{asset_type}_type"] = asset_name
+    Raises:
+        ValueError: If the asset_name is not found in the registry.
+    """
+    import pandas as pd
+    from helpers.registry_loader import flatten_registry
 
-        # Validate metadata against schema
-        if not validate_metadata(metadata, schema, token_id):
-            failed += 1
-            continue
+    use_db = use_db and not dry_run
 
-        # Test JSON serialization
-        if not test_metadata_serialization(metadata):
-            failed += 1
-            continue
+    # Load registry
+    registry = flatten_registry(asset_type)
+    if asset_name not in registry:
+        raise ValueError(f"{asset_type.title()} '{asset_name}' not found in registry.")
 
-        # Compactify geometry coordinates for readability
-        if "geometry" in metadata and "coordinates" in metadata["geometry"]:
-            coordinates = metadata["geometry"]["coordinates"]
-            compact_coords = json.dumps(coordinates, separators=(',', ':'))
-            metadata["geometry"]["coordinates"] = compact_coords
+    config = registry[asset_name]
 
-        # Save metadata as JSON file
-        output_path = output_dir / f"{token_id}.json"
-        with open(output_path, "w") as f:
-            json.dump(metadata, f, indent=2)
+    if profile_stage and workers > 1 and profile_stage in ("clean", "validate", "serialize"):
+        print(f"⚠️ Stage '{profile_stage}' runs in worker processes; profile it with --workers 1.")
+    run = start_run(f"{asset_type}/{asset_name}", profile_stage, profile_mode)
+
+    import helpers.extract_helpers as extract_helpers
+    extract_fn = getattr(extract_helpers, config['extract_function'])
+    if stream and config['extract_function'] not in extract_helpers.STREAMING_EXTRACTS:
+        print(f"⚠️ {config['extract_function']} sources cannot be streamed; reading '{asset_name}' whole.")
+        stream = False
+
+    component_index = None
+    if asset_type == "installation" and resolve_components:
+        from helpers.component_index import load_component_index_from_directory
+        with stage(run, "resolve_components"):
+            component_index = load_component_index_from_directory(component_dir)
+
+    # Token IDs of every row, for the manifest's removed set
+    seen_tokens = set()
+
+    def frames():
+        """
+        Extracted and transformed frames: the whole registry, or one
+        chunk of stream_chunk_size rows at a time when streaming.
+        """
+        source = extract_helpers.iter_csv_chunks(config['source_location'], max(1, stream_chunk_size),
+                                                 config.get('dtypes')) if stream else None
+        while True:
+            # Extract data using the specified function
+            with stage(run, "extract") as current:
+                if stream:
+                    df = next(source, None)
+                elif asset_type == "component":
+                    df = extract_fn(config['source_location'], config.get('skiprows', 0))
+                else:
+                    df = extract_fn(config['source_location'])
+                if df is not None:
+                    df = df.where(pd.notnull(df), None)
+                current["rows_out"] = 0 if df is None else len(df)
+            if df is None:
+                return
+            if stream:
+                count(run, "stream_chunks")
+
+            df = _transform_frame(df, asset_type, asset_name, config, run, packed_geometry, component_index)
+            if incremental:
+                seen_tokens.update(str(token_id) for token_id in df["tokenId"])
+            yield df
+            if not stream:
+                return
+
+    # Prepare output store
+    # A full run writes every record, so a pack starts empty instead of growing
+    output_dir = Path(f"./ipfs/{asset_type}s/{asset_name}/")
+    store = None if dry_run else open_output_store(output_dir, output_layout, rewrite=not incremental)
 
-        # Insert into PostgreSQL
-        if asset_type == "installation":
-            insert_installation_metadata(metadata, conn)
-        else:
-            insert_component_metadata(metadata, conn)
+    chunk_size = max(1, chunk_size)
+    # Lazily sliced, so a streamed chunk is released once its rows are written
+    chunks = (df.iloc[i:i + chunk_size] for df in frames() for i in range(0, len(df), chunk_size))
 
-        success += 1
+    if use_db:
+        from helpers.db import connection
+        from services.postgres_helpers import bulk_insert_component_metadata, bulk_insert_installation_metadata
+        bulk_insert = bulk_insert_installation_metadata if asset_type == "installation" else bulk_insert_component_metadata
+    pending, pending_payloads = [], []
 
+    success, failed = 0, 0
+    worker_stats = {}
+
+    # Content hashes from the previous run, for incremental regeneration
+    manifest = open_manifest(manifest_path) if incremental else None
+    previous_hashes = load_hashes(manifest, asset_type, asset_name) if incremental else {}
+    new_hashes = {}
+    added, changed, unchanged = 0, 0, 0
+
+    # Single ordered writer for files and the database
+    with connection() if use_db else nullcontext() as conn:
+        watch_db_statements(run, conn)
+        for prepared, stats in _iter_processed_chunks(chunks, asset_type, asset_name, workers, compact,
+                                                      run if workers <= 1 else None):
+            _merge_stats(worker_stats, stats)
+            merge_stages(run, stats["stages"])
+            count_reasons(run, "validation_failures", stats["validation_reasons"])
+            count(run, "serialization_failures", stats["serialization_failures"])
+            failed += stats["validation_failures"] + stats["serialization_failures"]
+            success += len(prepared)
+
+            if incremental:
+                kept = []
+                for token_id, metadata, payload in prepared:
+                    digest = content_hash(payload)
+                    previous, in_database = previous_hashes.get(str(token_id), (None, False))
+                    # Content written by a --no-db run still needs its upsert
+                    if previous == digest and (store is None or record_exists(store, token_id)) and (in_database or not use_db):
+                        unchanged += 1
+                        continue
+                    added, changed = (added + 1, changed) if previous is None else (added, changed + 1)
+                    new_hashes[str(token_id)] = digest
+                    kept.append((token_id, metadata, payload))
+                prepared = kept
+
+            if dry_run:
+                continue
+
+            # Save metadata through the output store
+            with stage(run, "write", rows_in=len(prepared)) as current:
+                for token_id, _, payload in prepared:
+                    write_record(store, token_id, payload)
+                current["bytes"] = sum(len(payload) for _, _, payload in prepared)
+            count(run, "bytes_written", current["bytes"])
+
+            if not use_db:
+                continue
+
+            # Queue for PostgreSQL, flushing one transaction per chunk
+            for _, metadata, payload in prepared:
+                pending.append(metadata)
+                pending_payloads.append(payload)
+                if len(pending) >= db_chunk_size:
+                    with stage(run, "upsert", rows_in=len(pending)):
+                        bulk_insert(pending, conn, chunk_size=db_chunk_size, method=upsert_method, payloads=pending_payloads)
+                    pending, pending_payloads = [], []
+
+        if pending:
+            with stage(run, "upsert", rows_in=len(pending)):
+                bulk_insert(pending, conn, chunk_size=db_chunk_size, method=upsert_method, payloads=pending_payloads)
+    if store is not None:
+        with stage(run, "write"):
+            close_output_store(store)
+
+    if component_index is not None:
+        from helpers.component_index import SLOT_TYPES
+        matches = {component_type: run["counters"].get(f"{component_type}_matches", {}) for component_type in SLOT_TYPES.values()}
+        print("🔗 Component slots: " + ", ".join(
+            f"{component_type} {counts.get('exact', 0)} exact / {counts.get('fuzzy', 0)} fuzzy / {counts.get('unmatched', 0)} unmatched"
+            for component_type, counts in matches.items()) + ".")
     print(f"✅ {success} {asset_type}s processed, {failed} failures.")
+    if dry_run:
+        print("🧪 Dry run: no files written, no database changes.")
+    elif not use_db:
+        print("🧪 Database skipped (--no-db).")
+    if incremental and dry_run:
+        manifest.close()
+        print(f"🔁 Would write {added} added and {changed} changed, {unchanged} unchanged.")
+    elif incremental:
+        # Only record hashes once everything they describe has been written
+        removed = set(previous_hashes) - seen_tokens
+        if output_layout == "pack":
+            with stage(run, "write"):
+                compact_pack(output_dir, keep=seen_tokens)
+        save_hashes(manifest, asset_type, asset_name, new_hashes, removed, in_database=use_db)
+        manifest.close()
+        print(f"🔁 {added} added, {changed} changed, {unchanged} unchanged, {len(removed)} removed.")
+    if workers > 1:
+        for worker, totals in sorted(worker_stats.items()):
+            print(f"   worker {worker}: {totals['chunks']} chunks, {totals['rows']} rows, "
+                  f"{totals['validation_failures']} validation and {totals['serialization_failures']} serialization failures.")
+    if asset_type == "component":
+        from helpers.metadata_helpers import component_token_id_cache_info
+        cache = component_token_id_cache_info()
+        print(f"🔑 tokenId cache: {cache.hits} hits, {cache.misses} misses, {cache.currsize}/{cache.maxsize} entries.")
+
+    count(run, "records_processed", success)
+    report_path = report_path or f"./cache/reports/{asset_type}_{asset_name}.json"
+    write_report(finish_run(run), report_path, prometheus_path)
+    slowest = max(run["stages"].items(), key=lambda item: item[1]["wall_s"])
+    print(f"📄 Run report written to {report_path} (slowest stage: {slowest[0]}, {slowest[1]['wall_s']:.2f}s).")
+    return run
 
 
 def main():
@@ -134,9 +435,43 @@ def main():
     parser = argparse.ArgumentParser(description="Unified metadata generator for components and installations.")
     parser.add_argument("--type", required=True, choices=["component", "installation"], help="Type of asset to generate metadata for.")
     parser.add_argument("--name", required=True, help="Registry key for the asset type (e.g., solar_array, battery_bank).")
+    parser.add_argument("--db-chunk-size", type=int, default=1000, help="Rows per bulk upsert transaction.")
+    parser.add_argument("--upsert-method", choices=UPSERT_METHODS, default="values", help="Multi-row VALUES or COPY into a staging table.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for clean/tokenize/validate/serialize.")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows handed to a worker at a time.")
+    parser.add_argument("--offline", action="store_true", help="Use cached source downloads without revalidating them.")
+    parser.add_argument("--incremental", action="store_true", help="Only write and upsert tokens whose content changed since the last run.")
+    parser.add_argument("--compact", action="store_true", help="Write JSON without indentation.")
+    parser.add_argument("--packed-geometry", action="store_true", help="Emit installation geometry as packed_multipolygon_deltas.")
+    parser.add_argument("--output-layout", choices=OUTPUT_LAYOUTS, default="flat",
+                        help="Flat files, token-ID shards, or one pack file with an offset index.")
+    parser.add_argument("--manifest", default=None, help="SQLite content manifest for --incremental (default ./cache/manifest.sqlite).")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Extract, transform and validate only: write no files, skip the database, keep the manifest.")
+    parser.add_argument("--no-db", action="store_true", help="Write the files but never connect to PostgreSQL.")
+    parser.add_argument("--resolve-components", action="store_true",
+                        help="Match installation component slots to the generated components, with a score.")
+    parser.add_argument("--component-dir", default="./ipfs/components", help="Generated component metadata for --resolve-components.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read a CSV registry in chunks and write each before reading the next (bounded memory). "
+                             "The CSV is parsed twice unless the registry entry lists its column dtypes.")
+    parser.add_argument("--stream-chunk-size", type=int, default=50000, help="Registry rows read at a time with --stream.")
+    parser.add_argument("--report", default=None, help="JSON run report path (default ./cache/reports/<type>_<name>.json).")
+    parser.add_argument("--prometheus", default=None, help="Also write the run report in Prometheus text format.")
+    parser.add_argument("--profile-stage", choices=STAGES, default=None, help="Profile one pipeline stage.")
+    parser.add_argument("--profile-mode", choices=PROFILE_MODES, default="cprofile", help="cProfile stats or tracemalloc allocation sites.")
 
     args = parser.parse_args()
-    generate_metadata(args.type, args.name)
+    if args.offline:
+        os.environ["SOURCE_CACHE_OFFLINE"] = "1"
+    generate_metadata(args.type, args.name, db_chunk_size=args.db_chunk_size, upsert_method=args.upsert_method,
+                      workers=args.workers, chunk_size=args.chunk_size,
+                      incremental=args.incremental, manifest_path=args.manifest, compact=args.compact,
+                      packed_geometry=args.packed_geometry, output_layout=args.output_layout,
+                      report_path=args.report, prometheus_path=args.prometheus, profile_stage=args.profile_stage,
+                      profile_mode=args.profile_mode, dry_run=args.dry_run, use_db=not args.no_db,
+                      resolve_components=args.resolve_components, component_dir=args.component_dir,
+                      stream=args.stream, stream_chunk_size=args.stream_chunk_size)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""IPFS Upload Script
+
+Publishes a generated metadata directory to IPFS through the HTTP API.
+Only files whose content changed since the last publish are added; the
+directory CID is rebuilt in MFS from the cached CIDs of the rest.
+
+With --car the directory is instead sent as one CAR archive built
+offline, and --cid-only prints the directory CID without contacting
+the daemon.
+
+Token metadata is served as ipfs://{cid}/{id}.json, so only the flat
+layout can be published. An asset generated with --output-layout
+sharded or pack is first re-created as flat files with --export-flat,
+and the flat copy is published; a directory holding a pack is refused
+without it.
+
+Usage:
+    python cli/upload_ipfs.py --dir <directory> [--concurrency N] [--car [PATH]] [--cid-only] [--export-flat [PATH]]
+
+Example:
+    python cli/upload_ipfs.py --dir ./ipfs/installations --concurrency 16
+    python cli/upload_ipfs.py --dir ./ipfs/installations --cid-only
+    python cli/upload_ipfs.py --dir ./ipfs/installations/solar_array --export-flat
+
+"""
+
+import argparse
+from pathlib import Path
+
+from helpers.ipfs_cid import directory_cid
+from helpers.output_store import INDEX_FILE, export_flat
+from services.ipfs_upload import publish_car, publish_directory
+
+
+def main():
+    """
+    Main function for CLI argument parsing and publishing.
+    """
+    parser = argparse.ArgumentParser(description="Incrementally publish a metadata directory to IPFS.")
+    parser.add_argument("--dir", required=True, help="Directory to publish (e.g. ./ipfs/installations).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel file uploads.")
+    parser.add_argument("--cache", default=None, help="SQLite CID cache (default ./cache/ipfs_cids.sqlite).")
+    parser.add_argument("--mfs-path", default=None, help="MFS directory to assemble (default /publish/<dir name>).")
+    parser.add_argument("--timeout", type=int, default=300, help="Seconds per API request.")
+    parser.add_argument("--car", nargs="?", const="", default=None,
+                        help="Publish as one CAR import, optionally written to PATH (default ./cache/car/<dir>.car).")
+    parser.add_argument("--cid-only", action="store_true", help="Compute the directory CID offline and exit.")
+    parser.add_argument("--export-flat", nargs="?", const="", default=None,
+                        help="Re-create a sharded or pack asset directory as flat <token_id>.json files at PATH "
+                             "(default ./cache/flat/<dir name>) and publish that.")
+
+    args = parser.parse_args()
+    if args.export_flat is not None:
+        target = args.export_flat or f"./cache/flat/{Path(args.dir).resolve().name}"
+        count = export_flat(args.dir, target)
+        print(f"📄 Exported {count} documents from {args.dir} to {target}.")
+        args.dir = target
+    elif next(Path(args.dir).rglob(INDEX_FILE), None) is not None:
+        parser.error(f"{args.dir} holds a pack layout ({INDEX_FILE}); publish each asset with --export-flat.")
+
+    if args.cid_only:
+        cid = directory_cid(args.dir)
+    elif args.car is not None:
+        cid = publish_car(args.dir, car_path=args.car or None, cache_path=args.cache)
+    else:
+        cid = publish_directory(args.dir, concurrency=args.concurrency, cache_path=args.cache,
+                                mfs_path=args.mfs_path, timeout=args.timeout)
+    print(f"🔗 baseURI: ipfs://{cid}/{{id}}.json")
+
+
+if __name__ == "__main__":
+    main()
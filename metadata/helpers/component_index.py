@@ -0,0 +1,271 @@
+"""Component Index
+
+Lookup index from free-text manufacturer/model values (as found in the
+installation registry's module_*, inverter_* and battery_* slots) to the
+token IDs of the generated component metadata.
+
+An index is a dict:
+
+    keys     normalized "type|manufacturer|model" -> token_id, the same
+             key generate_component_token_id hashes, for exact matches
+    blocks   component_type -> block, for fuzzy matches:
+                 token_ids, manufacturers, models   (n,) per component
+                 gram_counts   (n,) int32   trigrams in each model
+                 postings      trigram -> int32 positions of the models
+                               containing it
+
+Fuzzy matching is blocked by component type and looks candidates up
+through the trigram postings, so a query touches only the components
+sharing its rarer model trigrams instead of scanning the block; trigrams
+found in more than max_posting_share of a block are skipped as
+unselective. Candidates are ranked by the Dice coefficient of the model
+trigrams, and the best few are re-scored with the manufacturer's.
+Registry placeholders such as "YL235 has no match." are stripped before
+matching.
+
+Functions:
+    - build_component_index: Build an index from component metadata documents.
+    - load_component_index_from_directory: Index the generated component files.
+    - save_component_index: Persist an index.
+    - load_component_index: Load a saved index.
+    - resolve_components: Resolve manufacturer/model pairs of one type in bulk.
+    - link_installation_components: Resolve every component slot of installation rows.
+"""
+
+import json
+import pickle
+import re
+from pathlib import Path
+import numpy as np
+from helpers.file_helpers import atomic_path
+from helpers.metadata_helpers import normalize_component_key
+from helpers.output_store import iter_records
+
+# Installation component lists and the component type of their slots
+SLOT_TYPES = {"modules": "module", "inverters": "inverter", "batteries": "battery"}
+
+MIN_SCORE = 0.6
+MODEL_WEIGHT = 0.8
+CANDIDATES = 10
+
+_PLACEHOLDER = re.compile(r"\s*has no match\.?\s*$", re.IGNORECASE)
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def _text(value) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    return _PLACEHOLDER.sub("", str(value))
+
+
+def _grams(value: str) -> set:
+    """
+    Character trigrams of a value, lowercased with punctuation and spaces removed.
+    """
+    value = _NON_ALNUM.sub("", value.lower())
+    if not value:
+        return set()
+    padded = f"#{value}#"
+    return {padded[i:i + 3] for i in range(max(1, len(padded) - 2))}
+
+
+def _dice(a: set, b: set) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+
+def _attribute(document: dict, trait_type: str):
+    for attribute in document.get("attributes") or []:
+        if attribute.get("trait_type") == trait_type:
+            return attribute.get("value")
+    return None
+
+
+def build_component_index(documents, max_posting_share: float = 0.05) -> dict:
+    """
+    Build an index from component metadata documents.
+
+    Args:
+        documents (iterable): Component metadata dicts with tokenId,
+            component_type and manufacturer/model attributes.
+        max_posting_share (float): Skip trigrams found in more than this
+            share of a component type's models when fuzzy matching.
+
+    Returns:
+        dict: Index for resolve_components.
+    """
+    keys = {}
+    entries = {}
+    for document in documents:
+        component_type = document.get("component_type")
+        manufacturer = _text(_attribute(document, "manufacturer"))
+        model = _text(_attribute(document, "model"))
+        token_id = str(document.get("tokenId"))
+        if not component_type:
+            continue
+        keys[normalize_component_key(component_type, manufacturer, model)] = token_id
+        entries.setdefault(component_type, []).append((token_id, manufacturer, model))
+
+    blocks = {}
+    for component_type, rows in entries.items():
+        postings = {}
+        gram_counts = np.zeros(len(rows), dtype=np.int32)
+        for position, (_, _, model) in enumerate(rows):
+            grams = _grams(model)
+            gram_counts[position] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+
+        limit = max(50, int(max_posting_share * len(rows)))
+        blocks[component_type] = {
+            "token_ids": [row[0] for row in rows],
+            "manufacturers": [row[1] for row in rows],
+            "models": [row[2] for row in rows],
+            "gram_counts": gram_counts,
+            "postings": {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()},
+            "max_posting": limit,
+        }
+    return {"keys": keys, "blocks": blocks}
+
+
+def load_component_index_from_directory(directory="./ipfs/components", component_types=None, **kwargs) -> dict:
+    """
+    Index the generated component metadata of every asset subdirectory
+    (any output layout).
+
+    Args:
+        directory (str or Path): Root of the component output, e.g. ./ipfs/components
+        component_types (list): Subdirectories to index (default: all).
+        **kwargs: Passed to build_component_index.
+
+    Returns:
+        dict: Index for resolve_components.
+    """
+    def documents():
+        for subdirectory in sorted(Path(directory).iterdir()):
+            if not subdirectory.is_dir() or (component_types and subdirectory.name not in component_types):
+                continue
+            for _, payload in iter_records(subdirectory):
+                yield json.loads(payload)
+
+    return build_component_index(documents(), **kwargs)
+
+
+def save_component_index(index: dict, path):
+    """
+    Persist an index to a file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_path(path) as tmp_path, open(tmp_path, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_component_index(path) -> dict:
+    """
+    Load an index written by save_component_index.
+    """
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _fuzzy_match(block: dict, manufacturer: str, model: str, min_score: float):
+    """
+    Best fuzzy candidate in a block as (position, score), or None.
+    """
+    grams = _grams(model)
+    postings = [block["postings"][gram] for gram in grams if gram in block["postings"]]
+    selective = [positions for positions in postings if len(positions) <= block["max_posting"]]
+    if not selective:
+        # Only common trigrams: fall back to the rarest few
+        selective = sorted(postings, key=len)[:3]
+    if not selective:
+        return None
+
+    positions, shared = np.unique(np.concatenate(selective), return_counts=True)
+    # Shared counts only cover selective trigrams, so this bounds the model Dice from below
+    dice = 2 * shared / (len(grams) + block["gram_counts"][positions])
+    top = np.argsort(-dice, kind="stable")[:CANDIDATES]
+
+    manufacturer_grams = _grams(manufacturer)
+    best = None
+    for candidate in positions[top]:
+        model_dice = _dice(grams, _grams(block["models"][candidate]))
+        score = MODEL_WEIGHT * model_dice + (1 - MODEL_WEIGHT) * _dice(manufacturer_grams, _grams(block["manufacturers"][candidate]))
+        if best is None or score > best[1]:
+            best = (int(candidate), score)
+    return best if best and best[1] >= min_score else None
+
+
+def resolve_components(index: dict, component_type: str, manufacturers, models, min_score: float = MIN_SCORE) -> list:
+    """
+    Resolve manufacturer/model pairs of one component type in bulk.
+
+    Each distinct pair is looked up once: first by the exact normalized
+    key, then by fuzzy trigram matching within the type's block.
+
+    Args:
+        index (dict): Component index.
+        component_type (str): e.g. "module", "inverter" or "battery".
+        manufacturers (array-like): Manufacturer values.
+        models (array-like): Model values, aligned with manufacturers.
+        min_score (float): Lowest fuzzy score accepted, in [0, 1].
+
+    Returns:
+        list: One dict per input pair with tokenId, score (1.0 for exact)
+        and method ("exact" or "fuzzy"), or None when nothing matched.
+    """
+    block = index["blocks"].get(component_type)
+    resolved = {}
+    results = []
+    for manufacturer, model in zip(manufacturers, models):
+        pair = (_text(manufacturer), _text(model))
+        if pair not in resolved:
+            token_id = index["keys"].get(normalize_component_key(component_type, *pair))
+            if token_id is not None:
+                resolved[pair] = {"tokenId": token_id, "score": 1.0, "method": "exact"}
+            elif block is not None and pair[1]:
+                match = _fuzzy_match(block, *pair, min_score)
+                resolved[pair] = None if match is None else {
+                    "tokenId": block["token_ids"][match[0]], "score": round(match[1], 4), "method": "fuzzy"
+                }
+            else:
+                resolved[pair] = None
+        results.append(resolved[pair])
+    return results
+
+
+def link_installation_components(components, index: dict, min_score: float = MIN_SCORE) -> dict:
+    """
+    Resolve every module, inverter and battery slot of installation rows
+    and record the match on the slot as component_tokenId, match_score
+    and match_method. The slot's own tokenId is left unchanged.
+
+    Args:
+        components (iterable): Per-row components dicts, as built by the
+            installation transforms ({"modules": [...], ...}).
+        index (dict): Component index.
+        min_score (float): Lowest fuzzy score accepted.
+
+    Returns:
+        dict: component_type -> {"exact": n, "fuzzy": n, "unmatched": n}.
+    """
+    slots = {component_type: [] for component_type in SLOT_TYPES.values()}
+    for row in components:
+        for key, component_type in SLOT_TYPES.items():
+            slots[component_type].extend(row.get(key) or [])
+
+    stats = {}
+    for component_type, entries in slots.items():
+        matches = resolve_components(index, component_type, [entry.get("manufacturer") for entry in entries],
+                                     [entry.get("model") for entry in entries], min_score)
+        counts = {"exact": 0, "fuzzy": 0, "unmatched": 0}
+        for entry, match in zip(entries, matches):
+            if match is None:
+                counts["unmatched"] += 1
+                continue
+            entry["component_tokenId"] = match["tokenId"]
+            entry["match_score"] = match["score"]
+            entry["match_method"] = match["method"]
+            counts[match["method"]] += 1
+        stats[component_type] = counts
+    return stats
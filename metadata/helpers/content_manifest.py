@@ -0,0 +1,117 @@
+"""Content Manifest
+
+Persisted content hashes of every generated metadata document, keyed by
+asset type, asset name and token ID, in a local SQLite file. Comparing a
+run's payload hashes with the manifest tells which tokens were added,
+changed, unchanged or removed, so unchanged tokens can skip the file
+write and the database upsert. Each entry also records whether that
+content was upserted into the database, so tokens written by a --no-db
+run are still upserted by the next run with the database.
+
+Environment Variables:
+    CONTENT_MANIFEST_PATH: SQLite manifest file (default ./cache/manifest.sqlite)
+
+Functions:
+    - open_manifest: Open (and create if needed) the manifest database.
+    - content_hash: Hash of a serialized metadata payload.
+    - load_hashes: Previous hashes for one asset.
+    - save_hashes: Record new hashes and drop removed tokens for one asset.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import datetime
+from pathlib import Path
+
+DEFAULT_MANIFEST_PATH = "./cache/manifest.sqlite"
+MANIFEST_BUSY_TIMEOUT = 300
+
+# Serializes writes from concurrent assets of one process (generate_all)
+_WRITE_LOCK = threading.Lock()
+
+
+def open_manifest(path: str = None) -> sqlite3.Connection:
+    """
+    Open the manifest database, creating the file and table if needed.
+
+    Args:
+        path (str): SQLite file. Defaults to CONTENT_MANIFEST_PATH.
+
+    Returns:
+        sqlite3.Connection: Open manifest connection.
+    """
+    path = Path(path or os.getenv("CONTENT_MANIFEST_PATH") or DEFAULT_MANIFEST_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Other processes may share the file; wait for their writes
+    conn = sqlite3.connect(path, timeout=MANIFEST_BUSY_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS manifest ("
+        " asset_type TEXT NOT NULL,"
+        " asset_name TEXT NOT NULL,"
+        " token_id TEXT NOT NULL,"
+        " content_hash TEXT NOT NULL,"
+        " updated_at TEXT NOT NULL,"
+        " in_database INTEGER NOT NULL DEFAULT 0,"
+        " PRIMARY KEY (asset_type, asset_name, token_id)"
+        ") WITHOUT ROWID"
+    )
+    # Manifests from before in_database: their entries get upserted once more
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(manifest)")}
+    if "in_database" not in columns:
+        conn.execute("ALTER TABLE manifest ADD COLUMN in_database INTEGER NOT NULL DEFAULT 0")
+    return conn
+
+
+def content_hash(payload) -> str:
+    """
+    sha256 of a serialized metadata payload (str or bytes).
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def load_hashes(conn: sqlite3.Connection, asset_type: str, asset_name: str) -> dict:
+    """
+    Load the recorded hashes for one asset.
+
+    Returns:
+        dict: token_id -> (content hash, whether that content is in the database).
+    """
+    rows = conn.execute(
+        "SELECT token_id, content_hash, in_database FROM manifest WHERE asset_type = ? AND asset_name = ?",
+        (asset_type, asset_name),
+    )
+    return {token_id: (digest, bool(in_database)) for token_id, digest, in_database in rows.fetchall()}
+
+
+def save_hashes(conn: sqlite3.Connection, asset_type: str, asset_name: str, hashes: dict, removed=(),
+                in_database: bool = False):
+    """
+    Record new or changed hashes and forget removed tokens, in one transaction.
+
+    Args:
+        conn (sqlite3.Connection): Manifest connection.
+        asset_type (str): "component" or "installation".
+        asset_name (str): Registry key of the asset.
+        hashes (dict): token_id -> content hash to upsert.
+        removed (iterable): Token IDs no longer produced by the source.
+        in_database (bool): The hashed content was also upserted into the database.
+    """
+    now = datetime.datetime.utcnow().isoformat()
+    with _WRITE_LOCK, conn:
+        conn.executemany(
+            "INSERT INTO manifest (asset_type, asset_name, token_id, content_hash, updated_at, in_database) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (asset_type, asset_name, token_id) DO UPDATE SET "
+            "content_hash = excluded.content_hash, updated_at = excluded.updated_at, in_database = excluded.in_database",
+            [(asset_type, asset_name, str(token_id), h, now, int(in_database)) for token_id, h in hashes.items()],
+        )
+        conn.executemany(
+            "DELETE FROM manifest WHERE asset_type = ? AND asset_name = ? AND token_id = ?",
+            [(asset_type, asset_name, str(token_id)) for token_id in removed],
+        )
@@ -1,45 +1,134 @@
-
 """
 Database Connection Helper
 
 This module provides utility functions for establishing connections to the PostgreSQL database
 using SQLAlchemy. It retrieves connection parameters from environment variables managed by dotenv.
 
+A single pooled engine is shared by the whole process. It is rebuilt automatically in forked
+worker processes so pooled connections are never shared across process boundaries.
+
 Environment Variables:
     POSTGRES_USER: Database username
     POSTGRES_PASSWORD: Database password
     POSTGRES_HOST: Database host (e.g., localhost or a container name)
     POSTGRES_PORT: Database port (e.g., 5432)
     POSTGRES_DB: Database name
+    POSTGRES_POOL_SIZE: Connections kept open in the pool (default 5)
+    POSTGRES_MAX_OVERFLOW: Extra connections allowed above the pool size (default 10)
+    POSTGRES_POOL_TIMEOUT: Seconds to wait for a free connection (default 30)
+    POSTGRES_POOL_RECYCLE: Seconds before a pooled connection is replaced (default 1800)
+    POSTGRES_POOL_PRE_PING: Test connections before handing them out (default true)
 """
 
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+import threading
 from dotenv import load_dotenv
 import os
 
 # Load environment variables
 load_dotenv()
 
+# Bulk upsert strategies of services/postgres_helpers.py, defined here so
+# CLIs can offer them without importing SQLAlchemy
+UPSERT_METHODS = ("values", "copy")
+
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 def get_engine():
     """
-    Create a SQLAlchemy engine using PostgreSQL credentials from environment variables.
+    Return the process-wide SQLAlchemy engine, creating it on first use.
+
+    Pool settings are read from the POSTGRES_POOL_* environment variables.
 
     Returns:
-        sqlalchemy.engine.Engine: SQLAlchemy engine object for database connection
+        sqlalchemy.engine.Engine: Shared, pooled engine for database connections
+    """
+    global _engine, _engine_pid
+    from sqlalchemy import create_engine
+
+    with _engine_lock:
+        if _engine is not None and _engine_pid == os.getpid():
+            return _engine
+
+        if _engine is not None:
+            # Inherited from the parent process: drop its connections without closing them
+            _engine.dispose(close=False)
+
+        db_url = (
+            f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+            f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
+        )
+        _engine = create_engine(
+            db_url,
+            pool_size=_env_int("POSTGRES_POOL_SIZE", 5),
+            max_overflow=_env_int("POSTGRES_MAX_OVERFLOW", 10),
+            pool_timeout=_env_int("POSTGRES_POOL_TIMEOUT", 30),
+            pool_recycle=_env_int("POSTGRES_POOL_RECYCLE", 1800),
+            pool_pre_ping=_env_bool("POSTGRES_POOL_PRE_PING", True),
+        )
+        _engine_pid = os.getpid()
+        return _engine
+
+
+def dispose_engine():
+    """
+    Close every pooled connection and forget the shared engine.
     """
-    db_url = (
-        f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
-        f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
-    )
-    return create_engine(db_url)
+    global _engine, _engine_pid
+
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine, _engine_pid = None, None
+
 
 def get_connection():
     """
-    Establish a connection to the PostgreSQL database using the SQLAlchemy engine.
+    Check out a connection from the shared engine's pool.
+
+    The caller is responsible for closing it, which returns it to the pool.
 
     Returns:
         sqlalchemy.engine.Connection: Active connection to the database
     """
-    engine = get_engine()
-    return engine.connect()
+    return get_engine().connect()
+
+
+@contextmanager
+def connection():
+    """
+    Context manager yielding a pooled connection that is returned on exit.
 
+    Yields:
+        sqlalchemy.engine.Connection: Active connection to the database
+    """
+    with get_engine().connect() as conn:
+        yield conn
+
+
+@contextmanager
+def transaction():
+    """
+    Context manager yielding a pooled connection inside a transaction
+    that commits on success and rolls back on error.
+
+    Yields:
+        sqlalchemy.engine.Connection: Connection with an open transaction
+    """
+    with get_engine().begin() as conn:
+        yield conn
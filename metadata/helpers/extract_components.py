@@ -1,18 +1,22 @@
+import re
 from numpy import nan
+import numpy as np
 from pandas import notna
 
+COMPONENT_FIELDS = [
+    "tokenId", "manufacturer", "model", "quantity",
+    "technology", "BIPV", "bifacial", "nameplate_capacity",
+    "efficiency","azimuth","tilt",
+    "ground_mounted",
+    "rated_capacity_kW", "rated_capacity_kWh",
+    "price", "output_capacity"
+]
+
 def extract_component_array(row, prefix, max_entries=3):
     """
     Extracts repeated _1, _2, _3 columns into an array of dicts.
     """
-    fields = [
-        "tokenId", "manufacturer", "model", "quantity",
-        "technology", "BIPV", "bifacial", "nameplate_capacity",
-        "efficiency","azimuth","tilt",
-        "ground_mounted",
-        "rated_capacity_kW", "rated_capacity_kWh",
-        "price", "output_capacity"
-    ]
+    fields = COMPONENT_FIELDS
     components = []
     for i in range(1, max_entries + 1):
         token_id = row.get(f"{prefix}_tokenId_{i}")
@@ -30,3 +34,61 @@ def extract_component_array(row, prefix, max_entries=3):
 
     return components
 
+
+def _slot_columns(columns, prefix, fields):
+    """
+    Map slot number -> {field: column position} for every <prefix>_<field>_<n> column.
+    """
+    pattern = re.compile(rf"^{re.escape(prefix)}_({'|'.join(map(re.escape, fields))})_(\d+)$")
+    slots = {}
+    for position, column in enumerate(columns):
+        match = pattern.match(str(column))
+        if match:
+            slots.setdefault(int(match.group(2)), {})[match.group(1)] = position
+    return dict(sorted(slots.items()))
+
+
+def extract_component_slots(df, prefixes, values=None, fields=COMPONENT_FIELDS):
+    """
+    Reshape the numbered <prefix>_<field>_<n> columns of a whole frame
+    into per-row component lists, for any number of slots.
+
+    The slot columns are found once, and each slot is masked and
+    filtered for all rows at once. The result matches
+    extract_component_array row by row. A slot is kept when its tokenId
+    is truthy, and a field is set when its value is not null.
+
+    Args:
+        df (pd.DataFrame): Registry rows.
+        prefixes (iterable): Component prefixes, e.g. ("module", "inverter").
+        values (np.ndarray): df.to_numpy(), if the caller already has it.
+        fields (list): Slot fields to keep, in output key order.
+
+    Returns:
+        dict: prefix -> list with one component list per row.
+    """
+    columns = list(df.columns)
+    values = df.to_numpy() if values is None else values
+    n_rows = len(values)
+    order = {field: i for i, field in enumerate(fields)}
+    truthy = np.frompyfunc(bool, 1, 1)
+
+    result = {}
+    for prefix in prefixes:
+        rows = [[] for _ in range(n_rows)]
+        for slot, positions in _slot_columns(columns, prefix, fields).items():
+            if "tokenId" not in positions:
+                continue  # No tokenId column, so no slot is ever kept
+
+            keep = truthy(values[:, positions["tokenId"]]).astype(bool)
+            kept = np.flatnonzero(keep)
+            if not len(kept):
+                continue
+
+            slot_fields = sorted(positions, key=order.get)
+            block = values[np.ix_(kept, [positions[field] for field in slot_fields])]
+            present = notna(block)
+            for row, row_values, row_present in zip(kept.tolist(), block, present):
+                rows[row].append({field: value for field, value, has in zip(slot_fields, row_values, row_present) if has})
+        result[prefix] = rows
+    return result
@@ -1,23 +1,107 @@
+import json
+import numpy as np
 import pandas as pd
-import requests
-from io import BytesIO
+from helpers.source_cache import fetch_source, read_cached_frame
 
 CA_SOLAR_BASE_URL = 'https://solarequipment.energy.ca.gov/Home/DownloadtoExcel'
 
+def _is_remote(location: str) -> bool:
+    return str(location).lower().startswith(("http://", "https://"))
+
 def extract_excel(source_location: str, skiprows: int) -> pd.DataFrame:
     url = CA_SOLAR_BASE_URL + '?filename=' + source_location
-    df = pd.read_excel(url, skiprows=skiprows)
+    df = read_cached_frame(url, lambda path: pd.read_excel(path, skiprows=skiprows), parse_key=f"excel:skiprows={skiprows}")
     df = df.drop(0, axis=0).reset_index(drop=True)
     return df
 
 def extract_csv(url: str) -> pd.DataFrame:
-    return pd.read_csv(url)
+    if not _is_remote(url):
+        return pd.read_csv(url)
+    return read_cached_frame(url, pd.read_csv, parse_key="csv")
 
 def extract_api(url: str) -> pd.DataFrame:
-    response = requests.get(url)
-    response.raise_for_status()
-    data = response.json()
+    raw_path, _ = fetch_source(url)
+    data = json.loads(raw_path.read_bytes())
     return pd.json_normalize(data)
 
 def extract_manual(filepath: str) -> pd.DataFrame:
     return pd.read_csv(filepath)
+
+# Extract functions whose source can be read in chunks by iter_csv_chunks
+STREAMING_EXTRACTS = ("extract_manual", "extract_csv")
+
+def _common_dtype(dtypes: set):
+    """
+    Dtype a column ends up with when its chunks are parsed as one file.
+    """
+    if len(dtypes) == 1:
+        return next(iter(dtypes))
+    if all(dtype.kind in "iuf" for dtype in dtypes):
+        return np.dtype("float64")
+    return np.dtype(object)
+
+def _csv_path(source_location: str):
+    return fetch_source(source_location)[0] if _is_remote(source_location) else source_location
+
+def infer_csv_dtypes(source_location: str, chunk_size: int = 50000) -> dict:
+    """
+    Column dtypes of a CSV registry as a whole-file pd.read_csv infers
+    them, found in one pass over the file in chunks of chunk_size rows.
+
+    Columns holding text in any chunk map to "str", so they are read as
+    text throughout (e.g. "0028" stays "0028"); every other column maps
+    to a numpy dtype name. Store the result as the registry entry's
+    `dtypes` so streamed runs can skip this pass.
+
+    Args:
+        source_location (str): Local path or URL (read through the source cache).
+        chunk_size (int): Rows parsed at a time.
+
+    Returns:
+        dict: Column -> "str" or dtype name, e.g. {"cost": "int64", "city": "str"}.
+    """
+    seen, text = {}, set()
+    for chunk in pd.read_csv(_csv_path(source_location), chunksize=chunk_size):
+        for column, dtype in chunk.dtypes.items():
+            seen.setdefault(column, set()).add(dtype)
+            if dtype == object and column not in text and any(isinstance(value, str) for value in chunk[column].to_numpy()):
+                text.add(column)
+    return {column: "str" if column in text else _common_dtype(kinds).name for column, kinds in seen.items()}
+
+def iter_csv_chunks(source_location: str, chunk_size: int, dtypes: dict = None):
+    """
+    Read a CSV registry in chunks of chunk_size rows.
+
+    pd.read_csv infers dtypes per chunk, so a column can come back as
+    int64 in one chunk and float64 or object in another. Every chunk is
+    cast to the dtype the whole file would be parsed with, so streamed
+    values match extract_manual / extract_csv. Only one chunk is held in
+    memory at a time.
+
+    Without a dtypes mapping the file is parsed twice: infer_csv_dtypes
+    reads it once to find the dtypes, then the chunks are read. Pass the
+    mapping (e.g. the registry entry's `dtypes`) to parse it once. If it
+    leaves out columns of the file, those are inferred with the same
+    first pass rather than left to per-chunk inference.
+
+    Args:
+        source_location (str): Local path or URL (read through the source cache).
+        chunk_size (int): Rows per chunk.
+        dtypes (dict): Column -> "str" or dtype name, as returned by infer_csv_dtypes.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the registry.
+    """
+    if dtypes is not None:
+        missing = [column for column in pd.read_csv(_csv_path(source_location), nrows=0).columns if column not in dtypes]
+        if missing:
+            print(f"⚠️ No dtypes declared for {len(missing)} columns ({', '.join(missing[:5])}...); inferring them.")
+            dtypes = {**infer_csv_dtypes(source_location, chunk_size), **dtypes}
+    if dtypes is None:
+        dtypes = infer_csv_dtypes(source_location, chunk_size)
+    text = [column for column, dtype in dtypes.items() if dtype == "str"]
+    dtypes = {column: np.dtype(dtype) for column, dtype in dtypes.items() if dtype != "str"}
+
+    for chunk in pd.read_csv(_csv_path(source_location), chunksize=chunk_size, dtype=dict.fromkeys(text, object)):
+        mismatched = {column: dtype for column, dtype in dtypes.items() if column in chunk and chunk[column].dtype != dtype}
+        yield chunk.astype(mismatched) if mismatched else chunk
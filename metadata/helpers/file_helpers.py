@@ -0,0 +1,62 @@
+"""File Helpers
+
+Atomic file writes shared by the output store, caches, indexes and
+reports. A file is written next to its destination under a ".tmp" name
+and renamed into place, so readers never see a partially written file.
+The publishing code skips ".tmp" files for the same reason.
+
+This module only uses the standard library, so lightweight modules
+(instrumentation, output_store) can import it without pulling in
+pandas or numpy.
+
+Functions:
+    - atomic_path: Context manager yielding a temporary path renamed into place on success.
+    - write_atomic: Write a payload to a temporary file and rename it into place.
+"""
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+TMP_SUFFIX = ".tmp"
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    Yield a temporary path next to path; on success it replaces path, on
+    error it is removed.
+
+    Use it for writers that need a file name (pandas, pickle, streamed
+    archives) rather than a payload in memory.
+
+    Args:
+        path (Path or str): Destination file.
+
+    Yields:
+        Path: Temporary file to write.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + TMP_SUFFIX)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_atomic(path, payload):
+    """
+    Write a payload next to its destination, then rename it into place so
+    readers never see a partially written file.
+
+    Args:
+        path (Path or str): Destination file.
+        payload (bytes or str): File contents; text is written as UTF-8.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
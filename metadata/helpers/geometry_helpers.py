@@ -1,5 +1,43 @@
+"""Geometry Helpers
+
+Parsing of the registry geometry and centroid columns, and the packed
+multipolygon delta codec.
+
+Packed multipolygon format (``packed_multipolygon_deltas``, hex string),
+as carried by the registry CSV: the rings of the geometry one after the
+other, each
+
+    L, then the L-byte big-endian Morton code of its first point,
+    then per following point: (sign << 7 | L), then the L-byte
+    big-endian magnitude of the Morton code delta from the previous
+    point,
+    then 0xFF
+
+where Morton codes are those of the installation token IDs (integer
+microdegrees, longitude + 180 and latitude + 90, see
+metadata_helpers.MORTON_*). Coordinates with at most six decimals
+round-trip exactly. Rings carry no polygon structure, so each decodes
+as a one-ring polygon, and polygons with holes cannot be packed.
+
+Functions:
+    - decode_geometry_geojson: Load a GeoJSON string.
+    - transform_centroid: POINT string to a coordinate pair.
+    - transform_centroids: Vectorized transform_centroid for a column.
+    - encode_packed_multipolygon: Pack one (Multi)Polygon.
+    - encode_packed_multipolygons: Pack many geometries in one vectorized pass.
+    - decode_packed_multipolygon: Unpack to a GeoJSON MultiPolygon dict.
+    - geometry_coordinates: MultiPolygon coordinates of a verbose or packed geometry.
+"""
+
 import json
+import numpy as np
+import shapely
 from shapely import wkt
+from shapely.geometry import shape
+
+PACKED_GEOMETRY_KEY = "packed_multipolygon_deltas"
+
+_RING_END = 0xFF
 
 def decode_geometry_geojson(geojson_str):
     """
@@ -18,3 +56,164 @@ def transform_centroid(centroid):
         return list(centroid)  # Already good
     else:
         raise ValueError(f"Unsupported centroid format: {centroid}")
+
+
+def transform_centroids(centroids) -> list:
+    """
+    Transform a column of centroids into [lon, lat] lists.
+
+    POINT strings are parsed in one vectorized shapely call; any other
+    values go through transform_centroid one by one.
+    """
+    centroids = list(centroids)
+    is_wkt = [isinstance(c, str) and c.strip().upper().startswith('POINT') for c in centroids]
+    if not all(is_wkt):
+        return [transform_centroid(c) for c in centroids]
+
+    points = shapely.from_wkt(centroids)
+    xs = shapely.get_x(points).tolist()
+    ys = shapely.get_y(points).tolist()
+    return [[round(x, 7), round(y, 7)] for x, y in zip(xs, ys)]
+
+
+def _to_shapely(geometry):
+    if isinstance(geometry, str):
+        return shapely.from_geojson(geometry)
+    if isinstance(geometry, dict):
+        return shape(geometry)
+    return geometry
+
+
+def encode_packed_multipolygons(geometries) -> list:
+    """
+    Pack (Multi)Polygons into packed_multipolygon_deltas hex strings.
+
+    All geometries are flattened into one shapely coordinate array, so
+    quantization, Morton coding, deltas and byte layout each run once
+    for the whole batch.
+
+    Args:
+        geometries (iterable): GeoJSON dicts or strings, or shapely geometries.
+
+    Returns:
+        list: Hex strings, one per geometry, or None for a geometry with
+        holes, which the format cannot represent.
+    """
+    # Imported here: metadata_helpers imports this module
+    from helpers.metadata_helpers import MORTON_LAT_SHIFT, MORTON_LON_SHIFT, _scale_coordinates, encode_morton_array
+
+    geometries = np.array([_to_shapely(g) for g in geometries], dtype=object)
+    if len(geometries) == 0:
+        return []
+
+    polygons, polygon_owner = shapely.get_parts(geometries, return_index=True)
+    has_holes = np.zeros(len(geometries), dtype=bool)
+    has_holes[polygon_owner[shapely.get_num_interior_rings(polygons) > 0]] = True
+    packable = ~has_holes[polygon_owner]
+    polygons, polygon_owner = polygons[packable], polygon_owner[packable]
+
+    rings = shapely.get_exterior_ring(polygons)
+    points_per_ring = shapely.get_num_coordinates(rings)
+    coords = shapely.get_coordinates(rings)
+    codes = encode_morton_array(_scale_coordinates(coords[:, 1], MORTON_LAT_SHIFT),
+                                _scale_coordinates(coords[:, 0], MORTON_LON_SHIFT))
+
+    # Each point is (header, magnitude): the first of a ring carries its code, the rest the delta
+    ring_ends = np.cumsum(points_per_ring)
+    first = np.zeros(len(codes), dtype=bool)
+    first[ring_ends - points_per_ring] = True
+    deltas = np.diff(codes.astype(np.int64), prepend=np.int64(0))
+    magnitudes = np.where(first, codes, np.abs(deltas).astype(np.uint64))
+    lengths = np.ones(len(codes), dtype=np.int64)
+    for k in range(1, 8):
+        lengths += magnitudes >= np.uint64(1 << (8 * k))
+    headers = np.where(first | (deltas >= 0), lengths, lengths | 0x80)
+
+    # One row per point: header, 8 big-endian bytes, ring terminator; keep the used cells
+    matrix = np.empty((len(codes), 10), dtype=np.uint8)
+    matrix[:, 0] = headers
+    matrix[:, 1:9] = (magnitudes[:, None] >> (np.arange(7, -1, -1, dtype=np.uint64) * np.uint64(8))) & np.uint64(0xFF)
+    matrix[:, 9] = _RING_END
+    used = np.zeros(matrix.shape, dtype=bool)
+    used[:, 0] = True
+    used[:, 1:9] = np.arange(8, 0, -1) <= lengths[:, None]
+    used[ring_ends - 1, 9] = True
+    raw = matrix[used].tobytes()
+
+    # Split the byte stream per geometry
+    point_owner = np.repeat(polygon_owner, points_per_ring)
+    byte_counts = np.bincount(point_owner, weights=used.sum(axis=1), minlength=len(geometries)).astype(np.int64)
+    byte_ends = np.cumsum(byte_counts)
+    return [
+        None if holes else raw[end - size:end].hex()
+        for holes, size, end in zip(has_holes.tolist(), byte_counts.tolist(), byte_ends.tolist())
+    ]
+
+
+def encode_packed_multipolygon(geometry) -> str:
+    """
+    Pack one (Multi)Polygon into a packed_multipolygon_deltas hex string.
+    """
+    return encode_packed_multipolygons([geometry])[0]
+
+
+def decode_packed_multipolygon(packed: str) -> dict:
+    """
+    Unpack a packed_multipolygon_deltas hex string.
+
+    Args:
+        packed (str): Hex string, from the registry or encode_packed_multipolygon.
+
+    Returns:
+        dict: GeoJSON MultiPolygon with one polygon per ring.
+
+    Raises:
+        ValueError: If the data is truncated.
+    """
+    from helpers.metadata_helpers import MORTON_LAT_SHIFT, MORTON_LON_SHIFT, MORTON_PRECISION, decode_morton_array
+
+    data = bytes.fromhex(packed)
+    codes, ring_sizes = [], []
+    cursor = 0
+    try:
+        while cursor < len(data):
+            length = data[cursor]
+            code = int.from_bytes(data[cursor + 1:cursor + 1 + length], "big")
+            cursor += 1 + length
+            ring = [code]
+            while data[cursor] != _RING_END:
+                header = data[cursor]
+                length = header & 0x7F
+                if cursor + 1 + length > len(data):
+                    raise IndexError
+                delta = int.from_bytes(data[cursor + 1:cursor + 1 + length], "big")
+                code = code - delta if header & 0x80 else code + delta
+                ring.append(code)
+                cursor += 1 + length
+            cursor += 1
+            codes.extend(ring)
+            ring_sizes.append(len(ring))
+    except IndexError:
+        raise ValueError(f"❌ Malformed packed multipolygon: truncated at byte {cursor} of {len(data)}.")
+
+    lat_int, lon_int = decode_morton_array(np.array(codes, dtype=np.uint64))
+    lons = (lon_int.astype(np.int64) - int(MORTON_LON_SHIFT * MORTON_PRECISION)) / MORTON_PRECISION
+    lats = (lat_int.astype(np.int64) - int(MORTON_LAT_SHIFT * MORTON_PRECISION)) / MORTON_PRECISION
+    points = np.column_stack([lons, lats]).tolist()
+
+    coordinates, start = [], 0
+    for size in ring_sizes:
+        coordinates.append([points[start:start + size]])
+        start += size
+    return {"type": "MultiPolygon", "coordinates": coordinates}
+
+
+def geometry_coordinates(geometry: dict):
+    """
+    MultiPolygon coordinates of a metadata geometry, whether verbose
+    (list or compact JSON string) or packed.
+    """
+    if PACKED_GEOMETRY_KEY in geometry and "coordinates" not in geometry:
+        return decode_packed_multipolygon(geometry[PACKED_GEOMETRY_KEY])["coordinates"]
+    coordinates = geometry["coordinates"]
+    return json.loads(coordinates) if isinstance(coordinates, str) else coordinates
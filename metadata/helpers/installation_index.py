@@ -0,0 +1,241 @@
+"""Installation Index
+
+In-memory spatial index over installation geometries for repeated
+bbox, point-in-polygon and nearest-neighbour queries without PostGIS
+round trips.
+
+An index is a dict of compact NumPy arrays:
+
+    token_ids    (n,)    uint64   Morton token IDs
+    centroids    (n, 2)  float64  [lon, lat]
+    bboxes       (n, 4)  float64  [min_lon, min_lat, max_lon, max_lat]
+    wkb          (m,)    uint8    concatenated WKB geometries
+    wkb_offsets  (n + 1) int64    geometry i is wkb[wkb_offsets[i]:wkb_offsets[i + 1]]
+
+An STRtree over the bboxes is built on first query, and geometries are
+parsed from WKB only when a query needs the exact shape. Saved indexes
+are plain .npy files that load memory-mapped, so start-up cost does not
+grow with the number of installations.
+
+Distances are planar, in degrees.
+
+Functions:
+    - build_index: Build an index from token IDs, centroids and geometries.
+    - load_index_from_directory: Index the generated installation JSON files.
+    - load_index_from_db: Index the accounting.installations table.
+    - save_index: Persist the index arrays to a directory.
+    - load_index: Load a saved index, memory-mapped by default.
+    - query_bbox: Installations intersecting a bounding box.
+    - query_point: Installations whose geometry contains a point.
+    - query_nearest: The k installations nearest to a point.
+"""
+
+import json
+from pathlib import Path
+import numpy as np
+import shapely
+from sqlalchemy import text
+from helpers.geometry_helpers import geometry_coordinates
+from helpers.output_store import iter_records
+
+INDEX_ARRAYS = ("token_ids", "centroids", "bboxes", "wkb", "wkb_offsets")
+
+
+def build_index(token_ids, centroids, geometries) -> dict:
+    """
+    Build an index from parallel sequences.
+
+    Args:
+        token_ids (iterable): Installation token IDs (int or str).
+        centroids (iterable): [lon, lat] pairs.
+        geometries (iterable): Shapely geometries.
+
+    Returns:
+        dict: Index arrays (see module docstring).
+    """
+    geometries = np.asarray(list(geometries), dtype=object)
+    blobs = shapely.to_wkb(geometries) if len(geometries) else []
+    lengths = np.fromiter((len(b) for b in blobs), dtype=np.int64, count=len(blobs))
+
+    return {
+        "token_ids": np.array([int(t) for t in token_ids], dtype=np.uint64),
+        "centroids": np.array(list(centroids), dtype=np.float64).reshape(-1, 2),
+        "bboxes": shapely.bounds(geometries).reshape(-1, 4),
+        "wkb": np.frombuffer(b"".join(blobs), dtype=np.uint8),
+        "wkb_offsets": np.concatenate(([0], np.cumsum(lengths))),
+    }
+
+
+def load_index_from_directory(directory) -> dict:
+    """
+    Index the installation metadata of an output directory (flat,
+    sharded or pack layout).
+
+    Args:
+        directory (str or Path): e.g. ./ipfs/installations/solar_array/
+
+    Returns:
+        dict: Index arrays.
+    """
+    token_ids, centroids, geojson = [], [], []
+    for _, payload in iter_records(directory):
+        metadata = json.loads(payload)
+        coords = metadata["geometry"].get("coordinates")
+        if not isinstance(coords, str):
+            coords = json.dumps(geometry_coordinates(metadata["geometry"]), separators=(',', ':'))
+        token_ids.append(metadata["tokenId"])
+        centroids.append(metadata["centroid"])
+        geojson.append('{"type":"MultiPolygon","coordinates":' + coords + '}')
+
+    geometries = shapely.from_geojson(geojson) if geojson else []
+    return build_index(token_ids, centroids, geometries)
+
+
+def load_index_from_db(conn, batch_size: int = 10000) -> dict:
+    """
+    Index the accounting.installations table.
+
+    The centroid is read from the metadata document, which keeps the
+    [lon, lat] order of the generated files.
+
+    Args:
+        conn (sqlalchemy.engine.Connection): Active database connection.
+        batch_size (int): Rows fetched per round trip.
+
+    Returns:
+        dict: Index arrays.
+    """
+    sql = text(
+        "SELECT token_id, metadata->'centroid', ST_AsBinary(geometry) "
+        "FROM accounting.installations ORDER BY token_id"
+    ).execution_options(stream_results=True, yield_per=batch_size)
+    token_ids, centroids, blobs = [], [], []
+    for token_id, centroid, blob in conn.execute(sql):
+        token_ids.append(token_id)
+        centroids.append(centroid)
+        blobs.append(bytes(blob))
+
+    geometries = shapely.from_wkb(blobs) if blobs else []
+    return build_index(token_ids, centroids, geometries)
+
+
+def save_index(index: dict, directory):
+    """
+    Write the index arrays as .npy files in a directory.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in INDEX_ARRAYS:
+        np.save(directory / f"{name}.npy", np.asarray(index[name]))
+
+
+def load_index(directory, mmap: bool = True) -> dict:
+    """
+    Load an index written by save_index.
+
+    Args:
+        directory (str or Path): Directory with the .npy files.
+        mmap (bool): Memory-map the arrays instead of reading them.
+
+    Returns:
+        dict: Index arrays.
+    """
+    directory = Path(directory)
+    mmap_mode = "r" if mmap else None
+    return {name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in INDEX_ARRAYS}
+
+
+def _tree(index: dict) -> shapely.STRtree:
+    """
+    STRtree over the bounding boxes, built once per index.
+    """
+    if "tree" not in index:
+        index["tree"] = shapely.STRtree(shapely.box(*np.asarray(index["bboxes"]).T))
+    return index["tree"]
+
+
+def _geometries(index: dict, positions: np.ndarray) -> np.ndarray:
+    """
+    Shapely geometries at the given positions, parsed from WKB on first use.
+    """
+    if "geometries" not in index:
+        index["geometries"] = np.full(len(index["token_ids"]), None, dtype=object)
+    cache = index["geometries"]
+
+    missing = positions[shapely.is_missing(cache[positions])]
+    if len(missing):
+        wkb, offsets = index["wkb"], index["wkb_offsets"]
+        cache[missing] = shapely.from_wkb([wkb[offsets[i]:offsets[i + 1]].tobytes() for i in missing])
+    return cache[positions]
+
+
+def query_bbox(index: dict, bbox, exact: bool = True) -> list:
+    """
+    Installations whose geometry intersects a bounding box.
+
+    Args:
+        index (dict): Installation index.
+        bbox (tuple): (min_lon, min_lat, max_lon, max_lat).
+        exact (bool): Test the geometry itself, not just its bbox.
+
+    Returns:
+        list: Sorted token IDs.
+    """
+    box = shapely.box(*bbox)
+    positions = _tree(index).query(box)
+    if exact and len(positions):
+        positions = positions[shapely.intersects(_geometries(index, positions), box)]
+    return np.sort(np.asarray(index["token_ids"])[positions]).tolist()
+
+
+def query_point(index: dict, lon: float, lat: float) -> list:
+    """
+    Installations whose geometry contains a point (boundary included).
+
+    Returns:
+        list: Sorted token IDs.
+    """
+    point = shapely.points(lon, lat)
+    positions = _tree(index).query(point)
+    if len(positions):
+        positions = positions[shapely.covers(_geometries(index, positions), point)]
+    return np.sort(np.asarray(index["token_ids"])[positions]).tolist()
+
+
+def query_nearest(index: dict, lon: float, lat: float, k: int = 1) -> list:
+    """
+    The k installations whose geometry is nearest to a point.
+
+    The search radius starts at the nearest bbox and doubles until k
+    geometries are known to lie within it.
+
+    Args:
+        index (dict): Installation index.
+        lon (float): Longitude of the point.
+        lat (float): Latitude of the point.
+        k (int): Number of installations to return.
+
+    Returns:
+        list: (token_id, distance) tuples, nearest first.
+    """
+    n = len(index["token_ids"])
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    tree = _tree(index)
+    point = shapely.points(lon, lat)
+    _, distances = tree.query_nearest(point, return_distance=True)
+    radius = max(float(distances[0]), 1e-9)
+
+    while True:
+        positions = tree.query(point, predicate="dwithin", distance=radius)
+        exact = shapely.distance(_geometries(index, positions), point)
+        within = exact <= radius
+        if within.sum() >= k or len(positions) == n:
+            break
+        radius *= 2
+
+    order = np.lexsort((positions, exact))[:k]
+    token_ids = np.asarray(index["token_ids"])[positions[order]].tolist()
+    return list(zip(token_ids, exact[order].tolist()))
@@ -0,0 +1,306 @@
+"""Instrumentation
+
+Lightweight per-stage telemetry for pipeline runs. A run is a plain dict
+of stages and counters:
+
+    run = start_run("installation/solar_array")
+    with stage(run, "transform", rows_in=len(df)) as s:
+        df = transform_fn(df)
+        s["rows_out"] = len(df)
+    count(run, "bytes_written", len(payload))
+    write_report(finish_run(run), "./cache/reports/run.json", prometheus_path="./cache/reports/run.prom")
+
+Each stage records wall and CPU seconds, calls, rows in and out, any
+extra counters set on it, and the process's peak RSS when it last
+exited. CPU time is that of the calling thread, so runs on concurrent
+threads of one process (generate_all) each count only their own; peak
+RSS and tracemalloc cover the whole process. Stage dicts produced in worker processes can be folded into the
+parent run with merge_stages. Counters cover bytes written, DB
+statements (see watch_db_statements) and validation failures by reason.
+
+One stage can be profiled per run: with profile_mode "cprofile" the
+stage runs under cProfile and the stats are dumped to profile_path; with
+"tracemalloc" the peak traced memory and the top allocation sites of
+its last call are added to the stage.
+
+Functions:
+    - start_run: Create a run.
+    - stage: Context manager timing one stage.
+    - merge_stages: Fold stage dicts from another process into a run.
+    - count: Increment a run counter.
+    - count_reasons: Add per-reason counts to a run counter.
+    - watch_db_statements: Count statements executed on a SQLAlchemy connection.
+    - finish_run: Close a run and compute totals.
+    - write_report: Write the JSON report and optional Prometheus text file.
+    - prometheus_text: Prometheus text-format exposition of a run.
+"""
+
+import cProfile
+import json
+import os
+import re
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from helpers.file_helpers import write_atomic
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+# Stages of the generate_metadata pipeline, in run order; stage() and
+# start_run reject other names so a typo cannot profile nothing
+STAGES = ("extract", "transform", "component_transform", "resolve_components", "packed_geometry",
+          "clean", "validate", "serialize", "write", "upsert")
+
+# High-water marks: merge_stages keeps the max of these and sums the rest
+_PEAK_KEYS = ("peak_rss_mb", "tracemalloc_peak_mb")
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process in MB.
+    """
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def start_run(name: str, profile_stage: str = None, profile_mode: str = "cprofile", profile_path: str = None) -> dict:
+    """
+    Create a run.
+
+    Args:
+        name (str): Run label, e.g. "installation/solar_array".
+        profile_stage (str): Stage to profile, or None.
+        profile_mode (str): "cprofile" or "tracemalloc".
+        profile_path (str): cProfile stats file (default ./cache/reports/<stage>.prof).
+
+    Returns:
+        dict: Run state for stage / count / finish_run.
+
+    Raises:
+        ValueError: If the profile stage or mode is unknown.
+    """
+    if profile_stage and profile_stage not in STAGES:
+        raise ValueError(f"Unknown stage '{profile_stage}', expected one of {STAGES}.")
+    if profile_stage and profile_mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{profile_mode}', expected one of {PROFILE_MODES}.")
+
+    return {
+        "name": name,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "pid": os.getpid(),
+        "stages": {},
+        "counters": {},
+        "profile": {"stage": profile_stage, "mode": profile_mode,
+                    "path": profile_path or f"./cache/reports/{profile_stage}.prof"} if profile_stage else None,
+        "_wall": time.perf_counter(),
+        "_cpu": time.thread_time(),
+    }
+
+
+def _stage_entry(run: dict, name: str) -> dict:
+    entry = run["stages"].get(name)
+    if entry is None:
+        entry = {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "rows_in": 0, "rows_out": 0}
+        run["stages"][name] = entry
+    return entry
+
+
+@contextmanager
+def stage(run: dict, name: str, rows_in: int = 0):
+    """
+    Time one stage. Repeated stages with the same name accumulate.
+
+    Yields:
+        dict: Per-call counters; set "rows_out" (defaults to rows_in) and
+        any other numeric key, which is added to the stage totals.
+
+    Raises:
+        ValueError: If the name is not one of STAGES.
+    """
+    if name not in STAGES:
+        raise ValueError(f"Unknown stage '{name}', expected one of {STAGES}.")
+    if run is None:
+        yield {"rows_out": rows_in}
+        return
+
+    profile = run["profile"] if run["profile"] and run["profile"]["stage"] == name else None
+    profiler, tracing = None, False
+    if profile and profile["mode"] == "cprofile":
+        # One profiler per run, so repeated calls of the stage accumulate
+        if "_profiler" not in run:
+            run["_profiler"] = cProfile.Profile()
+        profiler = run["_profiler"]
+        profiler.enable()
+    elif profile and not tracemalloc.is_tracing():
+        tracemalloc.start(25)
+        tracing = True
+
+    current = {"rows_out": rows_in}
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield current
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+        entry = _stage_entry(run, name)
+        entry["calls"] += 1
+        entry["wall_s"] += wall
+        entry["cpu_s"] += cpu
+        entry["rows_in"] += rows_in
+        for key, value in current.items():
+            entry[key] = entry.get(key, 0) + value
+        entry["peak_rss_mb"] = peak_rss_mb()
+
+        if profiler is not None:
+            profiler.disable()
+            path = Path(profile["path"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(path)
+            entry["profile"] = str(path)
+        elif tracing:
+            snapshot = tracemalloc.take_snapshot()
+            peak = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+            entry["tracemalloc_peak_mb"] = max(entry.get("tracemalloc_peak_mb", 0), peak)
+            entry["tracemalloc_top"] = [
+                {"site": str(statistic.traceback[0]), "size_mb": round(statistic.size / 2 ** 20, 3), "count": statistic.count}
+                for statistic in snapshot.statistics("lineno")[:20]
+            ]
+            tracemalloc.stop()
+
+
+def merge_stages(run: dict, stages: dict):
+    """
+    Fold stage dicts recorded in another process (e.g. a worker's run
+    "stages") into a run. Times and rows are summed, peaks take the max.
+    """
+    if run is None:
+        return
+    for name, other in stages.items():
+        entry = _stage_entry(run, name)
+        for key, value in other.items():
+            if key in _PEAK_KEYS:
+                entry[key] = max(entry.get(key, 0), value)
+            elif isinstance(value, (int, float)):
+                entry[key] = entry.get(key, 0) + value
+            else:
+                entry[key] = value
+
+
+def count(run: dict, key: str, n=1):
+    """
+    Increment a run counter.
+    """
+    if run is not None:
+        run["counters"][key] = run["counters"].get(key, 0) + n
+
+
+def count_reasons(run: dict, key: str, reasons: dict):
+    """
+    Add per-reason counts (e.g. validation failures) to a run counter.
+    """
+    if run is None or not reasons:
+        return
+    totals = run["counters"].setdefault(key, {})
+    for reason, n in reasons.items():
+        totals[reason] = totals.get(reason, 0) + n
+
+
+def watch_db_statements(run: dict, conn):
+    """
+    Count statements executed on a SQLAlchemy connection in the
+    "db_statements" counter. COPY streams written through the raw DBAPI
+    cursor bypass SQLAlchemy and are not counted.
+    """
+    if run is None or conn is None:
+        return
+    from sqlalchemy import event
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        count(run, "db_statements")
+
+    event.listen(conn, "before_cursor_execute", before_cursor_execute)
+
+
+def finish_run(run: dict) -> dict:
+    """
+    Close a run: add total wall/CPU time and peak RSS and round the stage figures.
+
+    Returns:
+        dict: The JSON-ready report.
+    """
+    wall = time.perf_counter() - run.pop("_wall")
+    cpu = time.thread_time() - run.pop("_cpu")
+    run.pop("_profiler", None)
+    for entry in run["stages"].values():
+        entry["wall_s"] = round(entry["wall_s"], 4)
+        entry["cpu_s"] = round(entry["cpu_s"], 4)
+        rows = entry["rows_in"] or entry["rows_out"]
+        entry["rows_per_s"] = round(rows / entry["wall_s"], 1) if entry["wall_s"] > 0 else None
+
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    run["total"] = {
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "peak_rss_mb": peak_rss_mb(),
+        "children_peak_rss_mb": round(children / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+    }
+    return run
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _metric_name(key: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", key)
+
+
+def prometheus_text(run: dict, prefix: str = "metadata") -> str:
+    """
+    Prometheus text-format exposition of a finished run.
+    """
+    name = _label(run["name"])
+    lines = []
+
+    stage_metrics = [
+        ("stage_wall_seconds", "wall_s", "Wall-clock seconds spent in the stage."),
+        ("stage_cpu_seconds", "cpu_s", "CPU seconds spent in the stage."),
+        ("stage_rows_in", "rows_in", "Rows entering the stage."),
+        ("stage_rows_out", "rows_out", "Rows leaving the stage."),
+        ("stage_peak_rss_megabytes", "peak_rss_mb", "Peak resident set size after the stage."),
+    ]
+    for metric, key, help_text in stage_metrics:
+        lines += [f"# HELP {prefix}_{metric} {help_text}", f"# TYPE {prefix}_{metric} gauge"]
+        for stage_name, entry in run["stages"].items():
+            if key in entry:
+                lines.append(f'{prefix}_{metric}{{run="{name}",stage="{_label(stage_name)}"}} {entry[key]}')
+
+    for key, value in run["counters"].items():
+        metric = f"{prefix}_{_metric_name(key)}"
+        lines += [f"# TYPE {metric} gauge"]
+        if isinstance(value, dict):
+            lines += [f'{metric}{{run="{name}",reason="{_label(reason)}"}} {n}' for reason, n in value.items()]
+        else:
+            lines.append(f'{metric}{{run="{name}"}} {value}')
+
+    for key, suffix in (("wall_s", "wall_seconds"), ("cpu_s", "cpu_seconds"), ("peak_rss_mb", "peak_rss_megabytes")):
+        metric = f"{prefix}_run_{suffix}"
+        lines += [f"# TYPE {metric} gauge", f'{metric}{{run="{name}"}} {run["total"][key]}']
+    return "\n".join(lines) + "\n"
+
+
+def write_report(run: dict, path, prometheus_path=None):
+    """
+    Write a finished run as JSON and, optionally, as a Prometheus text file
+    (for the node exporter textfile collector).
+    """
+    for target, content in ((path, lambda: json.dumps(run, indent=2, default=str)),
+                            (prometheus_path, lambda: prometheus_text(run))):
+        if not target:
+            continue
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(target, content())
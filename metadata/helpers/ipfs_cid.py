@@ -0,0 +1,369 @@
+"""IPFS CID
+
+Offline computation of the IPFS DAG that `ipfs add -r --cid-version 1
+--raw-leaves` builds for a directory, and export of that DAG as a CAR
+(v1) archive, without a running daemon.
+
+Layout, matching the defaults of the reference implementation:
+    - files are split into 256 KiB raw leaves; a file of one chunk is
+      its raw leaf, larger files get a balanced tree of UnixFS File
+      nodes with up to 174 links each;
+    - directories are dag-pb UnixFS Directory nodes with links sorted
+      by name, switching to a HAMT shard (fanout 256, murmur3-x64-64
+      name hashes) once the estimated directory block reaches 256 KiB;
+    - CIDs are v1, sha2-256, printed in base32.
+
+Functions:
+    - cid_to_str: Base32 string of a binary CID.
+    - file_cid: CID of a file's contents.
+    - compute_directory_dag: Root CID, directory blocks and file CIDs of a tree.
+    - directory_cid: Root CID of a directory.
+    - export_car: Write a directory as a CAR archive.
+"""
+
+import base64
+import hashlib
+from pathlib import Path
+from helpers.file_helpers import TMP_SUFFIX, atomic_path
+
+CHUNK_SIZE = 256 * 1024
+MAX_LINKS = 174
+HAMT_FANOUT = 256
+HAMT_THRESHOLD = 256 * 1024
+
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+MULTIHASH_SHA2_256 = 0x12
+HASH_MURMUR3_X64_64 = 0x22
+
+UNIXFS_DIRECTORY = 1
+UNIXFS_FILE = 2
+UNIXFS_HAMT_SHARD = 5
+
+_MASK64 = (1 << 64) - 1
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field(number: int, value) -> bytes:
+    """
+    One protobuf field: varint for ints, length-delimited for bytes.
+    """
+    if isinstance(value, int):
+        return _varint(number << 3) + _varint(value)
+    return _varint((number << 3) | 2) + _varint(len(value)) + value
+
+
+def _cid(codec: int, block: bytes) -> bytes:
+    digest = hashlib.sha256(block).digest()
+    return bytes([1, codec, MULTIHASH_SHA2_256, len(digest)]) + digest
+
+
+def cid_to_str(cid: bytes) -> str:
+    """
+    Multibase base32 (lowercase, unpadded) string of a binary CID.
+    """
+    return "b" + base64.b32encode(cid).decode().lower().rstrip("=")
+
+
+def _cid_from_str(cid: str) -> bytes:
+    """
+    Binary CID of a multibase base32 string from cid_to_str.
+    """
+    encoded = cid[1:].upper()
+    return base64.b32decode(encoded + "=" * (-len(encoded) % 8))
+
+
+def _unixfs(kind: int, data: bytes = None, filesize: int = None, blocksizes=(), hash_type: int = None,
+            fanout: int = None) -> bytes:
+    out = _field(1, kind)
+    if data is not None:
+        out += _field(2, data)
+    if filesize is not None:
+        out += _field(3, filesize)
+    for size in blocksizes:
+        out += _field(4, size)
+    if hash_type is not None:
+        out += _field(5, hash_type)
+    if fanout is not None:
+        out += _field(6, fanout)
+    return out
+
+
+def _dag_pb(links, data: bytes) -> bytes:
+    """
+    Canonical dag-pb node: links (hash, name, tsize) first, then data.
+    """
+    out = b""
+    for cid, name, tsize in links:
+        link = _field(1, cid) + _field(2, name.encode()) + _field(3, tsize)
+        out += _field(2, link)
+    return out + _field(1, data)
+
+
+def _file_dag(data: bytes, emit=None):
+    """
+    Build the DAG of a file's contents.
+
+    Returns:
+        tuple: (cid, cumulative size).
+    """
+    chunks = [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)] or [b""]
+
+    # (cid, cumulative size, file size) per node of the current level
+    level = []
+    for chunk in chunks:
+        cid = _cid(CODEC_RAW, chunk)
+        if emit:
+            emit(cid, chunk)
+        level.append((cid, len(chunk), len(chunk)))
+
+    while len(level) > 1:
+        parents = []
+        for i in range(0, len(level), MAX_LINKS):
+            children = level[i:i + MAX_LINKS]
+            filesize = sum(child[2] for child in children)
+            block = _dag_pb(
+                [(cid, "", tsize) for cid, tsize, _ in children],
+                _unixfs(UNIXFS_FILE, filesize=filesize, blocksizes=[child[2] for child in children]),
+            )
+            cid = _cid(CODEC_DAG_PB, block)
+            if emit:
+                emit(cid, block)
+            parents.append((cid, len(block) + sum(child[1] for child in children), filesize))
+        level = parents
+
+    return level[0][0], level[0][1]
+
+
+def file_cid(data: bytes) -> str:
+    """
+    CID of a file's contents as added with CIDv1 and raw leaves.
+    """
+    return cid_to_str(_file_dag(data)[0])
+
+
+def _rotl(value: int, shift: int) -> int:
+    return ((value << shift) | (value >> (64 - shift))) & _MASK64
+
+
+def _fmix(value: int) -> int:
+    value ^= value >> 33
+    value = (value * 0xFF51AFD7ED558CCD) & _MASK64
+    value ^= value >> 33
+    value = (value * 0xC4CEB9FE1A85EC53) & _MASK64
+    return value ^ (value >> 33)
+
+
+def _murmur3_x64_64(data: bytes) -> bytes:
+    """
+    First 64 bits of MurmurHash3_x64_128 (seed 0), big-endian, as used
+    for HAMT directory keys.
+    """
+    c1, c2 = 0x87C37B91114253D5, 0x4CF5AD432745937F
+    h1 = h2 = 0
+    n_blocks = len(data) // 16
+
+    for i in range(n_blocks):
+        k1 = int.from_bytes(data[16 * i:16 * i + 8], "little")
+        k2 = int.from_bytes(data[16 * i + 8:16 * i + 16], "little")
+        h1 ^= (_rotl((k1 * c1) & _MASK64, 31) * c2) & _MASK64
+        h1 = (_rotl(h1, 27) + h2) & _MASK64
+        h1 = (h1 * 5 + 0x52DCE729) & _MASK64
+        h2 ^= (_rotl((k2 * c2) & _MASK64, 33) * c1) & _MASK64
+        h2 = (_rotl(h2, 31) + h1) & _MASK64
+        h2 = (h2 * 5 + 0x38495AB5) & _MASK64
+
+    tail = data[16 * n_blocks:]
+    if len(tail) > 8:
+        h2 ^= (_rotl((int.from_bytes(tail[8:], "little") * c2) & _MASK64, 33) * c1) & _MASK64
+    if tail:
+        h1 ^= (_rotl((int.from_bytes(tail[:8], "little") * c1) & _MASK64, 31) * c2) & _MASK64
+
+    h1 ^= len(data)
+    h2 ^= len(data)
+    h1 = (h1 + h2) & _MASK64
+    h2 = (h2 + h1) & _MASK64
+    h1 = _fmix(h1)
+    h2 = _fmix(h2)
+    h1 = (h1 + h2) & _MASK64
+    return h1.to_bytes(8, "big")
+
+
+def _hamt_node(entries, depth: int, emit):
+    """
+    Build one HAMT shard level from (name, cid, tsize, hash) entries.
+
+    Returns:
+        tuple: (cid, cumulative size).
+    """
+    buckets = {}
+    for entry in entries:
+        buckets.setdefault(entry[3][depth], []).append(entry)
+
+    links, bitfield = [], 0
+    for index in sorted(buckets):
+        bitfield |= 1 << index
+        bucket = buckets[index]
+        prefix = f"{index:02X}"
+        if len(bucket) == 1:
+            name, cid, tsize, _ = bucket[0]
+            links.append((cid, prefix + name, tsize))
+        else:
+            cid, tsize = _hamt_node(bucket, depth + 1, emit)
+            links.append((cid, prefix, tsize))
+
+    bitfield_bytes = bitfield.to_bytes((bitfield.bit_length() + 7) // 8, "big")
+    block = _dag_pb(links, _unixfs(UNIXFS_HAMT_SHARD, data=bitfield_bytes, hash_type=HASH_MURMUR3_X64_64,
+                                   fanout=HAMT_FANOUT))
+    cid = _cid(CODEC_DAG_PB, block)
+    emit(cid, block)
+    return cid, len(block) + sum(link[2] for link in links)
+
+
+def _directory_node(links, emit, hamt_threshold: int):
+    """
+    Build a directory from (name, cid, tsize) links, sharded when large.
+
+    Returns:
+        tuple: (cid, cumulative size).
+    """
+    estimated_size = sum(len(name.encode()) + len(cid) for name, cid, _ in links)
+    if estimated_size >= hamt_threshold:
+        entries = [(name, cid, tsize, _murmur3_x64_64(name.encode())) for name, cid, tsize in links]
+        return _hamt_node(entries, 0, emit)
+
+    links = sorted(links, key=lambda link: link[0].encode())
+    block = _dag_pb([(cid, name, tsize) for name, cid, tsize in links], _unixfs(UNIXFS_DIRECTORY))
+    cid = _cid(CODEC_DAG_PB, block)
+    emit(cid, block)
+    return cid, len(block) + sum(link[2] for link in links)
+
+
+def compute_directory_dag(directory, hamt_threshold: int = HAMT_THRESHOLD, skip=None, known_files=None):
+    """
+    Compute the DAG of a directory tree without storing file blocks.
+
+    Args:
+        directory (str or Path): Root directory.
+        hamt_threshold (int): Estimated directory size that switches to a HAMT shard.
+        skip (callable): Optional predicate on a Path to leave out files
+            (e.g. temporary files).
+        known_files (dict): Relative path -> (size, CID string) of files
+            known to be unchanged, e.g. from a CID cache. Files of one
+            chunk are linked from these without being read.
+
+    Returns:
+        tuple: (root CID bytes, dict of directory block CID -> bytes,
+        dict of relative file path -> file CID bytes).
+    """
+    directory = Path(directory)
+    known_files = known_files or {}
+    directory_blocks, file_cids = {}, {}
+
+    def emit(cid, block):
+        directory_blocks[cid] = block
+
+    def walk(path: Path):
+        links = []
+        for child in path.iterdir():
+            if child.is_dir():
+                cid, tsize = walk(child)
+            elif child.is_file() and not (skip and skip(child)):
+                rel_path = child.relative_to(directory).as_posix()
+                known = known_files.get(rel_path)
+                if known is not None and known[0] <= CHUNK_SIZE:
+                    # A one-chunk file is its raw leaf: the CID and size are all the link needs
+                    cid, tsize = _cid_from_str(known[1]), known[0]
+                else:
+                    cid, tsize = _file_dag(child.read_bytes())
+                file_cids[rel_path] = cid
+            else:
+                continue
+            links.append((child.name, cid, tsize))
+        return _directory_node(links, emit, hamt_threshold)
+
+    root, _ = walk(directory)
+    return root, directory_blocks, file_cids
+
+
+def directory_cid(directory, hamt_threshold: int = HAMT_THRESHOLD) -> str:
+    """
+    CID of a directory as `ipfs add -r --cid-version 1 --raw-leaves` would report it.
+    """
+    return cid_to_str(compute_directory_dag(directory, hamt_threshold, skip=_is_temporary)[0])
+
+
+def _is_temporary(path: Path) -> bool:
+    return path.name.endswith(TMP_SUFFIX)
+
+
+def _car_header(root: bytes) -> bytes:
+    """
+    dag-cbor encoded {"roots": [root], "version": 1}.
+    """
+    cid = b"\x00" + root  # CBOR tag 42 payloads carry the identity multibase prefix
+    cbor = (
+        b"\xa2"
+        + b"\x65roots" + b"\x81" + b"\xd8\x2a" + b"\x58" + bytes([len(cid)]) + cid
+        + b"\x67version" + b"\x01"
+    )
+    return _varint(len(cbor)) + cbor
+
+
+def export_car(directory, car_path, hamt_threshold: int = HAMT_THRESHOLD, exclude=(), dag=None) -> dict:
+    """
+    Write a directory as a CAR v1 archive rooted at its directory CID.
+
+    Directory blocks come first, then each file's blocks; identical
+    blocks are written once.
+
+    Args:
+        directory (str or Path): Root directory.
+        car_path (str or Path): Output .car file (written atomically).
+        hamt_threshold (int): Estimated directory size that switches to a HAMT shard.
+        exclude (iterable): File CIDs (binary or string) already held by
+            the target node; their blocks are left out of the archive.
+        dag (tuple): compute_directory_dag result for the directory, if
+            the caller already has it.
+
+    Returns:
+        dict: root (CID string), blocks, bytes and skipped_files counts.
+    """
+    directory, car_path = Path(directory), Path(car_path)
+    root, directory_blocks, file_cids = dag or compute_directory_dag(directory, hamt_threshold, skip=_is_temporary)
+    exclude = {cid_to_str(cid) if isinstance(cid, bytes) else cid for cid in exclude}
+
+    written = set()
+    stats = {"root": cid_to_str(root), "blocks": 0, "bytes": 0, "skipped_files": 0}
+    car_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with atomic_path(car_path) as tmp_path, open(tmp_path, "wb") as f:
+        def emit(cid, block):
+            if cid in written:
+                return
+            written.add(cid)
+            f.write(_varint(len(cid) + len(block)) + cid + block)
+            stats["blocks"] += 1
+
+        f.write(_car_header(root))
+        for cid, block in directory_blocks.items():
+            emit(cid, block)
+        for rel_path, cid in file_cids.items():
+            if cid_to_str(cid) in exclude:
+                stats["skipped_files"] += 1
+                continue
+            _file_dag((directory / rel_path).read_bytes(), emit)
+        stats["bytes"] = f.tell()
+
+    return stats
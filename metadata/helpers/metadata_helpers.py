@@ -6,15 +6,58 @@ components and installations.
 
 Functions:
     - generate_component_token_id: Generate a token ID for a component using keccak256 hashing.
+    - generate_component_token_ids: Memoized keccak256 token IDs for whole manufacturer/model columns.
+    - component_token_id_cache_info: Hit/miss statistics of the shared component token ID memo.
     - generate_installation_token_id: Generate a Morton encoded token ID for an installation based on its centroid.
+    - generate_installation_token_ids: Vectorized Morton token IDs for arrays of centroids.
+    - decode_installation_token_ids: Recover [longitude, latitude] centroids from installation token IDs.
     - clean_row: Cleans data rows by handling NaN, datetime, and number conversions.
+    - clean_frame: Column-wise, dtype-driven equivalent of clean_row for a whole DataFrame.
     - test_metadata_serialization: Validates JSON serialization of metadata.
+    - serialize_metadata: Serialize a record once into the bytes used for the file and the database.
+    - write_atomic: Re-exported from helpers/file_helpers.py.
 
 """
 
 import json
+from datetime import datetime
+from functools import lru_cache
+from numbers import Number
+import numpy as np
+import pandas as pd
+from pandas import Timestamp, isna
+from pandas.api.types import infer_dtype
+from helpers.file_helpers import write_atomic  # noqa: F401 (re-exported)
 from helpers.geometry_helpers import transform_centroid
-from Crypto.Hash import keccak
+
+# Fixed-point scaling used to turn centroids into Morton token IDs
+MORTON_PRECISION = 1e6
+MORTON_LAT_SHIFT = 90
+MORTON_LON_SHIFT = 180
+MORTON_ROUND = 6
+
+# Bounded memo shared by every pipeline that hashes component keys in this process
+COMPONENT_TOKEN_CACHE_SIZE = 262144
+
+def normalize_component_key(component_type: str, manufacturer: str, model: str) -> str:
+    """
+    Build the normalized "type|manufacturer|model" string that component
+    token IDs are hashed from.
+    """
+    return f"{component_type.lower().replace(' ','')}|{manufacturer.lower().replace(' ','')}|{model.lower().replace(' ','')}"
+
+
+@lru_cache(maxsize=COMPONENT_TOKEN_CACHE_SIZE)
+def _hash_component_key(combined_string: str) -> str:
+    """
+    keccak256 of a normalized component key as a uint256 decimal string.
+    """
+    # pycryptodome is only needed by component pipelines
+    from Crypto.Hash import keccak
+
+    keccak_hash = keccak.new(digest_bits=256, data=combined_string.encode())
+    return str(int.from_bytes(keccak_hash.digest(), "big"))
+
 
 def generate_component_token_id(component_type: str, manufacturer: str, model: str) -> str:
     """
@@ -30,18 +73,61 @@ def generate_component_token_id(component_type: str, manufacturer: str, model: s
         str: A keccak256 hash converted to a uint256 as a string.
 
     """
-    # Normalize and concatenate
-    combined_string = f"{component_type.lower().replace(' ','')}|{manufacturer.lower().replace(' ','')}|{model.lower().replace(' ','')}"
-    
-    # Calculate the keccak256 hash
-    keccak_hash = keccak.new(digest_bits=256)
-    keccak_hash.update(combined_string.encode())
-    hash_result = keccak_hash.hexdigest()
-    
-    # Convert the hexadecimal hash to a uint256
-    uint256_hash = int(hash_result, 16)
-    
-    return str(uint256_hash)
+    return _hash_component_key(normalize_component_key(component_type, manufacturer, model))
+
+
+def generate_component_token_ids(component_type, manufacturers, models) -> list:
+    """
+    Generate component token IDs for whole columns at once.
+
+    Normalization runs column-wise and every key goes through the shared
+    LRU memo, so repeated (type, manufacturer, model) triples are hashed
+    only once per process. Missing values normalize to an empty string.
+
+    Args:
+        component_type (str or array-like): One type for all rows, or one per row.
+        manufacturers (array-like): Manufacturer names.
+        models (array-like): Model names.
+
+    Returns:
+        list: uint256 token IDs as strings, in input order.
+    """
+    manufacturers = _normalize_column(manufacturers)
+    models = _normalize_column(models)
+    if isinstance(component_type, str):
+        component_types = [component_type.lower().replace(' ', '')] * len(manufacturers)
+    else:
+        component_types = _normalize_column(component_type)
+
+    return [
+        _hash_component_key(f"{t}|{m}|{mo}")
+        for t, m, mo in zip(component_types, manufacturers, models)
+    ]
+
+
+def _normalize_column(values) -> list:
+    """
+    Lowercase and strip spaces from a column of names.
+    """
+    series = pd.Series(values, dtype=object).fillna("").astype(str)
+    return series.str.lower().str.replace(' ', '', regex=False).tolist()
+
+
+def component_token_id_cache_info():
+    """
+    Statistics of the shared component token ID memo.
+
+    Returns:
+        functools._CacheInfo: hits, misses, maxsize and currsize.
+    """
+    return _hash_component_key.cache_info()
+
+
+def clear_component_token_id_cache():
+    """
+    Empty the shared component token ID memo and reset its statistics.
+    """
+    _hash_component_key.cache_clear()
 
 
 def generate_installation_token_id(centroid) -> str:
@@ -58,16 +144,77 @@ def generate_installation_token_id(centroid) -> str:
     """
     centroid = transform_centroid(centroid)
 
-    precision = 1e6
-    lat_shift = 90
-    lon_shift = 180
-    ROUND = 6
-
-    lon_int = int(round(precision * (centroid[0] + lon_shift), ROUND))
-    lat_int = int(round(precision * (centroid[1] + lat_shift), ROUND))
+    lon_int = int(round(MORTON_PRECISION * (centroid[0] + MORTON_LON_SHIFT), MORTON_ROUND))
+    lat_int = int(round(MORTON_PRECISION * (centroid[1] + MORTON_LAT_SHIFT), MORTON_ROUND))
     return str(encode_morton(lat_int, lon_int))
 
 
+def generate_installation_token_ids(lons, lats) -> list:
+    """
+    Generate Morton encoded token IDs for many installation centroids
+    in a single vectorized pass.
+
+    The result is bit-identical to calling generate_installation_token_id
+    on each [longitude, latitude] pair.
+
+    Args:
+        lons (array-like): Centroid longitudes.
+        lats (array-like): Centroid latitudes.
+
+    Returns:
+        list: Morton encoded integers as strings, in input order.
+    """
+    lon_int = _scale_coordinates(lons, MORTON_LON_SHIFT)
+    lat_int = _scale_coordinates(lats, MORTON_LAT_SHIFT)
+    if lon_int.shape != lat_int.shape:
+        raise ValueError("Longitude and latitude arrays must have the same length.")
+    return encode_morton_array(lat_int, lon_int).astype(str).tolist()
+
+
+def decode_installation_token_ids(token_ids) -> np.ndarray:
+    """
+    Recover installation centroids from Morton encoded token IDs.
+
+    Args:
+        token_ids (array-like): Token IDs as strings, ints or uint64 values.
+
+    Returns:
+        np.ndarray: Array of shape (n, 2) holding [longitude, latitude]
+        at the 1e-6 precision used to build the token IDs.
+    """
+    if isinstance(token_ids, np.ndarray) and token_ids.dtype.kind in "iu":
+        codes = token_ids.astype(np.uint64)
+    else:
+        codes = np.fromiter((int(t) for t in token_ids), dtype=np.uint64)
+
+    lat_int, lon_int = decode_morton_array(codes)
+    lons = (lon_int.astype(np.int64) - int(MORTON_LON_SHIFT * MORTON_PRECISION)) / MORTON_PRECISION
+    lats = (lat_int.astype(np.int64) - int(MORTON_LAT_SHIFT * MORTON_PRECISION)) / MORTON_PRECISION
+    return np.column_stack([lons, lats])
+
+
+def _scale_coordinates(values, shift) -> np.ndarray:
+    """
+    Vectorized equivalent of int(round(MORTON_PRECISION * (v + shift), MORTON_ROUND)).
+
+    Truncation gives the same integer unless rounding to MORTON_ROUND
+    decimals carries into the integer part, so only values whose
+    fractional part is within 1e-6 of one are recomputed with the
+    scalar expression.
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    if not np.isfinite(values).all():
+        raise ValueError("Centroid coordinates must be finite numbers.")
+
+    scaled = MORTON_PRECISION * (values + shift)
+    result = np.trunc(scaled).astype(np.int64)
+
+    near_carry = np.flatnonzero(np.abs(scaled) % 1.0 >= 1.0 - 1e-6)
+    for i in near_carry:
+        result[i] = int(round(float(scaled[i]), MORTON_ROUND))
+    return result
+
+
 def interleave_bits(x, y):
     """
     Interleave the bits of two integers to form a Morton code.
@@ -99,6 +246,62 @@ def encode_morton(lat, lon):
     return interleave_bits(lat, lon)
 
 
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """
+    Spread the low 32 bits of each uint64 so that bit i lands on bit 2i.
+    """
+    x = values & np.uint64(0x00000000FFFFFFFF)
+    x = (x | (x << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x3333333333333333)
+    x = (x | (x << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return x
+
+
+def _compact_bits(values: np.ndarray) -> np.ndarray:
+    """
+    Inverse of _spread_bits: gather the even bits back into the low 32 bits.
+    """
+    x = values & np.uint64(0x5555555555555555)
+    x = (x | (x >> np.uint64(1))) & np.uint64(0x3333333333333333)
+    x = (x | (x >> np.uint64(2))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    x = (x | (x >> np.uint64(4))) & np.uint64(0x00FF00FF00FF00FF)
+    x = (x | (x >> np.uint64(8))) & np.uint64(0x0000FFFF0000FFFF)
+    x = (x | (x >> np.uint64(16))) & np.uint64(0x00000000FFFFFFFF)
+    return x
+
+
+def encode_morton_array(lat, lon) -> np.ndarray:
+    """
+    Vectorized encode_morton for arrays of integer latitudes and longitudes.
+
+    Args:
+        lat (array-like): Integer representations of latitude.
+        lon (array-like): Integer representations of longitude.
+
+    Returns:
+        np.ndarray: Morton encoded uint64 values.
+    """
+    lat = np.asarray(lat, dtype=np.int64).astype(np.uint64)
+    lon = np.asarray(lon, dtype=np.int64).astype(np.uint64)
+    return _spread_bits(lat) | (_spread_bits(lon) << np.uint64(1))
+
+
+def decode_morton_array(codes):
+    """
+    Split Morton codes back into their integer latitude and longitude.
+
+    Args:
+        codes (array-like): Morton encoded uint64 values.
+
+    Returns:
+        tuple: (lat, lon) uint64 arrays.
+    """
+    codes = np.asarray(codes, dtype=np.uint64)
+    return _compact_bits(codes), _compact_bits(codes >> np.uint64(1))
+
+
 def clean_row(row: dict) -> dict:
     """
     Cleans a data row by handling NaN, datetime, and numeric conversions.
@@ -113,10 +316,6 @@ def clean_row(row: dict) -> dict:
     Returns:
         dict: Cleaned data row.
     """
-    from pandas import Timestamp, isna
-    from datetime import datetime
-    from numbers import Number
-
     cleaned = {}
 
     for k, v in row.items():
@@ -135,6 +334,83 @@ def clean_row(row: dict) -> dict:
     return cleaned
 
 
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean a whole DataFrame column by column, using each column's dtype.
+
+    - Converts NaN, NaT, inf -> None
+    - Converts datetime columns and datetime values -> ISO8601 strings
+    - Leaves lists, dicts, and other data structures untouched
+
+    Every column of the result has object dtype holding plain Python
+    values, so rows can be taken with DataFrame.to_dict("records").
+
+    Args:
+        df (pd.DataFrame): Data to clean.
+
+    Returns:
+        pd.DataFrame: Cleaned copy of the data.
+    """
+    return pd.DataFrame(
+        {column: _clean_column(df.iloc[:, i]) for i, column in enumerate(df.columns)},
+        index=df.index,
+        columns=df.columns,
+    )
+
+
+def _clean_column(series: pd.Series) -> np.ndarray:
+    """
+    Clean one column into an object array of plain Python values.
+    """
+    kind = series.dtype.kind
+
+    if kind == "M":
+        return _isoformat_values(series)
+
+    if kind == "f":
+        values = series.to_numpy()
+        cleaned = values.astype(object)
+        cleaned[~np.isfinite(values)] = None
+        return cleaned
+
+    if kind in "iub":
+        return series.to_numpy().astype(object)
+
+    # Object (or other extension) columns can mix types; check element-wise
+    cleaned = series.to_numpy(dtype=object, na_value=None).copy()
+    inferred = infer_dtype(cleaned, skipna=True)
+    if inferred in ("string", "empty"):
+        cleaned[isna(cleaned)] = None
+        return cleaned
+
+    cleaned[isna(cleaned)] = None
+    cleaned[(cleaned == np.inf) | (cleaned == -np.inf)] = None
+    if inferred in ("datetime", "datetime64", "mixed", "mixed-integer"):
+        for i, value in enumerate(cleaned):
+            if isinstance(value, datetime):
+                cleaned[i] = value.isoformat()
+    return cleaned
+
+
+def _isoformat_values(series: pd.Series) -> np.ndarray:
+    """
+    ISO8601 strings for a datetime64 column, None for NaT.
+    """
+    missing = series.isna().to_numpy()
+    cleaned = np.full(len(series), None, dtype=object)
+
+    values = series.to_numpy()
+    whole_seconds = getattr(series.dtype, "tz", None) is None and (
+        (values[~missing].astype("datetime64[ns]").astype(np.int64) % 1_000_000_000 == 0).all()
+    )
+    if whole_seconds:
+        # Same text as Timestamp.isoformat() for naive, whole-second values
+        cleaned[~missing] = np.datetime_as_string(values[~missing], unit="s")
+    else:
+        cleaned[~missing] = [ts.isoformat() for ts in series[~missing]]
+    return cleaned
+
+
 def test_metadata_serialization(metadata: dict) -> bool:
     """
     Test JSON serialization of a metadata object.
@@ -151,3 +427,32 @@ def test_metadata_serialization(metadata: dict) -> bool:
     except (TypeError, ValueError) as e:
         print(f"❌ JSON serialization failed: {e}")
         return False
+
+
+def serialize_metadata(metadata: dict, compact: bool = False):
+    """
+    Serialize a metadata object once into its final UTF-8 bytes.
+
+    Geometry coordinates are embedded as a compact JSON string, as in the
+    published files. The returned bytes double as the serializability
+    check, the file payload and the database JSONB parameter.
+
+    Args:
+        metadata (dict): The metadata dictionary; geometry coordinates are
+            replaced in place by their compact string form.
+        compact (bool): Omit indentation and whitespace.
+
+    Returns:
+        bytes: Serialized metadata, or None if serialization fails.
+    """
+    try:
+        geometry = metadata.get("geometry")
+        if isinstance(geometry, dict) and "coordinates" in geometry and not isinstance(geometry["coordinates"], str):
+            geometry["coordinates"] = json.dumps(geometry["coordinates"], separators=(',', ':'))
+
+        if compact:
+            return json.dumps(metadata, separators=(',', ':')).encode()
+        return json.dumps(metadata, indent=2).encode()
+    except (TypeError, ValueError) as e:
+        print(f"❌ JSON serialization failed: {e}")
+        return None
@@ -0,0 +1,196 @@
+"""Morton Range Helpers
+
+Installation token IDs are Z-order (Morton) codes of the scaled centroid,
+so every aligned quadtree cell of the integer [lat, lon] grid maps to one
+contiguous block of token IDs. This module decomposes a longitude/latitude
+bounding box into a small, bounded set of such blocks so spatial lookups
+can run as primary key range scans.
+
+Functions:
+    - bbox_to_token_ranges: Cover a bounding box with at most max_ranges token ID ranges.
+    - token_ranges_to_sql: Render ranges as a `token_id BETWEEN a AND b` predicate.
+    - filter_token_ids_by_ranges: Range scan over a sorted array of token IDs.
+    - token_ids_in_bbox: Exact bounding box test on decoded token IDs.
+
+"""
+
+import numpy as np
+from helpers.metadata_helpers import (
+    MORTON_LAT_SHIFT,
+    MORTON_LON_SHIFT,
+    _scale_coordinates,
+    decode_morton_array,
+    encode_morton,
+)
+
+# Bits per axis; (180 + 180) * 1e6 < 2**29 so longitude fits, latitude needs one less
+MORTON_BITS = 29
+MAX_AXIS_VALUE = (1 << MORTON_BITS) - 1
+
+
+def _bbox_to_grid(min_lon, min_lat, max_lon, max_lat):
+    """
+    Scale a bounding box onto the integer grid used by the token IDs.
+    """
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError(f"Invalid bounding box: {(min_lon, min_lat, max_lon, max_lat)}")
+
+    lon_lo, lon_hi = _scale_coordinates([min_lon, max_lon], MORTON_LON_SHIFT).tolist()
+    lat_lo, lat_hi = _scale_coordinates([min_lat, max_lat], MORTON_LAT_SHIFT).tolist()
+    clamp = lambda v: min(max(v, 0), MAX_AXIS_VALUE)
+    return clamp(lat_lo), clamp(lat_hi), clamp(lon_lo), clamp(lon_hi)
+
+
+def bbox_to_token_ranges(min_lon, min_lat, max_lon, max_lat, max_ranges: int = 64) -> list:
+    """
+    Cover a bounding box with contiguous token ID ranges.
+
+    The box is decomposed top-down into aligned quadtree cells. Cells fully
+    inside the box are emitted as exact ranges; once the cell budget is
+    spent the remaining partially covered cells are emitted whole. Adjacent
+    ranges are then merged, and the closest ranges are joined until at most
+    max_ranges remain. The cover is therefore a superset of the box: use
+    token_ids_in_bbox to drop the false positives.
+
+    Args:
+        min_lon (float): Western edge of the box.
+        min_lat (float): Southern edge of the box.
+        max_lon (float): Eastern edge of the box.
+        max_lat (float): Northern edge of the box.
+        max_ranges (int): Upper bound on the number of ranges returned.
+
+    Returns:
+        list: Sorted, non-overlapping (first, last) token ID tuples, inclusive.
+    """
+    if max_ranges < 1:
+        raise ValueError("max_ranges must be at least 1.")
+
+    lat_lo, lat_hi, lon_lo, lon_hi = _bbox_to_grid(min_lon, min_lat, max_lon, max_lat)
+    cell_budget = 4 * max_ranges
+
+    ranges = []
+    frontier = [(0, 0, MORTON_BITS)]  # (lat prefix, lon prefix, bits below the prefix)
+    while frontier:
+        partial = []
+        for lat_p, lon_p, shift in frontier:
+            cell_lat_lo, cell_lat_hi = lat_p << shift, ((lat_p + 1) << shift) - 1
+            cell_lon_lo, cell_lon_hi = lon_p << shift, ((lon_p + 1) << shift) - 1
+
+            # Skip cells that do not touch the box
+            if cell_lat_lo > lat_hi or cell_lat_hi < lat_lo or cell_lon_lo > lon_hi or cell_lon_hi < lon_lo:
+                continue
+
+            inside = (lat_lo <= cell_lat_lo and cell_lat_hi <= lat_hi
+                      and lon_lo <= cell_lon_lo and cell_lon_hi <= lon_hi)
+            if inside or shift == 0:
+                ranges.append(_cell_range(lat_p, lon_p, shift))
+            else:
+                partial.append((lat_p, lon_p, shift))
+
+        # Out of budget: emit the partially covered cells whole
+        if len(ranges) + 4 * len(partial) > cell_budget:
+            ranges.extend(_cell_range(*cell) for cell in partial)
+            break
+
+        frontier = [
+            (2 * lat_p + a, 2 * lon_p + b, shift - 1)
+            for lat_p, lon_p, shift in partial
+            for b in (0, 1)
+            for a in (0, 1)
+        ]
+
+    return _merge_ranges(ranges, max_ranges)
+
+
+def _cell_range(lat_prefix, lon_prefix, shift):
+    """
+    Token ID range covered by an aligned quadtree cell.
+    """
+    first = encode_morton(lat_prefix, lon_prefix) << (2 * shift)
+    return first, first + (1 << (2 * shift)) - 1
+
+
+def _merge_ranges(ranges, max_ranges):
+    """
+    Sort and join touching ranges, then close the smallest gaps until
+    at most max_ranges remain.
+    """
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+
+    excess = len(merged) - max_ranges
+    if excess > 0:
+        gaps = [merged[i + 1][0] - merged[i][1] for i in range(len(merged) - 1)]
+        closed = set(np.argsort(gaps, kind="stable")[:excess].tolist())
+        joined = [merged[0]]
+        for i in range(1, len(merged)):
+            if i - 1 in closed:
+                joined[-1][1] = merged[i][1]
+            else:
+                joined.append(merged[i])
+        merged = joined
+
+    return [(first, last) for first, last in merged]
+
+
+def token_ranges_to_sql(ranges, column: str = "token_id"):
+    """
+    Render token ID ranges as a SQL predicate with bound parameters.
+
+    Args:
+        ranges (list): (first, last) tuples from bbox_to_token_ranges.
+        column (str): Column holding the token ID.
+
+    Returns:
+        tuple: (predicate string, parameter dict) for sqlalchemy.text.
+    """
+    if not ranges:
+        return "FALSE", {}
+
+    clauses, params = [], {}
+    for i, (first, last) in enumerate(ranges):
+        clauses.append(f"{column} BETWEEN :lo_{i} AND :hi_{i}")
+        params[f"lo_{i}"] = first
+        params[f"hi_{i}"] = last
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def filter_token_ids_by_ranges(sorted_token_ids: np.ndarray, ranges) -> np.ndarray:
+    """
+    Range scan over a sorted array of installation token IDs.
+
+    Args:
+        sorted_token_ids (np.ndarray): Ascending uint64 token IDs.
+        ranges (list): (first, last) tuples from bbox_to_token_ranges.
+
+    Returns:
+        np.ndarray: Positions in sorted_token_ids that fall inside any range.
+    """
+    if not ranges:
+        return np.empty(0, dtype=np.intp)
+
+    bounds = np.asarray(ranges, dtype=np.uint64)
+    starts = np.searchsorted(sorted_token_ids, bounds[:, 0], side="left")
+    stops = np.searchsorted(sorted_token_ids, bounds[:, 1], side="right")
+    return np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)])
+
+
+def token_ids_in_bbox(token_ids, min_lon, min_lat, max_lon, max_lat) -> np.ndarray:
+    """
+    Exact bounding box test for token IDs, on the same integer grid.
+
+    Args:
+        token_ids (array-like): uint64 token IDs.
+        min_lon, min_lat, max_lon, max_lat (float): Bounding box.
+
+    Returns:
+        np.ndarray: Boolean mask of token IDs whose centroid lies in the box.
+    """
+    lat_lo, lat_hi, lon_lo, lon_hi = _bbox_to_grid(min_lon, min_lat, max_lon, max_lat)
+    lat, lon = decode_morton_array(token_ids)
+    lat, lon = lat.astype(np.int64), lon.astype(np.int64)
+    return (lat >= lat_lo) & (lat <= lat_hi) & (lon >= lon_lo) & (lon <= lon_hi)
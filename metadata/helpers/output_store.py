@@ -0,0 +1,342 @@
+"""Output Store
+
+Backends for the generated metadata files of one asset, all behind the
+same small set of functions:
+
+    flat     <dir>/<token_id>.json, the layout published as
+             ipfs://{cid}/{id}.json
+    sharded  <dir>/<h1>/<h2>/<token_id>.json, subdirectories keyed by a
+             short hash of the token ID (the leading digits of a Morton
+             code are shared by a whole region, so they would put every
+             installation of a region in the same shard)
+    pack     <dir>/records.pack holding every document back to back and
+             <dir>/records.idx, an append-only (token_id, offset, length)
+             index; the newest entry for a token wins
+
+Writes are buffered and flushed in batches: one append per batch for
+the pack, and for the file layouts one pass that creates the shard
+directories once and writes each file through a temporary name. The
+pack is read by token ID through mmap and can be exported back to the
+flat layout for publishing. A full run rewrites the pack rather than
+appending to it, and compact_pack drops superseded entries and removed
+tokens after incremental runs.
+
+Functions:
+    - open_output_store: Open a store for writing.
+    - write_record: Buffer one serialized document.
+    - record_exists: Whether a token ID is already stored.
+    - flush_output_store: Write out the buffered documents.
+    - close_output_store: Flush and release the store.
+    - detect_layout: Layout of an existing output directory.
+    - open_pack: Memory-map a pack for random access.
+    - read_pack_record: One document from an open pack.
+    - read_record: One document from any layout.
+    - iter_records: All (token_id, payload) pairs of any layout.
+    - compact_pack: Rewrite a pack with only the live entries.
+    - export_flat: Re-create the flat layout from any layout.
+"""
+
+import hashlib
+import mmap
+import os
+from pathlib import Path
+from helpers.file_helpers import TMP_SUFFIX, atomic_path, write_atomic
+
+OUTPUT_LAYOUTS = ("flat", "sharded", "pack")
+
+PACK_FILE = "records.pack"
+INDEX_FILE = "records.idx"
+
+# Decimal token IDs up to 2**256 fit in 78 characters. numpy is imported
+# by the pack functions only, so the file layouts start without it.
+INDEX_FIELDS = [("token_id", "S78"), ("offset", "<u8"), ("length", "<u4")]
+
+
+def _index_dtype():
+    import numpy as np
+    return np.dtype(INDEX_FIELDS)
+
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+
+def _shard_path(directory: Path, token_id: str) -> Path:
+    digest = hashlib.sha256(token_id.encode()).hexdigest()
+    parts = [digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+    return directory.joinpath(*parts, f"{token_id}.json")
+
+
+def _record_path(store: dict, token_id: str) -> Path:
+    if store["layout"] == "sharded":
+        return _shard_path(store["directory"], token_id)
+    return store["directory"] / f"{token_id}.json"
+
+
+def open_output_store(directory, layout: str = "flat", batch_size: int = 512, rewrite: bool = False) -> dict:
+    """
+    Open an output directory for writing.
+
+    Args:
+        directory (str or Path): Asset output directory, e.g. ./ipfs/installations/solar_array/
+        layout (str): "flat", "sharded" or "pack".
+        batch_size (int): Documents buffered before a flush.
+        rewrite (bool): Start a pack empty instead of appending to it, for
+            runs that write every record. The new pack replaces the old
+            one when the store is closed.
+
+    Returns:
+        dict: Store state for write_record / close_output_store.
+
+    Raises:
+        ValueError: If the layout is unknown.
+    """
+    if layout not in OUTPUT_LAYOUTS:
+        raise ValueError(f"Unknown output layout '{layout}', expected one of {OUTPUT_LAYOUTS}.")
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    store = {"directory": directory, "layout": layout, "batch_size": max(1, batch_size), "buffer": [], "made_dirs": set()}
+
+    if layout == "pack" and rewrite:
+        store["known"] = set()
+        store["rewrite"] = True
+        store["pack_file"] = open(directory / (PACK_FILE + TMP_SUFFIX), "wb")
+        store["index_file"] = open(directory / (INDEX_FILE + TMP_SUFFIX), "wb")
+    elif layout == "pack":
+        index = _read_index(directory)
+        store["known"] = set(index["token_id"].tolist())
+        store["pack_file"] = open(directory / PACK_FILE, "ab")
+        store["index_file"] = open(directory / INDEX_FILE, "ab")
+    return store
+
+
+def write_record(store: dict, token_id, payload: bytes):
+    """
+    Buffer one serialized document, flushing when the batch is full.
+    """
+    store["buffer"].append((str(token_id), payload))
+    if len(store["buffer"]) >= store["batch_size"]:
+        flush_output_store(store)
+
+
+def record_exists(store: dict, token_id) -> bool:
+    """
+    Whether a document for the token ID has been written.
+    """
+    token_id = str(token_id)
+    if store["layout"] == "pack":
+        return token_id.encode() in store["known"] or any(t == token_id for t, _ in store["buffer"])
+    return _record_path(store, token_id).exists() or any(t == token_id for t, _ in store["buffer"])
+
+
+def flush_output_store(store: dict):
+    """
+    Write out the buffered documents.
+    """
+    batch, store["buffer"] = store["buffer"], []
+    if not batch:
+        return
+
+    if store["layout"] == "pack":
+        import numpy as np
+        pack_file, index_file = store["pack_file"], store["index_file"]
+        offset = pack_file.seek(0, os.SEEK_END)
+        entries = np.zeros(len(batch), dtype=_index_dtype())
+        for i, (token_id, payload) in enumerate(batch):
+            entries[i] = (token_id.encode(), offset, len(payload))
+            offset += len(payload)
+
+        # Data before index, so an index entry never points past the pack
+        pack_file.write(b"".join(payload for _, payload in batch))
+        pack_file.flush()
+        index_file.write(entries.tobytes())
+        index_file.flush()
+        store["known"].update(entries["token_id"].tolist())
+        return
+
+    for token_id, payload in batch:
+        path = _record_path(store, token_id)
+        if path.parent not in store["made_dirs"]:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            store["made_dirs"].add(path.parent)
+        write_atomic(path, payload)
+
+
+def close_output_store(store: dict):
+    """
+    Flush the buffer and close any open files.
+    """
+    flush_output_store(store)
+    if store["layout"] == "pack":
+        store["pack_file"].close()
+        store["index_file"].close()
+        if store.get("rewrite"):
+            # Data before index, as in flush_output_store
+            os.replace(store["pack_file"].name, store["directory"] / PACK_FILE)
+            os.replace(store["index_file"].name, store["directory"] / INDEX_FILE)
+
+
+def detect_layout(directory) -> str:
+    """
+    Layout of an existing output directory.
+    """
+    directory = Path(directory)
+    if (directory / INDEX_FILE).exists():
+        return "pack"
+    if any(child.is_dir() for child in directory.iterdir()):
+        return "sharded"
+    return "flat"
+
+
+def _read_index(directory: Path):
+    """
+    Index entries, newest per token ID, sorted by token ID.
+    """
+    import numpy as np
+    dtype = _index_dtype()
+    path = directory / INDEX_FILE
+    if not path.exists() or path.stat().st_size == 0:
+        return np.zeros(0, dtype=dtype)
+
+    # Ignore a partially written trailing entry
+    count = path.stat().st_size // dtype.itemsize
+    entries = np.fromfile(path, dtype=dtype, count=count)
+
+    # Stable sort keeps append order within a token; take the last one
+    order = np.argsort(entries["token_id"], kind="stable")
+    entries = entries[order]
+    last = np.append(entries["token_id"][1:] != entries["token_id"][:-1], True)
+    return entries[last]
+
+
+def open_pack(directory) -> dict:
+    """
+    Memory-map a pack for random access by token ID.
+
+    Returns:
+        dict: Pack state for read_pack_record.
+    """
+    directory = Path(directory)
+    index = _read_index(directory)
+    with open(directory / PACK_FILE, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+    return {"index": index, "data": data}
+
+
+def read_pack_record(pack: dict, token_id):
+    """
+    One document from an open pack.
+
+    Returns:
+        bytes: Serialized document, or None if the token is not stored.
+    """
+    import numpy as np
+    key = str(token_id).encode()
+    keys = pack["index"]["token_id"]
+    position = np.searchsorted(keys, key)
+    if position >= len(keys) or keys[position] != key:
+        return None
+    entry = pack["index"][position]
+    return bytes(pack["data"][int(entry["offset"]):int(entry["offset"]) + int(entry["length"])])
+
+
+def read_record(directory, token_id):
+    """
+    One document from an output directory of any layout.
+
+    Returns:
+        bytes: Serialized document, or None if the token is not stored.
+    """
+    directory = Path(directory)
+    layout = detect_layout(directory)
+    if layout == "pack":
+        return read_pack_record(open_pack(directory), token_id)
+
+    path = _shard_path(directory, str(token_id)) if layout == "sharded" else directory / f"{token_id}.json"
+    return path.read_bytes() if path.exists() else None
+
+
+def iter_records(directory):
+    """
+    Yield (token_id, payload) for every document of an output directory.
+    """
+    directory = Path(directory)
+    if detect_layout(directory) == "pack":
+        pack = open_pack(directory)
+        data = pack["data"]
+        for token_id, offset, length in pack["index"].tolist():
+            yield token_id.decode(), bytes(data[offset:offset + length])
+        return
+
+    for path in sorted(directory.rglob("*.json")):
+        yield path.stem, path.read_bytes()
+
+
+def compact_pack(directory, keep=None, max_garbage: float = 0.5) -> bool:
+    """
+    Rewrite a pack with only the newest entry of each token, dropping
+    tokens not in keep. Appending changed documents leaves their old
+    bytes behind, so the rewrite is skipped while no token is dropped and
+    superseded bytes stay below max_garbage of the pack.
+
+    Args:
+        directory (str or Path): Pack output directory.
+        keep (iterable): Token IDs still produced by the source; None keeps all.
+        max_garbage (float): Fraction of superseded bytes that triggers a rewrite.
+
+    Returns:
+        bool: Whether the pack was rewritten.
+    """
+    import numpy as np
+    directory = Path(directory)
+    index = _read_index(directory)
+    live = index
+    if keep is not None:
+        keep = np.array([str(token_id).encode() for token_id in keep], dtype=index.dtype["token_id"])
+        live = index[np.isin(index["token_id"], keep)]
+
+    size = (directory / PACK_FILE).stat().st_size
+    garbage = size - int(live["length"].sum())
+    if len(live) == len(index) and garbage < max_garbage * size:
+        return False
+
+    pack = open_pack(directory)
+    entries = live.copy()
+    entries["offset"] = np.concatenate(([0], np.cumsum(live["length"], dtype="<u8")[:-1])) if len(live) else []
+    with atomic_path(directory / INDEX_FILE) as index_tmp, atomic_path(directory / PACK_FILE) as pack_tmp:
+        with open(pack_tmp, "wb") as f:
+            for offset, length in zip(live["offset"].tolist(), live["length"].tolist()):
+                f.write(pack["data"][offset:offset + length])
+        entries.tofile(index_tmp)
+    if isinstance(pack["data"], mmap.mmap):
+        pack["data"].close()
+    print(f"🗜️ Compacted {directory / PACK_FILE}: {size} → {int(live['length'].sum())} bytes, "
+          f"{len(index) - len(live)} removed tokens dropped.")
+    return True
+
+
+def export_flat(directory, target, batch_size: int = 512) -> int:
+    """
+    Re-create the flat <token_id>.json layout from any layout. Flat files
+    in the target for tokens no longer in the directory are removed, so
+    the target can be published as is.
+
+    Args:
+        directory (str or Path): Sharded, packed or flat output directory.
+        target (str or Path): Directory to write the flat files to.
+        batch_size (int): Documents per write batch.
+
+    Returns:
+        int: Number of documents exported.
+    """
+    store = open_output_store(target, "flat", batch_size)
+    exported = set()
+    for token_id, payload in iter_records(directory):
+        write_record(store, token_id, payload)
+        exported.add(token_id)
+    close_output_store(store)
+
+    for path in Path(target).glob("*.json"):
+        if path.stem not in exported:
+            path.unlink()
+    return len(exported)
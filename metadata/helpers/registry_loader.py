@@ -1,6 +1,11 @@
+from functools import lru_cache
 import yaml
 
+@lru_cache(maxsize=None)
 def load_registry(asset_type):
+    """
+    Parse a registry file once per process; treat the result as read-only.
+    """
     with open(f"config/{asset_type}_registry.yaml", "r") as f:
         return yaml.safe_load(f)
 
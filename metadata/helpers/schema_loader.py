@@ -1,10 +1,22 @@
 import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from jsonschema import validate, ValidationError, SchemaError
+from jsonschema import ValidationError, SchemaError
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
 
+# Last schema dict seen by validate_metadata and its validator, so the
+# per-record call skips serializing the schema when it is the same object
+_last_schema = (None, None)
+
+
+@lru_cache(maxsize=None)
 def load_schema(asset_type: str) -> dict:
     """
     Load the appropriate JSON schema for components or installations.
+
+    The file is read once per process; treat the returned dict as read-only.
     """
     schema_path = Path(f"./schemas/{asset_type}_schema.json")
     if not schema_path.exists():
@@ -13,17 +25,131 @@ def load_schema(asset_type: str) -> dict:
     with open(schema_path, "r") as f:
         return json.load(f)
 
-def validate_metadata(metadata: dict, schema: dict, token_id: int) -> bool:
+
+def _compile_validator(schema: dict):
+    """
+    Check a schema once and build a reusable validator for it.
+    """
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+@lru_cache(maxsize=None)
+def get_validator(asset_type: str):
+    """
+    Return the compiled validator for an asset type, built once per process.
+    """
+    return _compile_validator(load_schema(asset_type))
+
+
+@lru_cache(maxsize=32)
+def _validator_for_json(schema_json: str):
+    """
+    Compiled validator for a schema, keyed by its canonical JSON text.
+    """
+    return _compile_validator(json.loads(schema_json))
+
+
+def _validator_for_schema(schema: dict):
+    """
+    Return a cached validator for a schema dict, compiling it on first use.
+    Equal schemas share one validator, however the dict was built.
+    """
+    global _last_schema
+    last, validator = _last_schema
+    if last is not schema:
+        validator = _validator_for_json(json.dumps(schema, sort_keys=True))
+        _last_schema = (schema, validator)
+    return validator
+
+
+def validate_metadata(metadata: dict, schema: dict, token_id: int, reasons: dict = None) -> bool:
     """
     Validate metadata against its schema.
+
+    If a reasons dict is given, failures are counted in it by
+    "<path>: <validator>", e.g. "description: type".
     """
     try:
-        validate(instance=metadata, schema=schema)
+        validator = _validator_for_schema(schema)
+        error = best_match(validator.iter_errors(metadata))
+        if error is not None:
+            raise error
         return True
     except ValidationError as e:
         print(f"❌ Validation error for tokenId {token_id}: {e.message}")
+        if reasons is not None:
+            reason = f"{describe_error(e)['path'] or '<root>'}: {e.validator}"
+            reasons[reason] = reasons.get(reason, 0) + 1
         return False
     except SchemaError as e:
         print(f"❌ Schema error: {e.message}")
         return False
-    
\ No newline at end of file
+
+
+def describe_error(error: ValidationError) -> dict:
+    """
+    Structured form of a validation error.
+    """
+    return {
+        "message": error.message,
+        "path": "/".join(str(p) for p in error.absolute_path),
+        "validator": error.validator,
+        "schema_path": "/".join(str(p) for p in error.absolute_schema_path),
+    }
+
+
+def collect_errors(metadata: dict, validator, fail_fast: bool = False) -> list:
+    """
+    Validate one record and return its structured errors.
+
+    With fail_fast, validation stops at the first error found.
+    """
+    errors = validator.iter_errors(metadata)
+    if fail_fast:
+        first = next(errors, None)
+        return [] if first is None else [describe_error(first)]
+    return [describe_error(e) for e in sorted(errors, key=lambda e: list(e.absolute_path))]
+
+
+def _validate_chunk(asset_type: str, records: list, fail_fast: bool) -> list:
+    """
+    Validate a chunk of records with the per-process cached validator.
+    """
+    validator = get_validator(asset_type)
+    return [collect_errors(metadata, validator, fail_fast) for metadata in records]
+
+
+def validate_many(records, asset_type: str, workers: int = 1, chunk_size: int = 1000, fail_fast: bool = False) -> dict:
+    """
+    Validate a batch of metadata records against the asset type's schema.
+
+    Args:
+        records (iterable): Metadata dictionaries.
+        asset_type (str): "component" or "installation".
+        workers (int): Worker processes; 1 validates in this process.
+        chunk_size (int): Records sent to a worker at a time.
+        fail_fast (bool): Stop validating a record at its first error.
+
+    Returns:
+        dict: Record position in records -> list of error dicts (message,
+        path, validator, schema_path) for every record that failed, so
+        records sharing a tokenId are reported separately. Valid records
+        are omitted.
+    """
+    records = list(records)
+    chunks = [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_validate_chunk, [asset_type] * len(chunks), chunks, [fail_fast] * len(chunks))
+            chunk_errors = list(results)
+    else:
+        chunk_errors = [_validate_chunk(asset_type, chunk, fail_fast) for chunk in chunks]
+
+    failures = {}
+    for position, record_errors in enumerate(errors for chunk in chunk_errors for errors in chunk):
+        if record_errors:
+            failures[position] = record_errors
+    return failures
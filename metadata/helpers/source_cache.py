@@ -0,0 +1,167 @@
+"""Source Cache
+
+On-disk cache for remote registry sources, keyed by source URL. Each
+cached source keeps the raw download next to its HTTP validators, so a
+refresh is a conditional request (If-None-Match / If-Modified-Since)
+that usually ends in a 304. Parsed DataFrames are stored as snapshots
+beside the raw file, keyed by the raw content hash and the parse
+options, so an unchanged workbook is never parsed twice. Snapshots of
+earlier downloads are deleted once the current content has one.
+
+Snapshots are written as Parquet (pyarrow is in requirements.txt) when
+the frame survives the round trip unchanged, e.g. not for object columns
+mixing numbers and text; those fall back to pickle.
+
+Environment Variables:
+    SOURCE_CACHE_DIR: Cache directory (default ./cache/sources)
+    SOURCE_CACHE_OFFLINE: Use cached copies without contacting the source (default false)
+
+Functions:
+    - fetch_source: Download or revalidate a source and return its cached raw file.
+    - read_cached_frame: Parse a source through the snapshot cache.
+"""
+
+import hashlib
+import json
+import os
+import datetime
+from pathlib import Path
+import pandas as pd
+from helpers.file_helpers import atomic_path, write_atomic
+
+DEFAULT_CACHE_DIR = "./cache/sources"
+
+
+def _cache_dir(cache_dir=None) -> Path:
+    return Path(cache_dir or os.getenv("SOURCE_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+
+def _offline(offline=None) -> bool:
+    if offline is not None:
+        return offline
+    return os.getenv("SOURCE_CACHE_OFFLINE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _entry_dir(url: str, cache_dir=None) -> Path:
+    return _cache_dir(cache_dir) / hashlib.sha256(url.encode()).hexdigest()[:32]
+
+
+def fetch_source(url: str, offline: bool = None, cache_dir: str = None, timeout: int = 120):
+    """
+    Return the cached raw copy of a source, downloading or revalidating it first.
+
+    Args:
+        url (str): Source URL; also the cache key.
+        offline (bool): Skip the network and use the cached copy. Defaults
+            to the SOURCE_CACHE_OFFLINE environment variable.
+        cache_dir (str): Cache directory. Defaults to SOURCE_CACHE_DIR.
+        timeout (int): Request timeout in seconds.
+
+    Returns:
+        tuple: (Path of the raw file, cache entry dict with url, etag,
+        last_modified, sha256 and fetched_at).
+
+    Raises:
+        FileNotFoundError: If offline and the source was never cached.
+        requests.HTTPError: If the download fails and nothing is cached.
+    """
+    # Imported here so reading local registries never loads requests
+    import requests
+
+    entry_dir = _entry_dir(url, cache_dir)
+    raw_path = entry_dir / "raw"
+    meta_path = entry_dir / "meta.json"
+    meta = json.loads(meta_path.read_text()) if meta_path.exists() and raw_path.exists() else None
+
+    if _offline(offline):
+        if meta is None:
+            raise FileNotFoundError(f"❌ No cached copy of {url} for offline mode.")
+        return raw_path, meta
+
+    headers = {}
+    if meta and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and meta is not None:
+            return raw_path, meta
+        response.raise_for_status()
+    except requests.RequestException as e:
+        if meta is None:
+            raise
+        print(f"⚠️ Could not revalidate {url} ({e}); using cached copy from {meta['fetched_at']}.")
+        return raw_path, meta
+
+    entry_dir.mkdir(parents=True, exist_ok=True)
+    write_atomic(raw_path, response.content)
+    meta = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": hashlib.sha256(response.content).hexdigest(),
+        "fetched_at": datetime.datetime.utcnow().isoformat(),
+    }
+    write_atomic(meta_path, json.dumps(meta, indent=2))
+    return raw_path, meta
+
+
+def read_cached_frame(url: str, parse, parse_key: str = "", offline: bool = None, cache_dir: str = None) -> pd.DataFrame:
+    """
+    Parse a source into a DataFrame, reusing the snapshot for unchanged content.
+
+    Args:
+        url (str): Source URL.
+        parse (callable): Turns the raw file path into a DataFrame.
+        parse_key (str): Identifies the parse options (e.g. skiprows), so
+            different parses of the same file get separate snapshots.
+        offline (bool): Skip the network and use the cached copy.
+        cache_dir (str): Cache directory. Defaults to SOURCE_CACHE_DIR.
+
+    Returns:
+        pd.DataFrame: Parsed source.
+    """
+    raw_path, meta = fetch_source(url, offline=offline, cache_dir=cache_dir)
+    snapshot_name = f"{meta['sha256'][:16]}-{hashlib.sha256(parse_key.encode()).hexdigest()[:8]}"
+    parquet_path = raw_path.with_name(snapshot_name + ".parquet")
+    pickle_path = raw_path.with_name(snapshot_name + ".pkl")
+
+    if parquet_path.exists():
+        return pd.read_parquet(parquet_path)
+    if pickle_path.exists():
+        return pd.read_pickle(pickle_path)
+
+    df = parse(raw_path)
+    _write_snapshot(df, parquet_path, pickle_path)
+    _prune_snapshots(raw_path.parent, meta["sha256"][:16])
+    return df
+
+
+def _prune_snapshots(entry_dir: Path, content_prefix: str):
+    """
+    Delete snapshots parsed from earlier downloads of the source. Snapshots
+    of the current content are kept for every parse key.
+    """
+    for path in entry_dir.iterdir():
+        if path.suffix in (".parquet", ".pkl") and not path.name.startswith(content_prefix + "-"):
+            path.unlink(missing_ok=True)
+
+
+def _write_snapshot(df: pd.DataFrame, parquet_path: Path, pickle_path: Path):
+    """
+    Store a parsed frame as Parquet when that round-trips exactly, else as pickle.
+    """
+    try:
+        import pyarrow  # noqa: F401
+
+        with atomic_path(parquet_path) as tmp_path:
+            df.to_parquet(tmp_path)
+            pd.testing.assert_frame_equal(pd.read_parquet(tmp_path), df)
+        return
+    except Exception:
+        pass  # pyarrow missing, mixed-type object columns, or a lossy round trip
+
+    with atomic_path(pickle_path) as tmp_path:
+        df.to_pickle(tmp_path)
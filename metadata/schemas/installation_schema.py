@@ -11,7 +11,11 @@ installation_schema = {
     "tokenId": { "type": "string" },
     "geometry": {
       "type": "object",
-      "required": ["type", "coordinates"],
+      "required": ["type"],
+      "anyOf": [
+        { "required": ["coordinates"] },
+        { "required": ["packed_multipolygon_deltas"] }
+      ],
       "properties": {
         "type": { "type": "string" },
         "coordinates": { "type": "array" },
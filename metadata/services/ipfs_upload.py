@@ -1,5 +1,59 @@
+"""IPFS Upload
+
+Publishing of generated metadata directories to IPFS.
+
+publish_directory talks to the IPFS HTTP API (IPFS_HOST / IPFS_PORT)
+and only adds files whose content changed since the last publish. Child
+CIDs are remembered in a local SQLite cache, and the directory itself is
+assembled in MFS from those CIDs (files/cp), so the directory CID is
+rebuilt without re-adding or re-hashing unchanged files. The MFS copy is
+kept between runs and patched in place; if it is missing or no longer
+matches the last published CID, it is rebuilt from the cached child CIDs.
+Files are added unpinned, so the published root is then pinned
+recursively (moving the previous publish's pin), which keeps the content
+safe from garbage collection whatever happens to the MFS copy.
+
+Files are added as CIDv1 with raw leaves, so their CIDs match the ones
+computed offline (helpers/ipfs_cid.py).
+
+publish_car is the bulk alternative: the directory DAG is computed
+locally, skipped entirely if its root is already pinned, and otherwise
+sent as one CAR archive to dag/import, leaving out the blocks of files
+that are still under the recursive pin of an earlier publish.
+
+Environment Variables:
+    IPFS_HOST: IPFS API host (default http://127.0.0.1)
+    IPFS_PORT: IPFS API port (default 5001)
+    IPFS_CID_CACHE_PATH: SQLite CID cache (default ./cache/ipfs_cids.sqlite)
+
+Functions:
+    - upload_directory_to_ipfs: Re-add the whole tree with the IPFS CLI inside Docker.
+    - publish_directory: Incrementally publish a directory through the HTTP API.
+    - ipfs_api_url: Base URL of the IPFS HTTP API.
+    - open_cid_cache: Open (and create if needed) the CID cache.
+    - is_pinned: Whether a CID is pinned recursively on the node.
+    - import_car: Import a CAR archive with dag/import.
+    - publish_car: Publish a directory as one CAR import.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import requests
+from helpers.file_helpers import TMP_SUFFIX
+from helpers.ipfs_cid import cid_to_str, compute_directory_dag, export_car
+
+DEFAULT_CID_CACHE_PATH = "./cache/ipfs_cids.sqlite"
+ADD_PARAMS = {"cid-version": 1, "raw-leaves": "true", "pin": "false", "quieter": "true"}
+
+_SESSIONS = threading.local()
+
 
 def upload_directory_to_ipfs(directory_path: str) -> str:
     """
@@ -27,17 +81,381 @@ def upload_directory_to_ipfs(directory_path: str) -> str:
         print(f"❌ Docker IPFS upload failed:\n{e.stderr}")
         raise
 
+
+def ipfs_api_url() -> str:
+    """
+    Base URL of the IPFS HTTP API from IPFS_HOST and IPFS_PORT.
+    """
+    host = os.getenv("IPFS_HOST", "http://127.0.0.1").rstrip("/")
+    if "://" not in host:
+        host = f"http://{host}"
+    return f"{host}:{os.getenv('IPFS_PORT', '5001')}/api/v0"
+
+
+def open_cid_cache(path: str = None) -> sqlite3.Connection:
+    """
+    Open the CID cache, creating the file and tables if needed.
+
+    Args:
+        path (str): SQLite file. Defaults to IPFS_CID_CACHE_PATH.
+
+    Returns:
+        sqlite3.Connection: Open cache connection.
+    """
+    path = Path(path or os.getenv("IPFS_CID_CACHE_PATH") or DEFAULT_CID_CACHE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS files ("
+        " root TEXT NOT NULL,"
+        " path TEXT NOT NULL,"
+        " size INTEGER NOT NULL,"
+        " mtime_ns INTEGER NOT NULL,"
+        " sha256 TEXT NOT NULL,"
+        " cid TEXT NOT NULL,"
+        " PRIMARY KEY (root, path)"
+        ") WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS roots ("
+        " root TEXT PRIMARY KEY,"
+        " mfs_path TEXT NOT NULL,"
+        " cid TEXT NOT NULL,"
+        " published_at TEXT NOT NULL"
+        ")"
+    )
+    return conn
+
+
+def _session() -> requests.Session:
+    """
+    One HTTP session per thread.
+    """
+    if not hasattr(_SESSIONS, "session"):
+        _SESSIONS.session = requests.Session()
+    return _SESSIONS.session
+
+
+def _api(api_url: str, command: str, args=(), timeout: int = 300, **params) -> requests.Response:
+    """
+    POST an IPFS API command with positional args and options.
+    """
+    query = [("arg", arg) for arg in args] + list(params.items())
+    response = _session().post(f"{api_url}/{command}", params=query, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+
+def _add_file(api_url: str, path: Path, timeout: int) -> str:
+    """
+    Add one file and return its CID.
+    """
+    with open(path, "rb") as f:
+        response = _session().post(f"{api_url}/add", params=ADD_PARAMS, files={"file": (path.name, f)}, timeout=timeout)
+    response.raise_for_status()
+    # One JSON object per line; the last one describes the added file
+    return json.loads(response.text.strip().splitlines()[-1])["Hash"]
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _scan(directory: Path, cached: dict):
+    """
+    Compare the directory with the cache.
+
+    Returns:
+        tuple: (files dict rel_path -> (size, mtime_ns, sha256, cid or None),
+        list of rel paths whose content changed or is new).
+    """
+    files, changed = {}, []
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.name.endswith(TMP_SUFFIX):
+            continue
+        rel_path = path.relative_to(directory).as_posix()
+        stat = path.stat()
+        entry = cached.get(rel_path)
+
+        # Unchanged size and mtime: trust the cached hash without reading the file
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            files[rel_path] = entry
+            continue
+
+        sha256 = _sha256(path)
+        if entry and entry[2] == sha256:
+            files[rel_path] = (stat.st_size, stat.st_mtime_ns, sha256, entry[3])
+        else:
+            files[rel_path] = (stat.st_size, stat.st_mtime_ns, sha256, None)
+            changed.append(rel_path)
+    return files, changed
+
+
+def _mfs_hash(api_url: str, mfs_path: str):
+    """
+    CID of an MFS path, or None if it does not exist.
+    """
+    try:
+        return _api(api_url, "files/stat", [mfs_path], hash="true").json()["Hash"]
+    except requests.HTTPError:
+        return None
+
+
+def _mfs_copy(api_url: str, mfs_path: str, rel_path: str, cid: str, made_dirs: set):
+    """
+    Link a CID into the MFS directory, creating parent directories once.
+    """
+    parent = os.path.dirname(f"{mfs_path}/{rel_path}")
+    if parent not in made_dirs:
+        _api(api_url, "files/mkdir", [parent], parents="true", flush="false")
+        made_dirs.add(parent)
+    _api(api_url, "files/cp", [f"/ipfs/{cid}", f"{mfs_path}/{rel_path}"], flush="false")
+
+
+def _pin_root(api_url: str, cid: str, previous_cid: str = None, timeout: int = 300):
+    """
+    Pin a published root recursively, moving the pin of the previous
+    publish when there is one.
+    """
+    if previous_cid and previous_cid != cid:
+        try:
+            _api(api_url, "pin/update", [previous_cid, cid], timeout=timeout, unpin="true")
+            return
+        except requests.HTTPError:
+            pass  # previous root not pinned (any more)
+    _api(api_url, "pin/add", [cid], timeout=timeout, recursive="true")
+
+
+def _pinned_refs(api_url: str, cid: str, timeout: int = 300) -> set:
+    """
+    CIDs of every block under a root, or an empty set unless the root is
+    pinned recursively (unpinned blocks may be garbage collected).
+    """
+    if not cid or not is_pinned(cid, api_url, timeout):
+        return set()
+    response = _api(api_url, "refs", [cid], timeout=timeout, recursive="true", unique="true")
+    lines = [json.loads(line) for line in response.text.strip().splitlines() if line]
+    return {line["Ref"] for line in lines if not line.get("Err")}
+
+
+def publish_directory(directory_path: str, concurrency: int = 8, api_url: str = None, cache_path: str = None,
+                      mfs_path: str = None, timeout: int = 300) -> str:
+    """
+    Publish a directory to IPFS, adding only files that changed since the
+    last publish.
+
+    Args:
+        directory_path (str): Directory to publish, e.g. ./ipfs/installations.
+        concurrency (int): Parallel file uploads.
+        api_url (str): IPFS HTTP API base URL. Defaults to IPFS_HOST/IPFS_PORT.
+        cache_path (str): SQLite CID cache. Defaults to IPFS_CID_CACHE_PATH.
+        mfs_path (str): MFS directory assembled from the child CIDs.
+            Defaults to /publish/<directory name>.
+        timeout (int): Seconds per API request.
+
+    Returns:
+        str: CID of the published directory.
+
+    Raises:
+        FileNotFoundError: If the directory does not exist.
+        requests.HTTPError: If an API call fails. CIDs of the files added
+            before the failure are kept in the cache.
+    """
+    directory = Path(directory_path)
+    if not directory.is_dir():
+        raise FileNotFoundError(f"❌ Directory {directory_path} not found.")
+
+    api_url = api_url or ipfs_api_url()
+    root = str(directory.resolve())
+    mfs_path = (mfs_path or f"/publish/{directory.resolve().name}").rstrip("/")
+
+    cache = open_cid_cache(cache_path)
+    cached = {
+        row[0]: tuple(row[1:])
+        for row in cache.execute("SELECT path, size, mtime_ns, sha256, cid FROM files WHERE root = ?", (root,))
+    }
+    previous = cache.execute("SELECT mfs_path, cid FROM roots WHERE root = ?", (root,)).fetchone()
+
+    files, changed = _scan(directory, cached)
+    removed = sorted(set(cached) - set(files))
+
+    # Add changed files concurrently, keeping whatever succeeded
+    added = {}
+    error = None
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {rel_path: pool.submit(_add_file, api_url, directory / rel_path, timeout) for rel_path in changed}
+        for rel_path, future in futures.items():
+            try:
+                added[rel_path] = future.result()
+            except requests.RequestException as e:
+                error = error or e
+    for rel_path, cid in added.items():
+        files[rel_path] = files[rel_path][:3] + (cid,)
+
+    with cache:
+        cache.executemany(
+            "INSERT OR REPLACE INTO files (root, path, size, mtime_ns, sha256, cid) VALUES (?, ?, ?, ?, ?, ?)",
+            [(root, rel_path, *entry) for rel_path, entry in files.items() if entry[3] is not None],
+        )
+        cache.executemany("DELETE FROM files WHERE root = ? AND path = ?", [(root, rel_path) for rel_path in removed])
+    if error is not None:
+        cache.close()
+        print(f"❌ {len(changed) - len(added)} of {len(changed)} uploads failed: {error}")
+        raise error
+
+    # Patch the MFS directory if it still matches the last publish, else rebuild it
+    made_dirs = set()
+    incremental = previous is not None and previous[0] == mfs_path and _mfs_hash(api_url, mfs_path) == previous[1]
+    if incremental:
+        for rel_path in removed + changed:
+            try:
+                _api(api_url, "files/rm", [f"{mfs_path}/{rel_path}"], flush="false")
+            except requests.HTTPError:
+                pass  # new file, nothing to replace
+        for rel_path in changed:
+            _mfs_copy(api_url, mfs_path, rel_path, files[rel_path][3], made_dirs)
+    else:
+        if _mfs_hash(api_url, mfs_path) is not None:
+            _api(api_url, "files/rm", [mfs_path], recursive="true")
+        _api(api_url, "files/mkdir", [mfs_path], parents="true", flush="false")
+        made_dirs.add(mfs_path)
+        for rel_path, entry in files.items():
+            _mfs_copy(api_url, mfs_path, rel_path, entry[3], made_dirs)
+
+    _api(api_url, "files/flush", [mfs_path])
+    cid = _mfs_hash(api_url, mfs_path)
+    _pin_root(api_url, cid, previous[1] if previous else None, timeout)
+
+    with cache:
+        cache.execute(
+            "INSERT OR REPLACE INTO roots (root, mfs_path, cid, published_at) VALUES (?, ?, ?, ?)",
+            (root, mfs_path, cid, datetime.datetime.utcnow().isoformat()),
+        )
+    cache.close()
+
+    mode = "patched" if incremental else "rebuilt"
+    print(f"📦 Published {directory_path} with CID: {cid} "
+          f"({len(changed)} added, {len(removed)} removed, {len(files) - len(changed)} reused; directory {mode}).")
+    return cid
+
+
+def is_pinned(cid: str, api_url: str = None, timeout: int = 300) -> bool:
+    """
+    Whether a CID is pinned recursively on the node.
+    """
+    try:
+        _api(api_url or ipfs_api_url(), "pin/ls", [cid], timeout=timeout, type="recursive")
+        return True
+    except requests.HTTPError:
+        return False
+
+
+def import_car(car_path: str, api_url: str = None, timeout: int = 3600) -> list:
+    """
+    Import a CAR archive and pin its roots.
+
+    Returns:
+        list: Root CIDs reported by the node.
+    """
+    with open(car_path, "rb") as f:
+        response = _session().post(f"{api_url or ipfs_api_url()}/dag/import", params={"pin-roots": "true"},
+                                   files={"file": (Path(car_path).name, f)}, timeout=timeout)
+    response.raise_for_status()
+    lines = [json.loads(line) for line in response.text.strip().splitlines() if line]
+    return [line["Root"]["Cid"]["/"] for line in lines if "Root" in line]
+
+
+def publish_car(directory_path: str, car_path: str = None, api_url: str = None, cache_path: str = None,
+                timeout: int = 3600) -> str:
+    """
+    Publish a directory as a single CAR import.
+
+    The root CID is computed offline first; if the node already pins it,
+    nothing is sent. Otherwise the CAR leaves out files whose CIDs are
+    under the recursive pin of the previous publish of this directory,
+    and that pin moves to the new root.
+
+    Args:
+        directory_path (str): Directory to publish.
+        car_path (str): Where to write the archive. Defaults to
+            ./cache/car/<directory name>.car.
+        api_url (str): IPFS HTTP API base URL. Defaults to IPFS_HOST/IPFS_PORT.
+        cache_path (str): SQLite CID cache. Defaults to IPFS_CID_CACHE_PATH.
+        timeout (int): Seconds for the import request.
+
+    Returns:
+        str: CID of the published directory.
+    """
+    directory = Path(directory_path)
+    if not directory.is_dir():
+        raise FileNotFoundError(f"❌ Directory {directory_path} not found.")
+
+    api_url = api_url or ipfs_api_url()
+    root = str(directory.resolve())
+    car_path = Path(car_path or f"./cache/car/{directory.resolve().name}.car")
+
+    cache = open_cid_cache(cache_path)
+    cached = {
+        row[0]: tuple(row[1:])
+        for row in cache.execute("SELECT path, size, mtime_ns, sha256, cid FROM files WHERE root = ?", (root,))
+    }
+    previous = cache.execute("SELECT cid FROM roots WHERE root = ?", (root,)).fetchone()
+    files, changed = _scan(directory, cached)
+    known_files = {rel_path: (entry[0], entry[3]) for rel_path, entry in files.items() if entry[3] is not None}
+
+    # One pass over the tree, reusing the cached CIDs of unchanged files
+    dag = compute_directory_dag(directory, skip=lambda path: path.name.endswith(TMP_SUFFIX), known_files=known_files)
+    root_cid, _, file_cids = dag
+    root_cid = cid_to_str(root_cid)
+
+    if is_pinned(root_cid, api_url):
+        print(f"📌 {directory_path} is already pinned as {root_cid}; nothing to upload.")
+    else:
+        # Only blocks a recursive pin protects can be left out of the archive
+        pinned = _pinned_refs(api_url, previous[0] if previous else None)
+        known_cids = {cid for _, cid in known_files.values() if cid in pinned}
+        stats = export_car(directory, car_path, exclude=known_cids, dag=dag)
+        roots = import_car(car_path, api_url, timeout)
+        if root_cid not in roots:
+            raise RuntimeError(f"❌ CAR import reported roots {roots}, expected {root_cid}.")
+        # dag/import pinned the new root; the previous one is no longer needed
+        if previous and previous[0] != root_cid and is_pinned(previous[0], api_url):
+            _api(api_url, "pin/rm", [previous[0]], timeout=timeout)
+        print(f"📦 Imported {directory_path} as {root_cid} from {car_path} "
+              f"({stats['blocks']} blocks, {stats['bytes']} bytes, {stats['skipped_files']} files already on the node).")
+
+    with cache:
+        cache.executemany(
+            "INSERT OR REPLACE INTO files (root, path, size, mtime_ns, sha256, cid) VALUES (?, ?, ?, ?, ?, ?)",
+            [(root, rel_path, *files[rel_path][:3], cid_to_str(cid)) for rel_path, cid in file_cids.items() if rel_path in files],
+        )
+        cache.executemany("DELETE FROM files WHERE root = ? AND path = ?",
+                          [(root, rel_path) for rel_path in set(cached) - set(files)])
+        # No MFS copy was updated, so a later publish_directory rebuilds it
+        cache.execute(
+            "INSERT OR REPLACE INTO roots (root, mfs_path, cid, published_at) VALUES (?, '', ?, ?)",
+            (root, root_cid, datetime.datetime.utcnow().isoformat()),
+        )
+    cache.close()
+    return root_cid
+
+
 if __name__ == "__main__":
     components_path = "./ipfs/components"
     installations_path = "./ipfs/installations"
 
     print("📤 Uploading components directory...")
-    components_cid = upload_directory_to_ipfs(components_path)
+    components_cid = publish_directory(components_path)
 
     print("📤 Uploading installations directory...")
-    installations_cid = upload_directory_to_ipfs(installations_path)
+    installations_cid = publish_directory(installations_path)
 
     print("\n✅ Uploads complete:")
     print(f"🔗 Components baseURI: ipfs://{components_cid}/{{id}}.json")
     print(f"🔗 Installations baseURI: ipfs://{installations_cid}/{{id}}.json")
-
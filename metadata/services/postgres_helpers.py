@@ -9,17 +9,64 @@ encoding using GeoAlchemy2.
 Functions:
     - insert_installation_metadata: Insert or update installation metadata in the 'installations' table.
     - insert_component_metadata: Insert or update component metadata in the 'components' table.
+    - bulk_insert_installation_metadata: Chunked upsert of many installations, one transaction per chunk.
+    - bulk_insert_component_metadata: Chunked upsert of many components, one transaction per chunk.
     - read_installation_metadata: Retrieve installation metadata by token ID.
     - read_component_metadata: Retrieve component metadata by token ID.
+    - read_installation_metadata_many: Retrieve many installations, one query per chunk.
+    - read_component_metadata_many: Retrieve many components, one query per chunk.
+    - resolve_installation_components: Fetch the components referenced by a page of installations.
+    - configure_read_cache: Size and TTL of the read_many cache.
+    - clear_read_cache: Empty the read_many cache.
+    - read_installation_token_ids_in_bbox: Find installations in a bounding box from token ID ranges.
 
 """
 
+import io
+import os
+import csv
 import json
+import time
 import datetime
-from sqlalchemy import MetaData, Table, text
-from sqlalchemy.dialects.postgresql import insert
+import threading
+from collections import OrderedDict
+from itertools import islice
+import shapely
+from sqlalchemy import MetaData, Table, Text, cast, literal, text
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from shapely.geometry import shape, Point
+from geoalchemy2.elements import WKBElement
 from geoalchemy2.shape import from_shape
+import numpy as np
+from helpers.db import UPSERT_METHODS
+from helpers.geometry_helpers import geometry_coordinates
+from helpers.morton_ranges import bbox_to_token_ranges, token_ranges_to_sql, token_ids_in_bbox
+
+# Reflected tables, keyed by (database URL, table name)
+_TABLE_CACHE = {}
+
+# Columns set on first insert only, never overwritten by an upsert
+INSERT_ONLY_COLUMNS = ("token_id", "created_at")
+
+# Bounded LRU cache with TTL in front of the read_many functions, keyed by
+# (table, projection, token_id) -> (expires_at, document)
+_READ_CACHE = OrderedDict()
+_READ_CACHE_LOCK = threading.Lock()
+_READ_CACHE_CONFIG = {
+    "maxsize": int(os.getenv("READ_CACHE_SIZE", "10000")),
+    "ttl": float(os.getenv("READ_CACHE_TTL", "300")),
+}
+
+
+def _reflect_table(table_name: str, conn) -> Table:
+    """
+    Reflect an accounting table once per database and reuse it.
+    """
+    key = (conn.engine.url.render_as_string(hide_password=True), table_name)
+    if key not in _TABLE_CACHE:
+        _TABLE_CACHE[key] = Table(table_name, MetaData(), autoload_with=conn, schema="accounting")
+    return _TABLE_CACHE[key]
+
 
 def insert_installation_metadata(metadata: dict, conn):
     """
@@ -38,7 +85,7 @@ def insert_installation_metadata(metadata: dict, conn):
 
     # Extract centroid and geometry
     centroid_coords = metadata['centroid']
-    geometry_coords = json.loads(metadata['geometry']['coordinates']) if isinstance(metadata['geometry']['coordinates'], str) else metadata['geometry']['coordinates']
+    geometry_coords = geometry_coordinates(metadata['geometry'])
 
     # Convert to spatial objects
     centroid = from_shape(Point(centroid_coords[1], centroid_coords[0]), srid=4326)
@@ -48,8 +95,7 @@ def insert_installation_metadata(metadata: dict, conn):
     }), srid=4326)
 
     # Metadata Table
-    metadata_obj = MetaData()
-    installations = Table("installations", metadata_obj, autoload_with=conn, schema="accounting")
+    installations = _reflect_table("installations", conn)
 
     # Insert or Update
     insert_stmt = insert(installations).values(
@@ -67,8 +113,7 @@ def insert_installation_metadata(metadata: dict, conn):
             "installation_type": installation_type,
             "centroid": centroid,
             "geometry": multipolygon,
-            "metadata": metadata,
-            "created_at": datetime.datetime.utcnow()
+            "metadata": metadata
         }
     )
 
@@ -92,8 +137,7 @@ def insert_component_metadata(metadata: dict, conn):
     component_type = metadata.get('component_type', 'unknown')
 
     # Metadata Table
-    metadata_obj = MetaData()
-    components = Table("components", metadata_obj, autoload_with=conn, schema="accounting")
+    components = _reflect_table("components", conn)
 
     # Insert or Update
     insert_stmt = insert(components).values(
@@ -107,8 +151,7 @@ def insert_component_metadata(metadata: dict, conn):
         set_={
             "name": name,
             "component_type": component_type,
-            "metadata": metadata,
-            "created_at": datetime.datetime.utcnow()
+            "metadata": metadata
         }
     )
 
@@ -116,6 +159,200 @@ def insert_component_metadata(metadata: dict, conn):
     conn.commit()
 
 
+def bulk_insert_installation_metadata(records, conn, chunk_size: int = 1000, method: str = "values",
+                                      payloads=None) -> int:
+    """
+    Insert or update many installations, one transaction per chunk.
+
+    The table is reflected once, centroids and multipolygons are built
+    for the whole chunk with vectorized shapely calls, and each chunk is
+    written either as one multi-row INSERT ... ON CONFLICT ("values") or
+    as a COPY into a temporary staging table merged with a single
+    INSERT ... SELECT ("copy").
+
+    Args:
+        records (iterable): Installation metadata dictionaries.
+        conn (sqlalchemy.engine.Connection): Active database connection.
+        chunk_size (int): Rows per statement and transaction.
+        method (str): "values" or "copy".
+        payloads (iterable): Already serialized JSON for each record, sent
+            as the metadata column instead of serializing the dict again.
+
+    Returns:
+        int: Number of rows upserted.
+
+    Raises:
+        Exception: If a chunk fails; that chunk is rolled back.
+    """
+    return _bulk_upsert("installations", records, _installation_rows, conn, chunk_size, method, payloads)
+
+
+def bulk_insert_component_metadata(records, conn, chunk_size: int = 1000, method: str = "values",
+                                   payloads=None) -> int:
+    """
+    Insert or update many components, one transaction per chunk.
+
+    Args:
+        records (iterable): Component metadata dictionaries.
+        conn (sqlalchemy.engine.Connection): Active database connection.
+        chunk_size (int): Rows per statement and transaction.
+        method (str): "values" or "copy".
+        payloads (iterable): Already serialized JSON for each record, sent
+            as the metadata column instead of serializing the dict again.
+
+    Returns:
+        int: Number of rows upserted.
+
+    Raises:
+        Exception: If a chunk fails; that chunk is rolled back.
+    """
+    return _bulk_upsert("components", records, _component_rows, conn, chunk_size, method, payloads)
+
+
+def _installation_rows(chunk: list, created_at) -> list:
+    """
+    Build installation table rows for a chunk, geometries as EWKB hex.
+    """
+    centroids = [m['centroid'] for m in chunk]
+    points = shapely.points([c[1] for c in centroids], [c[0] for c in centroids])
+
+    geojson = []
+    for m in chunk:
+        coords = m['geometry'].get('coordinates')
+        if not isinstance(coords, str):
+            coords = json.dumps(geometry_coordinates(m['geometry']), separators=(',', ':'))
+        geojson.append('{"type":"MultiPolygon","coordinates":' + coords + '}')
+    multipolygons = shapely.from_geojson(geojson)
+
+    point_hex = shapely.to_wkb(shapely.set_srid(points, 4326), hex=True, include_srid=True)
+    geometry_hex = shapely.to_wkb(shapely.set_srid(multipolygons, 4326), hex=True, include_srid=True)
+
+    rows = []
+    for m, centroid, geometry in zip(chunk, point_hex, geometry_hex):
+        token_id = int(m['tokenId'])
+        rows.append({
+            "token_id": token_id,
+            "name": m.get('name', f"Installation {token_id}"),
+            "installation_type": m.get('installation_type', 'unknown'),
+            "centroid": centroid,
+            "geometry": geometry,
+            "metadata": m,
+            "created_at": created_at,
+        })
+    return rows
+
+
+def _component_rows(chunk: list, created_at) -> list:
+    """
+    Build component table rows for a chunk.
+    """
+    rows = []
+    for m in chunk:
+        token_id = int(m['tokenId'])
+        rows.append({
+            "token_id": token_id,
+            "name": m.get('name', f"Component {token_id}"),
+            "component_type": m.get('component_type', 'unknown'),
+            "metadata": m,
+            "created_at": created_at,
+        })
+    return rows
+
+
+def _bulk_upsert(table_name: str, records, build_rows, conn, chunk_size: int, method: str, payloads=None) -> int:
+    """
+    Upsert records in chunks, committing once per chunk.
+    """
+    if method not in UPSERT_METHODS:
+        raise ValueError(f"Unknown upsert method '{method}', expected one of {UPSERT_METHODS}.")
+
+    table = _reflect_table(table_name, conn)
+    write_chunk = _upsert_values if method == "values" else _upsert_copy
+    records = iter(records)
+    payloads = iter(payloads) if payloads is not None else None
+    total = 0
+
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+
+        rows = build_rows(chunk, datetime.datetime.utcnow())
+        if payloads is not None:
+            for row, payload in zip(rows, islice(payloads, len(chunk))):
+                row["metadata"] = payload.decode() if isinstance(payload, bytes) else payload
+        # A statement may touch each token once; keep the last version like sequential upserts
+        rows = list({row["token_id"]: row for row in rows}.values())
+
+        try:
+            write_chunk(table, rows, conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        _evict_cached(table_name, [row["token_id"] for row in rows])
+        total += len(rows)
+
+    return total
+
+
+def _upsert_values(table: Table, rows: list, conn):
+    """
+    Upsert a chunk with one multi-row INSERT ... ON CONFLICT statement.
+    """
+    geometry_columns = [c for c in ("centroid", "geometry") if c in rows[0]]
+    for row in rows:
+        for column in geometry_columns:
+            row[column] = WKBElement(row[column], srid=4326, extended=True)
+        # Pre-serialized documents go straight to JSONB without a second dumps
+        if isinstance(row["metadata"], str):
+            row["metadata"] = cast(literal(row["metadata"], Text), JSONB)
+
+    insert_stmt = insert(table).values(rows)
+    insert_stmt = insert_stmt.on_conflict_do_update(
+        index_elements=['token_id'],
+        set_={column: insert_stmt.excluded[column] for column in rows[0] if column not in INSERT_ONLY_COLUMNS}
+    )
+    conn.execute(insert_stmt)
+
+
+def _upsert_copy(table: Table, rows: list, conn):
+    """
+    Upsert a chunk by COPYing into a temporary staging table and merging
+    it with a single INSERT ... SELECT ... ON CONFLICT statement.
+    """
+    columns = list(rows[0])
+    column_list = ", ".join(columns)
+    staging = f"staging_{table.name}"
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            (row[c] if isinstance(row[c], str) else json.dumps(row[c])) if c == "metadata"
+            else row[c].isoformat() if c == "created_at" else row[c]
+            for c in columns
+        ])
+    buffer.seek(0)
+
+    conn.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+        f"(LIKE {table.schema}.{table.name} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    ))
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c not in INSERT_ONLY_COLUMNS)
+    conn.execute(text(
+        f"INSERT INTO {table.schema}.{table.name} ({column_list}) "
+        f"SELECT {column_list} FROM {staging} "
+        f"ON CONFLICT (token_id) DO UPDATE SET {updates}"
+    ))
+
+
 def read_installation_metadata(token_id: int, conn) -> dict:
     """
     Retrieve installation metadata by token ID.
@@ -146,3 +383,195 @@ def read_component_metadata(token_id: int, conn) -> dict:
     sql = text("SELECT metadata FROM accounting.components WHERE token_id = :token_id")
     result = conn.execute(sql, {"token_id": token_id}).fetchone()
     return result[0] if result else None
+
+
+def configure_read_cache(maxsize: int = None, ttl: float = None):
+    """
+    Set the read_many cache bounds and drop the cached documents.
+
+    Args:
+        maxsize (int): Maximum cached documents (READ_CACHE_SIZE, default 10000).
+        ttl (float): Seconds a document stays valid (READ_CACHE_TTL, default 300).
+    """
+    with _READ_CACHE_LOCK:
+        if maxsize is not None:
+            _READ_CACHE_CONFIG["maxsize"] = maxsize
+        if ttl is not None:
+            _READ_CACHE_CONFIG["ttl"] = ttl
+        _READ_CACHE.clear()
+
+
+def clear_read_cache():
+    """
+    Drop every cached document.
+    """
+    with _READ_CACHE_LOCK:
+        _READ_CACHE.clear()
+
+
+def _evict_cached(table_name: str, token_ids):
+    """
+    Forget cached documents for rows that were just written.
+    """
+    token_ids = set(token_ids)
+    with _READ_CACHE_LOCK:
+        for key in [key for key in _READ_CACHE if key[0] == table_name and key[2] in token_ids]:
+            del _READ_CACHE[key]
+
+
+def _cache_get(keys: list) -> dict:
+    now = time.monotonic()
+    found = {}
+    with _READ_CACHE_LOCK:
+        for key in keys:
+            entry = _READ_CACHE.get(key)
+            if entry is None:
+                continue
+            if entry[0] < now:
+                del _READ_CACHE[key]
+                continue
+            _READ_CACHE.move_to_end(key)
+            found[key] = entry[1]
+    return found
+
+
+def _cache_put(items: dict):
+    expires_at = time.monotonic() + _READ_CACHE_CONFIG["ttl"]
+    with _READ_CACHE_LOCK:
+        for key, document in items.items():
+            _READ_CACHE[key] = (expires_at, document)
+            _READ_CACHE.move_to_end(key)
+        while len(_READ_CACHE) > _READ_CACHE_CONFIG["maxsize"]:
+            _READ_CACHE.popitem(last=False)
+
+
+def _read_many(table_name: str, token_ids, conn, chunk_size: int, fields, cache: bool) -> dict:
+    """
+    Fetch documents with one = ANY(:ids) query per chunk, optionally
+    projected to JSON paths and served from the read cache.
+    """
+    token_ids = list(dict.fromkeys(int(token_id) for token_id in token_ids))
+    fields = tuple(fields) if fields else None
+    keys = {token_id: (table_name, fields, token_id) for token_id in token_ids}
+
+    found = {}
+    if cache:
+        cached = _cache_get(list(keys.values()))
+        found = {token_id: cached[key] for token_id, key in keys.items() if key in cached}
+
+    if fields:
+        params = {f"path_{i}": field.split(".") for i, field in enumerate(fields)}
+        columns = ", ".join(f"metadata #> :path_{i}" for i in range(len(fields)))
+    else:
+        params, columns = {}, "metadata"
+    sql = text(f"SELECT token_id, {columns} FROM accounting.{table_name} WHERE token_id = ANY(:ids)")
+
+    missing = [token_id for token_id in token_ids if token_id not in found]
+    fetched = {}
+    for i in range(0, len(missing), chunk_size):
+        for row in conn.execute(sql, {**params, "ids": missing[i:i + chunk_size]}):
+            fetched[int(row[0])] = dict(zip(fields, row[1:])) if fields else row[1]
+
+    if cache and fetched:
+        _cache_put({keys[token_id]: document for token_id, document in fetched.items()})
+
+    found.update(fetched)
+    return {token_id: found[token_id] for token_id in token_ids if token_id in found}
+
+
+def read_installation_metadata_many(token_ids, conn, chunk_size: int = 1000, fields=None, cache: bool = False) -> dict:
+    """
+    Retrieve installation metadata for many token IDs.
+
+    Args:
+        token_ids (iterable): Installation token IDs.
+        conn (sqlalchemy.engine.Connection): Active database connection.
+        chunk_size (int): Token IDs per query.
+        fields (list): Dotted JSON paths to return instead of the whole
+            document, e.g. ["name", "centroid", "components.modules"].
+        cache (bool): Serve and store documents through the read cache;
+            cached documents are shared, so treat them as read-only.
+
+    Returns:
+        dict: token_id -> metadata (or {path: value} when projected).
+        Unknown token IDs are left out.
+    """
+    return _read_many("installations", token_ids, conn, chunk_size, fields, cache)
+
+
+def read_component_metadata_many(token_ids, conn, chunk_size: int = 1000, fields=None, cache: bool = False) -> dict:
+    """
+    Retrieve component metadata for many token IDs.
+
+    Args:
+        token_ids (iterable): Component token IDs.
+        conn (sqlalchemy.engine.Connection): Active database connection.
+        chunk_size (int): Token IDs per query.
+        fields (list): Dotted JSON paths to return instead of the whole document.
+        cache (bool): Serve and store documents through the read cache;
+            cached documents are shared, so treat them as read-only.
+
+    Returns:
+        dict: token_id -> metadata (or {path: value} when projected).
+        Unknown token IDs are left out.
+    """
+    return _read_many("components", token_ids, conn, chunk_size, fields, cache)
+
+
+def _component_token_id(reference):
+    """
+    Token ID of a component reference, either a bare ID or a
+    .../components/<token_id>.json URL.
+    """
+    reference = str(reference).rstrip("/").rsplit("/", 1)[-1]
+    reference = reference[:-len(".json")] if reference.endswith(".json") else reference
+    return int(reference) if reference.isdigit() else None
+
+
+def resolve_installation_components(installations, conn, fields=None, cache: bool = True) -> dict:
+    """
+    Fetch every component referenced by a page of installations in one
+    batched read instead of one query per reference.
+
+    Args:
+        installations (iterable): Installation metadata documents (or
+            projections containing "components").
+        conn (sqlalchemy.engine.Connection): Active database connection.
+        fields (list): Dotted JSON paths to return for each component.
+        cache (bool): Use the read cache.
+
+    Returns:
+        dict: component token_id -> component metadata.
+    """
+    token_ids = []
+    for installation in installations:
+        for entries in (installation.get("components") or {}).values():
+            for entry in entries or []:
+                # Prefer the link resolved by helpers/component_index.py
+                token_id = _component_token_id(entry.get("component_tokenId") or entry.get("tokenId", ""))
+                if token_id is not None:
+                    token_ids.append(token_id)
+
+    return read_component_metadata_many(token_ids, conn, fields=fields, cache=cache)
+
+
+def read_installation_token_ids_in_bbox(bbox, conn, max_ranges: int = 64) -> list:
+    """
+    Find installations whose centroid lies in a bounding box using only
+    the Morton encoded primary key.
+
+    Args:
+        bbox (tuple): (min_lon, min_lat, max_lon, max_lat).
+        conn (sqlalchemy.engine.Connection): Active database connection.
+        max_ranges (int): Upper bound on the number of BETWEEN predicates.
+
+    Returns:
+        list: Sorted token IDs of the installations inside the box.
+    """
+    ranges = bbox_to_token_ranges(*bbox, max_ranges=max_ranges)
+    predicate, params = token_ranges_to_sql(ranges)
+    sql = text(f"SELECT token_id FROM accounting.installations WHERE {predicate} ORDER BY token_id")
+    token_ids = np.array([int(row[0]) for row in conn.execute(sql, params)], dtype=np.uint64)
+
+    # Range cover is a superset of the box; drop the corners that fall outside
+    return token_ids[token_ids_in_bbox(token_ids, *bbox)].tolist()
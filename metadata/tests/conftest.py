@@ -0,0 +1,7 @@
+"""Test configuration: import the package modules the way the CLIs do
+(PYTHONPATH=metadata), e.g. `from helpers.source_cache import fetch_source`."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
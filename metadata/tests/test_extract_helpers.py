@@ -0,0 +1,54 @@
+"""Tests for helpers/extract_helpers.py chunked CSV reading."""
+
+import pandas as pd
+import pytest
+
+from helpers.extract_helpers import infer_csv_dtypes, iter_csv_chunks
+
+ROWS = 12
+
+
+@pytest.fixture
+def registry(tmp_path):
+    # Every column changes type somewhere after the first rows, so it spans chunk boundaries
+    frame = pd.DataFrame({
+        "tokenId": range(ROWS),
+        "mixed": [str(i) for i in range(ROWS - 2)] + ["x", "12"],
+        "code": ["28", "31"] * 5 + ["0028", "A1"],
+        "gap": [1, 2, 3, 4, 5, 6, 7, None, 9, 10, 11, 12],
+        "flag": [True] * 6 + [None, False] * 3,
+        "ratio": [1] * 6 + [1.5] * 6,
+        "late_text": [None] * 9 + ["a", None, "b"],
+    })
+    path = tmp_path / "registry.csv"
+    frame.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 7, ROWS, 100])
+def test_chunks_match_a_whole_file_read(registry, chunk_size):
+    whole = pd.read_csv(registry)
+    streamed = pd.concat(iter_csv_chunks(registry, chunk_size), ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, whole)
+    assert streamed["mixed"].tolist()[:2] == ["0", "1"]
+    assert streamed["code"].tolist()[-2:] == ["0028", "A1"]
+
+
+def test_declared_dtypes_parse_the_file_once(registry, monkeypatch):
+    whole = pd.read_csv(registry)
+    dtypes = infer_csv_dtypes(registry, 5)
+    assert dtypes["mixed"] == "str" and dtypes["gap"] == "float64" and dtypes["flag"] == "object"
+
+    reads = []
+    real_read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *args, **kwargs: reads.append(kwargs) or real_read_csv(*args, **kwargs))
+    streamed = pd.concat(iter_csv_chunks(registry, 5, dtypes), ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, whole, check_dtype=True)
+    assert [kwargs.get("chunksize") for kwargs in reads] == [None, 5]
+
+
+def test_undeclared_columns_are_inferred_not_left_per_chunk(registry):
+    whole = pd.read_csv(registry)
+    partial = {column: dtype for column, dtype in infer_csv_dtypes(registry).items() if column != "mixed"}
+    streamed = pd.concat(iter_csv_chunks(registry, 5, partial), ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, whole)
@@ -0,0 +1,24 @@
+"""Tests for helpers/instrumentation.py."""
+
+import pytest
+
+from helpers.instrumentation import STAGES, finish_run, stage, start_run
+
+
+def test_stages_accumulate():
+    run = start_run("test")
+    for _ in range(2):
+        with stage(run, "transform", rows_in=5) as current:
+            current["rows_out"] = 4
+    report = finish_run(run)
+    assert report["stages"]["transform"]["calls"] == 2
+    assert report["stages"]["transform"]["rows_out"] == 8
+
+
+def test_unknown_stage_names_are_rejected():
+    assert "token_id" not in STAGES
+    with pytest.raises(ValueError):
+        start_run("test", profile_stage="token_id")
+    with pytest.raises(ValueError):
+        with stage(start_run("test"), "token_id"):
+            pass
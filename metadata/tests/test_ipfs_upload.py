@@ -0,0 +1,310 @@
+"""Tests for services/ipfs_upload.py publish_directory and publish_car
+against a local stand-in for the IPFS HTTP API. The stand-in keeps added
+contents by CID, an in-memory MFS tree and a set of recursive pins, and
+computes directory CIDs offline with helpers/ipfs_cid.py, so the
+published root CID can be compared with the one `ipfs add -r` would give
+for the same tree."""
+
+import json
+import tempfile
+import threading
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from helpers.ipfs_cid import cid_to_str, directory_cid, file_cid
+from services.ipfs_upload import publish_car, publish_directory
+
+MFS_PATH = "/publish/assets"
+
+
+class _IpfsHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        url = urlsplit(self.path)
+        command = url.path.removeprefix("/api/v0/")
+        params = parse_qs(url.query, keep_blank_values=True)
+        args = params.get("arg", [])
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with server.lock:
+            server.calls.append((command, *args))
+            try:
+                payload = getattr(server, "cmd_" + command.replace("/", "_"))(args, body, self.headers)
+            except KeyError as e:
+                self._reply(500, {"Message": f"file does not exist: {e}", "Code": 0, "Type": "error"})
+                return
+        self._reply(200, payload)
+
+    def _reply(self, status, payload):
+        # Streaming commands answer with one JSON object per line
+        lines = payload if isinstance(payload, list) else [payload]
+        data = "\n".join(json.dumps(line) for line in lines).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class _IpfsStandIn(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _IpfsHandler)
+        self.lock = threading.Lock()
+        self.calls, self.blocks, self.mfs = [], {}, {}
+        self.pins, self.trees, self.imported = set(), {}, []
+        self.api_url = f"http://127.0.0.1:{self.server_address[1]}/api/v0"
+
+    def cmd_add(self, args, body, headers):
+        message = BytesParser().parsebytes(b"Content-Type: " + headers["Content-Type"].encode() + b"\r\n\r\n" + body)
+        data = message.get_payload()[0].get_payload(decode=True)
+        cid = file_cid(data)
+        self.blocks[cid] = data
+        return {"Name": cid, "Hash": cid, "Size": str(len(data))}
+
+    def cmd_files_mkdir(self, args, body, headers):
+        path = args[0].rstrip("/")
+        while path:
+            self.mfs.setdefault(path, None)
+            path = path.rsplit("/", 1)[0]
+        return {}
+
+    def cmd_files_cp(self, args, body, headers):
+        source, target = args
+        cid = source.removeprefix("/ipfs/")
+        if cid not in self.blocks or target.rsplit("/", 1)[0] not in self.mfs:
+            raise KeyError(source if cid not in self.blocks else target)
+        self.mfs[target] = cid
+        return {}
+
+    def cmd_files_rm(self, args, body, headers):
+        path = args[0].rstrip("/")
+        if path not in self.mfs:
+            raise KeyError(path)
+        for key in [key for key in self.mfs if key == path or key.startswith(path + "/")]:
+            del self.mfs[key]
+        return {}
+
+    def cmd_files_flush(self, args, body, headers):
+        return {"Cid": self._stat(args[0].rstrip("/"))}
+
+    def cmd_files_stat(self, args, body, headers):
+        return {"Hash": self._stat(args[0].rstrip("/"))}
+
+    def cmd_pin_add(self, args, body, headers):
+        self.pins.add(args[0])
+        return {"Pins": [args[0]]}
+
+    def cmd_pin_update(self, args, body, headers):
+        old, new = args
+        self.pins.remove(old)
+        self.pins.add(new)
+        return {"Pins": [old, new]}
+
+    def cmd_pin_rm(self, args, body, headers):
+        self.pins.remove(args[0])
+        return {"Pins": [args[0]]}
+
+    def cmd_pin_ls(self, args, body, headers):
+        if args[0] not in self.pins:
+            raise KeyError(args[0])
+        return {"Keys": {args[0]: {"Type": "recursive"}}}
+
+    def cmd_refs(self, args, body, headers):
+        return [{"Ref": cid, "Err": ""} for cid in sorted(self.trees[args[0]])]
+
+    def cmd_dag_import(self, args, body, headers):
+        message = BytesParser().parsebytes(b"Content-Type: " + headers["Content-Type"].encode() + b"\r\n\r\n" + body)
+        roots, cids = _read_car(message.get_payload()[0].get_payload(decode=True))
+        self.imported.append(cids)
+        self.pins.update(roots)
+        return [{"Root": {"Cid": {"/": root}, "PinErrorMsg": ""}} for root in roots]
+
+    def _stat(self, path):
+        if path not in self.mfs:
+            raise KeyError(path)
+        if self.mfs[path] is not None:
+            return self.mfs[path]
+        # Materialize the MFS directory and hash it the way `ipfs add -r` would
+        with tempfile.TemporaryDirectory() as tmp:
+            for key, cid in self.mfs.items():
+                if key.startswith(path + "/"):
+                    target = Path(tmp, key[len(path) + 1:])
+                    if cid is None:
+                        target.mkdir(parents=True, exist_ok=True)
+                    else:
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        target.write_bytes(self.blocks[cid])
+            cid = directory_cid(tmp)
+        self.trees[cid] = {value for key, value in self.mfs.items() if key.startswith(path + "/") and value}
+        return cid
+
+
+def _varint(data: bytes, position: int):
+    value, shift = 0, 0
+    while True:
+        byte = data[position]
+        value |= (byte & 0x7F) << shift
+        position, shift = position + 1, shift + 7
+        if byte < 0x80:
+            return value, position
+
+
+def _read_car(data: bytes):
+    """
+    Root CIDs and block CIDs of a CARv1 archive.
+    """
+    length, position = _varint(data, 0)
+    header = data[position:position + length]
+    position += length
+    roots, cids = [], []
+    while position < len(data):
+        length, start = _varint(data, position)
+        end = start + length
+        # CIDv1: version, codec, then the multihash code, length and digest
+        _, cursor = _varint(data, start)
+        _, cursor = _varint(data, cursor)
+        _, cursor = _varint(data, cursor)
+        digest_length, cursor = _varint(data, cursor)
+        cids.append(cid_to_str(data[start:cursor + digest_length]))
+        position = end
+    # The header is dag-cbor {"roots": [CID], "version": 1}: tag 42, byte string, 0x00 prefix
+    start = header.index(b"\xd8\x2a\x58") + 3
+    roots.append(cid_to_str(header[start + 2:start + 1 + header[start]]))
+    return roots, cids
+
+
+@pytest.fixture
+def ipfs():
+    server = _IpfsStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def assets(tmp_path):
+    directory = tmp_path / "assets"
+    (directory / "12").mkdir(parents=True)
+    (directory / "1.json").write_text('{"tokenId": "1"}')
+    (directory / "2.json").write_text('{"tokenId": "2"}')
+    (directory / "12" / "1234.json").write_text('{"tokenId": "1234"}')
+    (directory / "3.json.tmp").write_text("partial")
+    return directory
+
+
+def _publish(ipfs, directory, tmp_path):
+    ipfs.calls.clear()
+    return publish_directory(directory, concurrency=2, api_url=ipfs.api_url,
+                             cache_path=tmp_path / "cids.sqlite", mfs_path=MFS_PATH)
+
+
+def _cid(directory, rel_path):
+    return file_cid((directory / rel_path).read_bytes())
+
+
+def _mfs_calls(ipfs):
+    return [call for call in ipfs.calls if call[0] != "add"]
+
+
+def test_first_publish_builds_the_directory_from_added_cids(ipfs, assets, tmp_path):
+    cid = _publish(ipfs, assets, tmp_path)
+
+    assert cid == directory_cid(assets)
+    assert [call[0] for call in ipfs.calls].count("add") == 3
+    assert _mfs_calls(ipfs) == [
+        ("files/stat", MFS_PATH),
+        ("files/mkdir", MFS_PATH),
+        ("files/cp", f"/ipfs/{_cid(assets, '1.json')}", f"{MFS_PATH}/1.json"),
+        ("files/mkdir", f"{MFS_PATH}/12"),
+        ("files/cp", f"/ipfs/{_cid(assets, '12/1234.json')}", f"{MFS_PATH}/12/1234.json"),
+        ("files/cp", f"/ipfs/{_cid(assets, '2.json')}", f"{MFS_PATH}/2.json"),
+        ("files/flush", MFS_PATH),
+        ("files/stat", MFS_PATH),
+        ("pin/add", cid),
+    ]
+    assert ipfs.pins == {cid}
+
+
+def test_republish_patches_only_changed_and_removed_files(ipfs, assets, tmp_path):
+    first = _publish(ipfs, assets, tmp_path)
+    (assets / "2.json").write_text('{"tokenId": "2", "name": "changed"}')
+    (assets / "1.json").unlink()
+
+    cid = _publish(ipfs, assets, tmp_path)
+
+    assert cid == directory_cid(assets)
+    assert [call[0] for call in ipfs.calls].count("add") == 1
+    assert _mfs_calls(ipfs) == [
+        ("files/stat", MFS_PATH),
+        ("files/rm", f"{MFS_PATH}/1.json"),
+        ("files/rm", f"{MFS_PATH}/2.json"),
+        ("files/mkdir", MFS_PATH),
+        ("files/cp", f"/ipfs/{_cid(assets, '2.json')}", f"{MFS_PATH}/2.json"),
+        ("files/flush", MFS_PATH),
+        ("files/stat", MFS_PATH),
+        ("pin/update", first, cid),
+    ]
+    assert ipfs.pins == {cid}
+
+
+def test_unchanged_republish_adds_nothing(ipfs, assets, tmp_path):
+    first = _publish(ipfs, assets, tmp_path)
+    second = _publish(ipfs, assets, tmp_path)
+
+    assert second == first
+    assert ipfs.calls == [("files/stat", MFS_PATH), ("files/flush", MFS_PATH), ("files/stat", MFS_PATH), ("pin/add", first)]
+
+
+def test_diverged_mfs_copy_is_rebuilt_from_cached_cids(ipfs, assets, tmp_path):
+    first = _publish(ipfs, assets, tmp_path)
+    ipfs.mfs[f"{MFS_PATH}/stray.json"] = _cid(assets, "1.json")
+
+    cid = _publish(ipfs, assets, tmp_path)
+
+    assert cid == first
+    assert "add" not in [call[0] for call in ipfs.calls]
+    assert _mfs_calls(ipfs)[:4] == [
+        ("files/stat", MFS_PATH),
+        ("files/stat", MFS_PATH),
+        ("files/rm", MFS_PATH),
+        ("files/mkdir", MFS_PATH),
+    ]
+
+
+def _publish_car(ipfs, directory, tmp_path):
+    ipfs.calls.clear()
+    return publish_car(directory, car_path=tmp_path / "assets.car", api_url=ipfs.api_url,
+                       cache_path=tmp_path / "cids.sqlite")
+
+
+def test_car_leaves_out_files_under_the_previous_pin(ipfs, assets, tmp_path):
+    first = _publish(ipfs, assets, tmp_path)
+    (assets / "2.json").write_text('{"tokenId": "2", "name": "changed"}')
+
+    cid = _publish_car(ipfs, assets, tmp_path)
+
+    assert cid == directory_cid(assets)
+    blocks = set(ipfs.imported[-1])
+    assert _cid(assets, "2.json") in blocks
+    assert not blocks & {_cid(assets, "1.json"), _cid(assets, "12/1234.json")}
+    assert ipfs.pins == {cid} and first not in ipfs.pins
+
+
+def test_car_sends_every_file_when_the_previous_root_is_unpinned(ipfs, assets, tmp_path):
+    first = _publish(ipfs, assets, tmp_path)
+    ipfs.pins.discard(first)
+    (assets / "2.json").write_text('{"tokenId": "2", "name": "changed"}')
+
+    cid = _publish_car(ipfs, assets, tmp_path)
+
+    assert cid == directory_cid(assets)
+    assert {_cid(assets, "1.json"), _cid(assets, "2.json"), _cid(assets, "12/1234.json")} <= set(ipfs.imported[-1])
+    assert "refs" not in [call[0] for call in ipfs.calls]
@@ -0,0 +1,58 @@
+"""Tests for helpers/output_store.py layouts."""
+
+from helpers.metadata_helpers import generate_installation_token_ids
+from helpers.output_store import (
+    INDEX_FILE, PACK_FILE, close_output_store, compact_pack, export_flat, iter_records, open_output_store,
+    read_record, write_record,
+)
+
+
+def _write(directory, records, layout="pack", rewrite=False):
+    store = open_output_store(directory, layout, batch_size=3, rewrite=rewrite)
+    for token_id, payload in records.items():
+        write_record(store, token_id, payload)
+    close_output_store(store)
+
+
+def test_shards_spread_neighbouring_installations(tmp_path):
+    # A 1 km square: the leading Morton digits are the same for every point
+    lons = [-71.05 + i * 1e-4 for i in range(100)] * 10
+    lats = [41.66 + j * 1e-3 for j in range(10) for _ in range(100)]
+    token_ids = [str(t) for t in generate_installation_token_ids(lons, lats)]
+    _write(tmp_path, {t: b"{}" for t in token_ids}, layout="sharded")
+
+    shards = [path for path in tmp_path.iterdir() if path.is_dir()]
+    assert len(shards) >= 240
+    assert max(len(list(shard.rglob("*.json"))) for shard in shards) < 15
+    assert read_record(tmp_path, token_ids[0]) == b"{}"
+
+
+def test_full_run_rewrites_the_pack(tmp_path):
+    records = {str(i): f'{{"tokenId": "{i}"}}'.encode() for i in range(10)}
+    for _ in range(3):
+        _write(tmp_path, records, rewrite=True)
+    assert (tmp_path / PACK_FILE).stat().st_size == sum(len(payload) for payload in records.values())
+
+    del records["3"]
+    _write(tmp_path, records, rewrite=True)
+    assert dict(iter_records(tmp_path)) == records
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_compaction_drops_superseded_entries_and_removed_tokens(tmp_path):
+    records = {str(i): f'{{"tokenId": "{i}"}}'.encode() for i in range(10)}
+    _write(tmp_path, records)
+
+    # Appends that stay under the garbage threshold are kept as they are
+    _write(tmp_path, {"4": b'{"tokenId": "4", "v": 2}'})
+    assert not compact_pack(tmp_path, keep=records)
+
+    records["4"] = b'{"tokenId": "4", "v": 2}'
+    del records["7"]
+    assert compact_pack(tmp_path, keep=records)
+    assert dict(iter_records(tmp_path)) == records
+    assert (tmp_path / PACK_FILE).stat().st_size == sum(len(payload) for payload in records.values())
+    assert (tmp_path / INDEX_FILE).stat().st_size == 9 * 90
+
+    assert export_flat(tmp_path, tmp_path / "flat") == 9
+    assert sorted(path.stem for path in (tmp_path / "flat").glob("*.json")) == sorted(records)
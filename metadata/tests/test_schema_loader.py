@@ -0,0 +1,50 @@
+"""Tests for helpers/schema_loader.py batch validation."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from helpers.schema_loader import _validator_for_json, _validator_for_schema, load_schema, validate_many, validate_metadata
+
+
+@pytest.fixture(autouse=True)
+def metadata_dir(monkeypatch):
+    # Schemas are read relative to the metadata directory, as the CLIs run
+    monkeypatch.chdir(Path(__file__).resolve().parent.parent)
+
+
+def _component(token_id, **overrides):
+    record = {"name": "Module", "description": "", "image": "", "attributes": [],
+              "component_type": "module", "tokenId": token_id}
+    record.update(overrides)
+    return record
+
+
+def test_failures_are_keyed_by_record_position():
+    records = [_component("7"), _component("7", name=1), _component("7", description=2), _component("8")]
+
+    for workers, chunk_size in ((1, 1000), (2, 1)):
+        failures = validate_many(records, "component", workers=workers, chunk_size=chunk_size)
+        assert sorted(failures) == [1, 2]
+        assert failures[1][0]["path"] == "name"
+        assert failures[2][0]["path"] == "description"
+
+
+def test_equal_schemas_reuse_one_validator():
+    schema = load_schema("component")
+    installation = load_schema("installation")
+    untitled = {"type": "object", "required": ["tokenId"]}
+    _validator_for_json.cache_clear()
+
+    first = _validator_for_schema(dict(schema))
+    assert _validator_for_schema(dict(schema)) is first
+    assert _validator_for_schema(json.loads(json.dumps(schema))) is first
+    assert _validator_for_schema(installation) is not first
+    assert _validator_for_schema(dict(untitled)) is _validator_for_schema(dict(untitled))
+    assert _validator_for_schema(dict(schema)) is first
+    assert _validator_for_json.cache_info().misses == 3
+
+    for _ in range(3):
+        assert validate_metadata(_component("7"), dict(schema), "7")
+    assert _validator_for_json.cache_info().misses == 3
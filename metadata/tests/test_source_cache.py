@@ -0,0 +1,117 @@
+"""Tests for helpers/source_cache.py against a local HTTP stand-in for a
+registry source that supports ETag / Last-Modified revalidation."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from helpers.source_cache import fetch_source, read_cached_frame
+
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class _SourceHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append({
+            "if_none_match": self.headers.get("If-None-Match"),
+            "if_modified_since": self.headers.get("If-Modified-Since"),
+        })
+        etag = f'"v{server.version}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def source():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SourceHandler)
+    server.requests, server.version, server.body = [], 1, b"manufacturer,model\nAcme,A1\n"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/registry.csv"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _publish(server, body):
+    server.version += 1
+    server.body = body
+
+
+def test_revalidation_uses_validators_and_keeps_copy_on_304(source, tmp_path):
+    raw_path, meta = fetch_source(source.url, offline=False, cache_dir=tmp_path)
+    assert raw_path.read_bytes() == source.body
+    assert meta["etag"] == '"v1"' and meta["last_modified"] == LAST_MODIFIED
+
+    raw_again, meta_again = fetch_source(source.url, offline=False, cache_dir=tmp_path)
+    assert source.requests[0] == {"if_none_match": None, "if_modified_since": None}
+    assert source.requests[1] == {"if_none_match": '"v1"', "if_modified_since": LAST_MODIFIED}
+    assert raw_again == raw_path and meta_again == meta
+
+
+def test_changed_source_is_downloaded_again(source, tmp_path):
+    fetch_source(source.url, offline=False, cache_dir=tmp_path)
+    _publish(source, b"manufacturer,model\nAcme,A2\n")
+
+    raw_path, meta = fetch_source(source.url, offline=False, cache_dir=tmp_path)
+    assert raw_path.read_bytes() == source.body
+    assert meta["etag"] == '"v2"'
+
+
+def test_offline_mode_never_contacts_the_source(source, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        fetch_source(source.url, offline=True, cache_dir=tmp_path)
+
+    fetch_source(source.url, offline=False, cache_dir=tmp_path)
+    raw_path, _ = fetch_source(source.url, offline=True, cache_dir=tmp_path)
+    assert raw_path.read_bytes() == source.body
+    assert len(source.requests) == 1
+
+
+def test_unreachable_source_falls_back_to_cached_copy(source, tmp_path):
+    fetch_source(source.url, offline=False, cache_dir=tmp_path)
+    source.shutdown()
+    source.server_close()
+
+    raw_path, meta = fetch_source(source.url, offline=False, cache_dir=tmp_path)
+    assert raw_path.read_bytes() == b"manufacturer,model\nAcme,A1\n"
+    assert meta["etag"] == '"v1"'
+
+
+def test_snapshots_are_reused_and_pruned(source, tmp_path):
+    parses = []
+
+    def parse(path):
+        parses.append(path)
+        return pd.read_csv(path)
+
+    first = read_cached_frame(source.url, parse, parse_key="csv", offline=False, cache_dir=tmp_path)
+    read_cached_frame(source.url, parse, parse_key="other", offline=False, cache_dir=tmp_path)
+    again = read_cached_frame(source.url, parse, parse_key="csv", offline=False, cache_dir=tmp_path)
+    assert len(parses) == 2
+    pd.testing.assert_frame_equal(again, first)
+
+    entry_dir = parses[0].parent
+    snapshots = lambda: sorted(p.name for p in entry_dir.iterdir() if p.suffix in (".parquet", ".pkl"))
+    old = snapshots()
+    assert len(old) == 2
+
+    _publish(source, b"manufacturer,model\nAcme,A2\n")
+    changed = read_cached_frame(source.url, parse, parse_key="csv", offline=False, cache_dir=tmp_path)
+    assert changed["model"].tolist() == ["A2"]
+    current = snapshots()
+    assert len(current) == 1 and current[0] not in old
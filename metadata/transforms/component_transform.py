@@ -1,38 +1,34 @@
-from helpers.metadata_helpers import generate_component_token_id, clean_row
+from helpers.metadata_helpers import generate_component_token_ids, clean_frame
 import pandas as pd
-import numpy as np
 
 RESERVED_KEYS = {
     'tokenId','name', 'description', 'image', 'component_type', 'data_sheet'
 }
 
 def component_transform(df, asset_name, config):
-    records = []
-
-    for idx, row in df.iterrows():
-        row = clean_row(row)
-        record = {}
-
-        manufacturer = row.get("manufacturer","")
-        model = row.get("model","")
-        component_type = asset_name
-    
-        token_id = generate_component_token_id(component_type, manufacturer, model)
-
-        # Basic fields
-        record['name'] = f"{manufacturer} {model}"
-        record['description'] = row.get('description', "")
-        record['image'] = f"ipfs://bayf.../{config['image_subdir']}"
-        record['data_sheet'] = f"ipfs://bayf.../{config['doc_subdir']}"
-        record['component_type'] = component_type
-        record['tokenId'] = token_id
-
-        record['attributes'] = []
-        for key, value in row.items():
-            if key not in RESERVED_KEYS and (value is not None) and (value is not np.nan):
-                if pd.notna(value):
-                    record['attributes'].append({"trait_type": key, "value": value})
-
-        records.append(record)
-
-    return pd.DataFrame(records)
+    df = clean_frame(df)
+    component_type = asset_name
+    n = len(df)
+
+    manufacturers = df["manufacturer"].tolist() if "manufacturer" in df else [""] * n
+    models = df["model"].tolist() if "model" in df else [""] * n
+    token_ids = generate_component_token_ids(component_type, manufacturers, models)
+
+    # Attributes from a precomputed column mask
+    attribute_columns = [key for key in df.columns if key not in RESERVED_KEYS]
+    attribute_values = df[attribute_columns].to_numpy()
+    present = pd.notna(attribute_values)
+    attributes = [
+        [{"trait_type": key, "value": value} for key, value, keep in zip(attribute_columns, row_values, row_present) if keep]
+        for row_values, row_present in zip(attribute_values, present)
+    ]
+
+    return pd.DataFrame({
+        'name': [f"{manufacturer} {model}" for manufacturer, model in zip(manufacturers, models)],
+        'description': df['description'].tolist() if 'description' in df else [""] * n,
+        'image': [f"ipfs://bayf.../{config['image_subdir']}"] * n,
+        'data_sheet': [f"ipfs://bayf.../{config['doc_subdir']}"] * n,
+        'component_type': [component_type] * n,
+        'tokenId': token_ids,
+        'attributes': attributes,
+    })
@@ -1,8 +1,7 @@
-from helpers.geometry_helpers import decode_geometry_geojson, transform_centroid
-from helpers.extract_components import extract_component_array
-from helpers.metadata_helpers import generate_installation_token_id
+from helpers.geometry_helpers import decode_geometry_geojson, transform_centroids
+from helpers.extract_components import extract_component_slots
+from helpers.metadata_helpers import generate_installation_token_ids
 import pandas as pd
-import numpy as np
 
 
 RESERVED_KEYS = {
@@ -11,44 +10,63 @@ RESERVED_KEYS = {
     'name', 'description', 'image', 'installation_type'
 }
 
-def solar_array_transform(df):
-    df = df.drop("geometry",axis=1).rename(columns={"wkt_geometry":"geometry"})
-    records = []
+COMPONENT_PREFIXES = ("module", "inverter", "battery")
+
 
-    for idx, row in df.iterrows():
-        record = {}
+def _is_attribute_column(key):
+    return key not in RESERVED_KEYS and all(f"{prefix}_" not in key for prefix in COMPONENT_PREFIXES)
 
-        # Handle centroid
-        centroid = transform_centroid(row['centroid'])
 
-        # Morton encode tokenId
-        record['tokenId'] = generate_installation_token_id(centroid)
+def solar_array_transform(df):
+    df = df.drop("geometry",axis=1).rename(columns={"wkt_geometry":"geometry"})
+    columns = list(df.columns)
+
+    # Same row values DataFrame.iterrows would hand out, built once
+    values = df.to_numpy()
+    position = {key: i for i, key in enumerate(columns)}
 
-        # Basic fields
-        record['name'] = row.get('name', f"Installation {record['tokenId']}")
-        record['description'] = row.get('description', "")
-        record['image'] = row.get('image', "")
-        record['installation_type'] = "generation"
+    # Centroids and Morton tokenIds for every row at once
+    centroids = transform_centroids(df['centroid'])
+    lons = [c[0] for c in centroids]
+    lats = [c[1] for c in centroids]
+    token_ids = generate_installation_token_ids(lons, lats)
 
-        record['centroid'] = centroid
-        #record['bbox'] = row.get('bbox', "")
-        # Geometry (already extracted via ST_AsGeoJSON)
-        record['geometry'] = decode_geometry_geojson(row['geometry'])
+    def column_or(key, default):
+        if key in position:
+            return values[:, position[key]].tolist()
+        return [default(token_id) for token_id in token_ids]
 
-        # Components
-        record['components'] = {
-            "modules": extract_component_array(row, "module"),
-            "inverters": extract_component_array(row, "inverter"),
-            "batteries": extract_component_array(row, "battery")
-        }
+    names = column_or('name', lambda token_id: f"Installation {token_id}")
+    descriptions = column_or('description', lambda token_id: "")
+    images = column_or('image', lambda token_id: "")
 
-        record['attributes'] = []
-        for key, value in row.items():
-            if key not in RESERVED_KEYS and (value is not None) and (value is not np.nan) and ("module_" not in key) and ("inverter_" not in key) and ("battery_" not in key):
-                if pd.notna(value):
-                    record['attributes'].append({"trait_type": key, "value": value})
+    # Geometry (already extracted via ST_AsGeoJSON)
+    geometries = [decode_geometry_geojson(g) for g in values[:, position['geometry']]]
 
+    # Components, from the numbered <prefix>_<field>_<n> columns, every slot
+    slots = extract_component_slots(df, COMPONENT_PREFIXES, values)
+    components = [
+        {"modules": modules, "inverters": inverters, "batteries": batteries}
+        for modules, inverters, batteries in zip(slots["module"], slots["inverter"], slots["battery"])
+    ]
 
-        records.append(record)
+    # Attributes from a precomputed column mask
+    attribute_columns = [key for key in columns if _is_attribute_column(key)]
+    attribute_values = values[:, [position[key] for key in attribute_columns]]
+    present = pd.notna(attribute_values)
+    attributes = [
+        [{"trait_type": key, "value": value} for key, value, keep in zip(attribute_columns, row_values, row_present) if keep]
+        for row_values, row_present in zip(attribute_values, present)
+    ]
 
-    return pd.DataFrame(records)
+    return pd.DataFrame({
+        'tokenId': token_ids,
+        'name': names,
+        'description': descriptions,
+        'image': images,
+        'installation_type': ["generation"] * len(df),
+        'centroid': centroids,
+        'geometry': geometries,
+        'components': components,
+        'attributes': attributes,
+    })